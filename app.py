@@ -1,14 +1,34 @@
 # src/app.py
 
 
+import asyncio
+import json
+from contextlib import asynccontextmanager, suppress
+from typing import Any, Literal, Optional
+
 import nltk
-from fastapi import FastAPI, HTTPException
+import orjson
+from fastapi import Body, FastAPI, HTTPException, Query
+from fastapi.responses import StreamingResponse
 
+from config import Config
 from hatchet_instance import hatchet
+from src.EmbedConnectors.commons import usage_aggregator
+from src.EmbedConnectors.concurrency import concurrency_stats
+from src.EmbedConnectors.EmbedConnector import EmbedConnector
+from src.EmbedConnectors.endpoint_pool import endpoint_pool_stats
+from src.EmbedConnectors.query_cache import query_embedding_cache
 from src.ModelFactories.EmbedConnectorFactory import EmbedConnectorFactory
 from src.ModelFactories.SinkConnectorFactory import SinkConnectorFactory
 from src.Shared.pipeline_config_schema import PipelineConfigSchema
 from src.Shared.RagDocument import RagDocument
+from src.Shared.vector_transform import VectorTransform
+from src.Shared.vector_utils import as_vector
+from src.SinkConnectors.client_registry import es_client_registry
+from src.SinkConnectors.filter_compiler import compile_filters
+from src.SinkConnectors.filter_utils import dict_to_filter_condition
+from src.SinkConnectors.hybrid_search import HybridQuery
+from utils.http.client_pool import httpx_client_pool
 from utils.platform_commons.logger import logger
 
 # /Users/Z0084K9/nltk_data/corpora/stopwords
@@ -16,11 +36,88 @@ from utils.platform_commons.logger import logger
 nltk.download("punkt")
 nltk.download("averaged_perceptron_tagger")
 
-app = FastAPI()
+
+config = Config()
+
+# Popular queries per pipeline id, embedded as soon as the pipeline is registered
+prewarm_queries: dict[str, list[str]] = {}
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if config.query_cache_prewarm_path:
+        try:
+            with open(config.query_cache_prewarm_path) as prewarm_file:
+                prewarm_queries.update(json.load(prewarm_file))
+            logger.info(f"Loaded popular queries for {len(prewarm_queries)} pipelines")
+        except (OSError, ValueError) as e:
+            logger.error(f"Failed to load query cache prewarm file: {e}")
+    yield
+    # Publish buffered usage and release pooled embedding connections on worker shutdown
+    await usage_aggregator.aclose()
+    await httpx_client_pool.aclose()
+    await es_client_registry.aclose()
+
+
+app = FastAPI(lifespan=lifespan)
 
 # --- API Endpoints ---
 # In-memory storage for pipeline configurations
 pipeline_configs: dict[str, PipelineConfigSchema] = {}
+# Embed connectors reused across searches, keyed by pipeline id
+embed_connectors: dict[str, EmbedConnector] = {}
+
+
+def get_embed_connector(pipeline_id: str) -> EmbedConnector:
+    """Returns the pipeline's embed connector, creating it on first use."""
+    if pipeline_id not in embed_connectors:
+        embed_model = pipeline_configs[pipeline_id].embed_model
+        embed_connectors[pipeline_id] = EmbedConnectorFactory.get_embed(
+            embed_name=embed_model.model_name,
+            embed_information=embed_model.settings,
+        )
+    return embed_connectors[pipeline_id]
+
+
+def query_cache_namespace(pipeline_id: str) -> tuple:
+    """Query embeddings are cached per (pipeline, model, dimensions)."""
+    embed_model = pipeline_configs[pipeline_id].embed_model
+    return (pipeline_id, embed_model.model_name, embed_model.settings.get("dimensions"))
+
+
+def query_embedder(pipeline_id: str):
+    """Returns a function embedding a list of queries with the pipeline's embed connector."""
+    embed_connector = get_embed_connector(pipeline_id)
+
+    async def embed_queries(queries: list[str]) -> list:
+        documents = [
+            RagDocument(id=f"query-{idx}", content=query, metadata={})
+            for idx, query in enumerate(queries)
+        ]
+        embeddings, _ = await embed_connector.embed(documents)
+        return embeddings
+
+    return embed_queries
+
+
+async def prewarm_query_cache(pipeline_id: str, queries: list[str]) -> int:
+    """Embeds popular queries for a pipeline into the query embedding cache."""
+    try:
+        warmed = await query_embedding_cache.prewarm(
+            query_cache_namespace(pipeline_id), queries, query_embedder(pipeline_id)
+        )
+        logger.info(f"Pre-warmed {warmed} query embeddings for pipeline '{pipeline_id}'")
+        return warmed
+    except Exception as e:
+        logger.error(f"Failed to pre-warm query embeddings for '{pipeline_id}': {e}")
+        raise
+
+
+async def prewarm_on_create(pipeline_id: str):
+    # Failures are logged by prewarm_query_cache and must not surface from a background task
+    with suppress(Exception):
+        await prewarm_query_cache(pipeline_id, prewarm_queries[pipeline_id])
+
 
 @app.post("/pipelines/", response_model=PipelineConfigSchema, status_code=201)
 async def create_pipeline(pipeline_config: PipelineConfigSchema):
@@ -30,6 +127,8 @@ async def create_pipeline(pipeline_config: PipelineConfigSchema):
         raise HTTPException(status_code=400, detail="Pipeline ID already exists")
     pipeline_configs[pipeline_id] = pipeline_config
     print(f"Pipeline created: {pipeline_config}")
+    if prewarm_queries.get(pipeline_id):
+        asyncio.create_task(prewarm_on_create(pipeline_id))
     return pipeline_config
 
 @app.get("/pipelines/{pipeline_id}", response_model=PipelineConfigSchema)
@@ -97,12 +196,43 @@ async def run_pipeline(pipeline_id: str, extract_type: str = "full"):
 
 # Search endpoint
 @app.post("/pipelines/{pipeline_id}/search")
-async def search_pipeline(pipeline_id: str, query: str, top_k: int = 5):
-    """Searches documents in the sink using the embedded query."""
+async def search_pipeline(
+    pipeline_id: str,
+    query: str,
+    top_k: int = 5,
+    num_candidates: Optional[int] = None,
+    mode: Literal["vector", "hybrid"] = "vector",
+    knn_weight: float = config.elasticsearch_hybrid_knn_weight,
+    text_weight: float = config.elasticsearch_hybrid_text_weight,
+    rank_window_size: int = config.elasticsearch_hybrid_rank_window_size,
+    filters: Optional[list[dict[str, Any]]] = Body(None),
+    include_vectors: bool = False,
+    fields: Optional[list[str]] = Query(None),
+):
+    """Searches documents in the sink with a kNN search for the embedded query.
+
+    ``num_candidates`` trades latency for recall; it defaults to the sink's setting. In
+    ``hybrid`` mode the query text is also matched with BM25 and the two rankings are fused
+    with reciprocal rank fusion, weighted by ``knn_weight`` and ``text_weight`` over the top
+    ``rank_window_size`` hits of each.
+
+    The request body may hold ``filters``, a list of ``{"field", "operator", "value"}``
+    conditions such as ``{"field": "metadata.year", "operator": "BETWEEN",
+    "value": [2020, 2024]}``; results are pre-filtered by them.
+
+    Stored vectors are left out of the results unless ``include_vectors`` is set, and
+    ``fields`` (repeatable) limits each result to the listed source fields.
+    """
     if pipeline_id not in pipeline_configs:
         logger.error(f"❌ Pipeline '{pipeline_id}' not found")
         raise HTTPException(status_code=404, detail="Pipeline not found")
 
+    try:
+        filter_conditions = dict_to_filter_condition(filters or [])
+        compile_filters(filter_conditions)
+    except (KeyError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid filters: {e}")
+
     # Use the same creation method to ensure es_monitor is set
     pipeline_config = pipeline_configs[pipeline_id]
 
@@ -110,32 +240,41 @@ async def search_pipeline(pipeline_id: str, query: str, top_k: int = 5):
         logger.info(f"🔍 Starting search in pipeline: {pipeline_id}")
         logger.info(f"📘 Query: {query}, Top K: {top_k}")
 
-        # Wrap query in a RagDocument with required fields
-        query_document = RagDocument(id="query-id", content=query, metadata={})
-
-        # Instantiate the embed connector using the factory
-        embed_connector = EmbedConnectorFactory.get_embed(
-            embed_name=pipeline_config.embed_model.model_name,
-            embed_information=pipeline_config.embed_model.settings,
+        # Repeated and concurrent identical queries share one embedding call
+        embedded_query = await query_embedding_cache.get_or_embed(
+            query_cache_namespace(pipeline_id), query, query_embedder(pipeline_id)
         )
-        logger.info("Embed connector instantiated successfully.")
-
-        embeddings, _ = await embed_connector.embed([query_document])
-
-        if not embeddings or not isinstance(embeddings, list):
-            raise ValueError("Failed to generate embeddings for query")
-        embedded_query = embeddings[0]
-        logger.info(f"📊 Embedded query vector: {embedded_query}")
 
         sink_connector = SinkConnectorFactory.get_sink(
             pipeline_config.sink.type, pipeline_config.sink.settings
         )
 
-        # Perform the search using the sink's search method
-        results = sink_connector.search(embedded_query, top_k)
+        # Perform the search using the sink's search method, without blocking the worker loop
+        # Stored vectors may be truncated or quantised; the query must match them
+        query_vector = VectorTransform(pipeline_config.vector_transform).transform(
+            as_vector(embedded_query)
+        )
+        hybrid = None
+        if mode == "hybrid":
+            hybrid = HybridQuery(
+                text=query,
+                knn_weight=knn_weight,
+                text_weight=text_weight,
+                rank_window_size=max(rank_window_size, top_k),
+            )
+        results = await sink_connector.asearch(
+            query_vector,
+            top_k,
+            filter_conditions,
+            num_candidates=num_candidates,
+            hybrid=hybrid,
+            include_vectors=include_vectors,
+            fields=fields,
+        )
         logger.info(f"✅ Search successful, results count: {len(results)}")
 
-        return {"results": [result.dict() for result in results]}
+        exclude = None if include_vectors else {"vector"}
+        return {"results": [result.dict(exclude=exclude) for result in results]}
 
     except Exception as e:
         logger.error(f"❌ Search failed: {str(e)}", exc_info=True)
@@ -143,7 +282,23 @@ async def search_pipeline(pipeline_id: str, query: str, top_k: int = 5):
 
 
 @app.get("/pipelines/{pipeline_id}/documents")
-async def get_documents(pipeline_id: str, size: int = 10):
+async def get_documents(
+    pipeline_id: str,
+    size: int = Query(10, ge=-1),
+    page_size: Optional[int] = None,
+    slices: Optional[int] = None,
+    include_vectors: bool = False,
+    fields: Optional[list[str]] = Query(None),
+):
+    """Streams the pipeline's documents as NDJSON, one document per line.
+
+    The index is exported through a point in time in constant memory, so indexes of any
+    size can be dumped or migrated. ``size`` stops the export after that many documents,
+    10 by default; a ``size`` of -1 exports the whole index.
+    ``page_size`` and ``slices`` override the sink's export page size and parallel readers.
+    Vectors are left out unless ``include_vectors`` is set, and ``fields`` (repeatable)
+    limits each document to the listed source fields.
+    """
     if pipeline_id not in pipeline_configs:
         logger.error(f"Pipeline '{pipeline_id}' not found.")
         raise HTTPException(status_code=404, detail="Pipeline not found")
@@ -155,16 +310,64 @@ async def get_documents(pipeline_id: str, size: int = 10):
         sink_connector = SinkConnectorFactory.get_sink(
             pipeline_config.sink.type, pipeline_config.sink.settings
         )
-        # Ensure index exists (if required) before querying documents
-        # pipeline_config.
-
-        results = sink_connector.get_documents(size=size)
-        logger.info(f"Retrieved {len(results)} documents from Elasticsearch.")
-        return {"documents": [result.dict() for result in results]}
+        documents = sink_connector.aexport_documents(
+            page_size=page_size, slices=slices, include_vectors=include_vectors, fields=fields
+        )
+        # Read the first document before streaming, so a failed export still gets a 500
+        first = await anext(documents, None)
     except Exception as e:
         logger.error(f"Error retrieving documents: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Failed to retrieve documents: {str(e)}")
 
+    exclude = None if include_vectors else {"vector"}
+
+    async def lines():
+        count = 0
+        try:
+            document = first
+            while document is not None and (size == -1 or count < size):
+                yield orjson.dumps(document.dict(exclude=exclude)) + b"\n"
+                count += 1
+                document = await anext(documents, None)
+            logger.info(f"Exported {count} documents from Elasticsearch.")
+        except Exception as e:
+            # The response has started; the client sees a truncated stream
+            logger.error(f"Document export failed after {count} documents: {e}", exc_info=True)
+        finally:
+            await documents.aclose()
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+@app.post("/pipelines/{pipeline_id}/search/prewarm")
+async def prewarm_search(pipeline_id: str, queries: list[str]):
+    """Embeds popular queries ahead of traffic so their searches skip the embedding call."""
+    if pipeline_id not in pipeline_configs:
+        raise HTTPException(status_code=404, detail="Pipeline not found")
+    try:
+        warmed = await prewarm_query_cache(pipeline_id, queries)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to pre-warm queries: {str(e)}")
+    return {"warmed": warmed, "cache": query_embedding_cache.stats()}
+
+
+@app.get("/health/query-cache")
+async def query_cache_stats():
+    """Returns hit, miss and coalesced counts of the query embedding cache."""
+    return query_embedding_cache.stats()
+
+
+@app.get("/health/http-pool")
+async def http_pool_stats():
+    """Returns utilisation of the shared httpx connection pools, embed concurrency limits,
+    the health of each embeddings replica and the shared Elasticsearch clients and sinks."""
+    return {
+        "pools": httpx_client_pool.stats(),
+        "concurrency": concurrency_stats(),
+        "endpoints": endpoint_pool_stats(),
+        "elasticsearch": es_client_registry.stats(),
+        "sinks": SinkConnectorFactory.stats(),
+    }
 
 
 if __name__ == "__main__":
@@ -1,4 +1,5 @@
 # src/config.py
+import json
 import os
 
 from dotenv import load_dotenv
@@ -22,6 +23,10 @@ class Config:
     openai_embeddings_batch_size: int = int(
         os.getenv("OPENAI_EMBEDDINGS_BATCH_SIZE", "10")
     )  # Added default and type conversion
+    # "base64" returns packed float32 bytes, skipping float-by-float JSON parsing
+    openai_embeddings_encoding_format: str = os.getenv(
+        "OPENAI_EMBEDDINGS_ENCODING_FORMAT", "base64"
+    )
     batch_mode: str = "static"
     ham_embeddings_batch_size: int = 100
     ham_embeddings_endpoint: str = (
@@ -35,6 +40,10 @@ class Config:
     max_batch_size: int = 500
     min_batch_size: int = 50
     thinktank: str = os.getenv("THINKTANK_URL", "YOUR_THINKTANK_URL")
+    # Maximum in-flight ThinkTank embedding requests per call, keyed by model
+    thinktank_embeddings_concurrency: dict[str, int] = json.loads(
+        os.getenv("THINKTANK_EMBEDDINGS_CONCURRENCY", '{"default": 4}')
+    )
     default_embedding_model: str = os.getenv(
         "DEFAULT_EMBEDDING_MODEL", "text-embedding-ada-002"
     )  # Added default value
@@ -48,6 +57,10 @@ class Config:
     oauth_nuid_password: str = os.getenv(
         "OAUTH_NUID_PASSWORD", "YOUR_OAUTH_NUID_PASSWORD"
     )  # OAuth NUID password
+    # Fraction of a token's lifetime after which it is renewed in the background
+    oauth_token_refresh_ratio: float = float(os.getenv("OAUTH_TOKEN_REFRESH_RATIO", "0.5"))
+    # Seconds before expiry at which a token is no longer handed out
+    oauth_token_expiry_margin_s: float = float(os.getenv("OAUTH_TOKEN_EXPIRY_MARGIN_S", "30"))
     metrics_enabled: bool = (
         os.getenv("METRICS_ENABLED", "True").lower() == "true"
     )  # Default to True, convert string to boolean
@@ -152,6 +165,72 @@ class Config:
     workflow_record_lock_limit: int = int(os.getenv("WORKFLOW_RECORD_LOCK_LIMIT", "5"))
 
     milvus_ingest_batch_size: int = int(os.getenv("MILVUS_INGEST_BATCH_SIZE", "100"))
+
+    # Elasticsearch bulk ingestion: documents and bytes per _bulk request, requests in
+    # flight at once, and how often documents rejected with a retryable status are resent
+    elasticsearch_bulk_max_actions: int = int(os.getenv("ELASTICSEARCH_BULK_MAX_ACTIONS", "500"))
+    elasticsearch_bulk_max_bytes: int = int(
+        os.getenv("ELASTICSEARCH_BULK_MAX_BYTES", str(10 * 1024 * 1024))
+    )
+    elasticsearch_bulk_max_in_flight: int = int(os.getenv("ELASTICSEARCH_BULK_MAX_IN_FLIGHT", "2"))
+    elasticsearch_bulk_max_retries: int = int(os.getenv("ELASTICSEARCH_BULK_MAX_RETRIES", "3"))
+    elasticsearch_bulk_retry_backoff_s: float = float(
+        os.getenv("ELASTICSEARCH_BULK_RETRY_BACKOFF_S", "0.5")
+    )
+    # Refresh policy of incremental _bulk writes: "wait_for" returns once the documents are
+    # searchable, "false" leaves them to the index's periodic refresh
+    elasticsearch_refresh_policy: str = os.getenv("ELASTICSEARCH_REFRESH_POLICY", "wait_for")
+    # Full extractions load the index with refreshes suspended (and optionally without
+    # replicas), then force-merge it down to this many segments; 0 skips the force-merge
+    elasticsearch_bulk_load_drop_replicas: bool = (
+        os.getenv("ELASTICSEARCH_BULK_LOAD_DROP_REPLICAS", "False").lower() == "true"
+    )
+    elasticsearch_bulk_load_max_segments: int = int(
+        os.getenv("ELASTICSEARCH_BULK_LOAD_MAX_SEGMENTS", "1")
+    )
+    elasticsearch_force_merge_timeout_s: float = float(
+        os.getenv("ELASTICSEARCH_FORCE_MERGE_TIMEOUT_S", "3600")
+    )
+    # Compiled search filters cached by structure
+    elasticsearch_filter_cache_size: int = int(os.getenv("ELASTICSEARCH_FILTER_CACHE_SIZE", "1024"))
+    # Streaming exports: hits per page, slices read in parallel and how long the point in
+    # time is kept open between pages
+    elasticsearch_export_page_size: int = int(os.getenv("ELASTICSEARCH_EXPORT_PAGE_SIZE", "1000"))
+    elasticsearch_export_slices: int = int(os.getenv("ELASTICSEARCH_EXPORT_SLICES", "2"))
+    elasticsearch_export_keep_alive: str = os.getenv("ELASTICSEARCH_EXPORT_KEEP_ALIVE", "2m")
+    # Elasticsearch clients are shared per cluster and credentials across sinks
+    elasticsearch_connections_per_node: int = int(
+        os.getenv("ELASTICSEARCH_CONNECTIONS_PER_NODE", "10")
+    )
+    elasticsearch_request_timeout_s: float = float(
+        os.getenv("ELASTICSEARCH_REQUEST_TIMEOUT_S", "10")
+    )
+    # Elasticsearch dense_vector mapping and kNN search defaults
+    elasticsearch_vector_similarity: str = os.getenv("ELASTICSEARCH_VECTOR_SIMILARITY", "cosine")
+    elasticsearch_hnsw_m: int = int(os.getenv("ELASTICSEARCH_HNSW_M", "16"))
+    elasticsearch_hnsw_ef_construction: int = int(
+        os.getenv("ELASTICSEARCH_HNSW_EF_CONSTRUCTION", "100")
+    )
+    elasticsearch_knn_num_candidates: int = int(
+        os.getenv("ELASTICSEARCH_KNN_NUM_CANDIDATES", "100")
+    )
+    # Hybrid search: weights of the kNN and BM25 rankings in reciprocal rank fusion, hits
+    # taken from each before fusing, and the RRF rank constant
+    elasticsearch_hybrid_knn_weight: float = float(
+        os.getenv("ELASTICSEARCH_HYBRID_KNN_WEIGHT", "1.0")
+    )
+    elasticsearch_hybrid_text_weight: float = float(
+        os.getenv("ELASTICSEARCH_HYBRID_TEXT_WEIGHT", "1.0")
+    )
+    elasticsearch_hybrid_rank_window_size: int = int(
+        os.getenv("ELASTICSEARCH_HYBRID_RANK_WINDOW_SIZE", "50")
+    )
+    elasticsearch_hybrid_rank_constant: int = int(
+        os.getenv("ELASTICSEARCH_HYBRID_RANK_CONSTANT", "60")
+    )
+    # Sink connectors are cached per configuration and dropped after being idle this long
+    sink_cache_max_items: int = int(os.getenv("SINK_CACHE_MAX_ITEMS", "128"))
+    sink_cache_idle_ttl_s: float = float(os.getenv("SINK_CACHE_IDLE_TTL_S", "900"))
     profiler_enabled: bool = os.getenv("PROFILER_ENABLED", "False").lower() == "true"
 
     # Redis configuration
@@ -197,6 +276,12 @@ class Config:
         os.getenv("UVICORN_WORKER_MAX_REQUESTS_JITTER", "0")
     )
 
+    # Shared httpx connection pool configuration
+    httpx_max_connections: int = int(os.getenv("HTTPX_MAX_CONNECTIONS", "100"))
+    httpx_max_keepalive_connections: int = int(os.getenv("HTTPX_MAX_KEEPALIVE_CONNECTIONS", "20"))
+    httpx_keepalive_expiry: float = float(os.getenv("HTTPX_KEEPALIVE_EXPIRY", "30"))
+    httpx_http2: bool = os.getenv("HTTPX_HTTP2", "True").lower() == "true"
+
     # Embeddings configurations
     # Embedding models with configurable dimensions from .env
     text_embedding_3_small_dimensions: list[int] = [
@@ -211,6 +296,93 @@ class Config:
     ]
     jina_v2_base_dimensions: list[int] = [768]
 
+    # Per-request token budgets used when packing embedding batches
+    embedding_request_token_budgets: dict[str, int] = json.loads(
+        os.getenv(
+            "EMBEDDING_REQUEST_TOKEN_BUDGETS",
+            '{"default": 8191, "text-embedding-ada-002": 100000, '
+            '"text-embedding-3-small": 100000, "text-embedding-3-large": 100000, '
+            '"jina-v2-base": 32768}',
+        )
+    )
+
+    # Per-input token limits of each embedding model, and what to do with longer inputs:
+    # truncate, split into several chunks, drop, or error
+    embedding_input_token_limits: dict[str, int] = json.loads(
+        os.getenv(
+            "EMBEDDING_INPUT_TOKEN_LIMITS",
+            '{"default": 8191, "jina-v2-base": 8192}',
+        )
+    )
+    embedding_input_oversize_policy: str = os.getenv("EMBEDDING_INPUT_OVERSIZE_POLICY", "truncate")
+    embedding_input_normalise_whitespace: bool = (
+        os.getenv("EMBEDDING_INPUT_NORMALISE_WHITESPACE", "True").lower() == "true"
+    )
+
+    # Embedding cache configuration
+    embedding_cache_enabled: bool = os.getenv("EMBEDDING_CACHE_ENABLED", "True").lower() == "true"
+    embedding_cache_memory_items: int = int(os.getenv("EMBEDDING_CACHE_MEMORY_ITEMS", "10000"))
+    embedding_cache_path: str = os.getenv(
+        "EMBEDDING_CACHE_PATH", ".cache/embedding_cache.sqlite3"
+    )  # Empty string keeps the cache memory-only
+    embedding_cache_max_disk_bytes: int = int(
+        os.getenv("EMBEDDING_CACHE_MAX_DISK_BYTES", str(1024 * 1024 * 1024))
+    )
+
+    # Embedding usage is buffered and published per (user, model) on an interval or size
+    usage_flush_interval_s: float = float(os.getenv("USAGE_FLUSH_INTERVAL_S", "10"))
+    usage_flush_max_records: int = int(os.getenv("USAGE_FLUSH_MAX_RECORDS", "1000"))
+
+    # Identical chunk texts are embedded once per batch; the vectors of the last
+    # CHUNK_DEDUP_WINDOW_ITEMS distinct texts are reused across files
+    chunk_dedup_enabled: bool = os.getenv("CHUNK_DEDUP_ENABLED", "True").lower() == "true"
+    chunk_dedup_window_items: int = int(os.getenv("CHUNK_DEDUP_WINDOW_ITEMS", "10000"))
+
+    # Search query embedding cache configuration
+    query_cache_max_items: int = int(os.getenv("QUERY_CACHE_MAX_ITEMS", "10000"))
+    query_cache_ttl_seconds: float = float(os.getenv("QUERY_CACHE_TTL_SECONDS", "3600"))
+    # JSON file mapping pipeline ids to lists of popular queries to embed at startup
+    query_cache_prewarm_path: str = os.getenv("QUERY_CACHE_PREWARM_PATH", "")
+
+    # Adaptive (AIMD) concurrency control for embedding endpoints
+    embed_initial_concurrency: int = int(os.getenv("EMBED_INITIAL_CONCURRENCY", "2"))
+    embed_min_concurrency: int = int(os.getenv("EMBED_MIN_CONCURRENCY", "1"))
+    embed_max_concurrency: int = int(os.getenv("EMBED_MAX_CONCURRENCY", "16"))
+    embed_aimd_decrease_factor: float = float(os.getenv("EMBED_AIMD_DECREASE_FACTOR", "0.5"))
+    embed_aimd_batch_step: int = int(os.getenv("EMBED_AIMD_BATCH_STEP", "10"))
+
+    # Embedding rate limiting. Limits are keyed by model; 0 disables a budget. The redis
+    # backend shares budgets across every worker through the redis_cache_* instance.
+    embed_rate_limit_backend: str = os.getenv("EMBED_RATE_LIMIT_BACKEND", "local")
+    embed_rate_limits: dict[str, dict[str, int]] = json.loads(
+        os.getenv(
+            "EMBED_RATE_LIMITS",
+            '{"default": {"requests_per_minute": 0, "tokens_per_minute": 0}}',
+        )
+    )
+    embed_rate_limit_max_retries: int = int(os.getenv("EMBED_RATE_LIMIT_MAX_RETRIES", "5"))
+    embed_rate_limit_max_backoff_s: float = float(os.getenv("EMBED_RATE_LIMIT_MAX_BACKOFF_S", "60"))
+
+    # Replicas of each embeddings service, comma separated. Empty uses the single endpoint
+    # configured above. Requests go to the replica with the lowest EWMA latency.
+    openai_embeddings_endpoints: list[str] = [
+        url for url in os.getenv("OPENAI_EMBEDDINGS_ENDPOINTS", "").split(",") if url
+    ] or [openai_embeddings_endpoint]
+    ham_embeddings_endpoints: list[str] = [
+        url for url in os.getenv("HAM_EMBEDDINGS_ENDPOINTS", "").split(",") if url
+    ] or [ham_embeddings_endpoint]
+    thinktank_urls: list[str] = [
+        url for url in os.getenv("THINKTANK_URLS", "").split(",") if url
+    ] or [thinktank]
+    embed_endpoint_ewma_alpha: float = float(os.getenv("EMBED_ENDPOINT_EWMA_ALPHA", "0.2"))
+    # Consecutive failures that open a replica's circuit, and how long it stays open
+    embed_circuit_failure_threshold: int = int(os.getenv("EMBED_CIRCUIT_FAILURE_THRESHOLD", "5"))
+    embed_circuit_reset_s: float = float(os.getenv("EMBED_CIRCUIT_RESET_S", "30"))
+    # Duplicate requests still outstanding after the pool's recent latency quantile
+    embed_hedging_enabled: bool = os.getenv("EMBED_HEDGING_ENABLED", "False").lower() == "true"
+    embed_hedge_quantile: float = float(os.getenv("EMBED_HEDGE_QUANTILE", "0.95"))
+    embed_hedge_min_delay_ms: float = float(os.getenv("EMBED_HEDGE_MIN_DELAY_MS", "50"))
+
     # Redis queue configuration # currently using the same values as redis configuration
     # but creating separate variables for future flexibility
     redis_queue_host: str = os.getenv("REDIS_QUEUE_HOST", "localhost")
@@ -1,5 +1,6 @@
 import json
 from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator
 from typing import Any
 
 from pydantic import BaseModel
@@ -33,6 +34,14 @@ class EmbedConnector(ABC, BaseModel):
         """Generates embeddings asynchronously."""
         pass
 
+    async def embed_stream(
+        self, documents: list[RagDocument]
+    ) -> AsyncIterator[tuple[list[int], list[Any]]]:
+        """Generates embeddings asynchronously, yielding the positions and vectors of each
+        batch as soon as it completes. Connectors that cannot stream yield a single batch."""
+        vectors, _ = await self.embed(documents)
+        yield list(range(len(vectors))), vectors
+
     # @abstractmethod
     # def embed_query(self, query:str) -> list[float]:
     #     """Generate embeddings with a given service"""
@@ -5,6 +5,7 @@ class EmbedConnectorEnum(str, Enum):
     jina_v2_base = "jina-v2-base"
     thinktankembed = "thinktankembed"
     openaiembed = "openaiembed"
+    local_hash = "local-hash"
 
     def as_embed_connector_enum(embed_connector_name: str):
         if not embed_connector_name:
@@ -0,0 +1,71 @@
+import asyncio
+import hashlib
+from typing import Optional
+
+import numpy as np
+
+from src.EmbedConnectors.EmbedConnector import EmbedConnector
+from src.EmbedConnectors.embedding_cache import normalise_text
+from src.EmbedConnectors.token_batching import approximate_tokens
+from src.Shared.RagDocument import RagDocument
+from src.Shared.vector_utils import VECTOR_DTYPE
+
+
+def hash_embedding(text: str, dimensions: int, seed: int = 0) -> np.ndarray:
+    """
+    Produces a deterministic, unit-length pseudo-embedding for a piece of text.
+
+    The text is hashed to seed a random generator, so the same text always maps to the same
+    vector while different texts map to effectively uncorrelated ones.
+
+    Args:
+        text (str): The input text. Whitespace differences are ignored.
+        dimensions (int): The number of dimensions of the vector.
+        seed (int): Mixed into the hash so separate runs can use separate vector spaces.
+
+    Returns:
+        np.ndarray: A float32 vector with an L2 norm of 1.
+    """
+    digest = hashlib.sha256(f"{seed}\x1f{normalise_text(text)}".encode()).digest()
+    rng = np.random.default_rng(int.from_bytes(digest[:16], "little"))
+    vector = rng.standard_normal(dimensions, dtype=np.float32)
+    vector /= np.linalg.norm(vector)
+    return vector.astype(VECTOR_DTYPE, copy=False)
+
+
+class LocalHashEmbedModel(EmbedConnector):
+    """
+    Offline embed connector that derives vectors from a hash of the input text.
+
+    It needs no network access or credentials, which makes it suitable for running
+    pipelines locally, in tests and in ingestion benchmarks. The vectors carry no semantic
+    meaning.
+    """
+
+    dimensions: Optional[int] = 768
+    seed: Optional[int] = 0
+
+    @property
+    def embed_name(self) -> str:
+        return "local-hash"
+
+    @property
+    def required_properties(self) -> list[str]:
+        return []
+
+    @property
+    def optional_properties(self) -> list[str]:
+        return ["dimensions", "seed"]
+
+    def validation(self) -> bool:
+        """Validates the embedding model configuration."""
+        return bool(self.dimensions and self.dimensions > 0)
+
+    async def embed(self, documents: list[RagDocument]) -> tuple[list, dict]:
+        queries = [doc.content for doc in documents]
+        vectors = await asyncio.to_thread(self._embed_texts, queries)
+        tokens = approximate_tokens(queries)
+        return vectors, {"prompt_tokens": tokens, "total_tokens": tokens}
+
+    def _embed_texts(self, input_list: list[str]) -> list[np.ndarray]:
+        return [hash_embedding(text, self.dimensions, self.seed) for text in input_list]
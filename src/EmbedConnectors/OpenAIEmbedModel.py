@@ -1,21 +1,34 @@
 import asyncio
 import inspect
 import time
-from statistics import mean
+from collections.abc import AsyncIterator
 from typing import Optional
 
-import httpx
 from httpx import AsyncClient
 from platform_commons.auth.user import User
 
 from config import Config
 from src.EmbedConnectors.commons import (
-    calculate_and_publish_token_metrics,
-    content_batching,
+    embed_with_cache,
     get_embedding_dims,
-    run_background_task,
+    publish_rate_limit_wait,
+    stream_with_cache,
+    usage_aggregator,
+)
+from src.EmbedConnectors.concurrency import (
+    get_concurrency_controller,
+    run_adaptive_batches,
+    stream_adaptive_batches,
 )
 from src.EmbedConnectors.EmbedConnector import EmbedConnector
+from src.EmbedConnectors.endpoint_pool import get_endpoint_pool
+from src.EmbedConnectors.rate_limiter import get_rate_limiter, parse_retry_after
+from src.EmbedConnectors.token_batching import (
+    approximate_tokens,
+    count_tokens,
+    restore_order,
+    token_aware_batching,
+)
 from src.Shared.Exceptions import (
     EmbeddingSizeMismatchError,
     OpenAIRequestError,
@@ -25,6 +38,8 @@ from src.Shared.Exceptions import (
 
 # Import your async get_embeddings function from its module
 from src.Shared.RagDocument import RagDocument
+from src.Shared.vector_utils import to_float32
+from utils.http.client_pool import httpx_client_pool
 from utils.platform_commons.logger import logger
 from utils.platform_commons.metrics import Metrics
 
@@ -72,23 +87,55 @@ class OpenAIEmbedModel(EmbedConnector):
 
     async def embed(self, documents: list[RagDocument]) -> tuple[list, dict]:
         queries = [doc.content for doc in documents]
+        return await embed_with_cache(
+            input_list=queries,
+            model=self.embed_name,
+            embedding_dimensions=768,
+            embed_fn=self._embed_texts,
+        )
+
+    async def _embed_texts(self, input_list: list[str]) -> tuple[list, dict]:
         user = User(id="dummy", name="Dummy User", tap_app_name="dummy")
 
-        async with httpx.AsyncClient() as client:
-            embeddings_response = await self.generate_ham_embeddings(
-                model=self.embed_name,
-                input_list=queries,
-                user=user,
-                httpx_client=client,
-                # embedding_dimensions=self.settings.get("embedding_dimensions"),
-                embedding_dimensions=768,
-            )
+        embeddings_response = await self.generate_openai_embeddings(
+            model=self.embed_name,
+            input_list=input_list,
+            user=user,
+            httpx_client=httpx_client_pool.get_client(config.openai_embeddings_endpoint),
+            # embedding_dimensions=self.settings.get("embedding_dimensions"),
+            embedding_dimensions=768,
+        )
 
         vectors = [item["embedding"] for item in embeddings_response.get("content_embedding", [])]
         usage = embeddings_response.get("usage", {})
         return vectors, usage
 
+    async def embed_stream(
+        self, documents: list[RagDocument]
+    ) -> AsyncIterator[tuple[list[int], list]]:
+        queries = [doc.content for doc in documents]
+        async for indices, vectors in stream_with_cache(
+            input_list=queries,
+            model=self.embed_name,
+            embedding_dimensions=768,
+            stream_fn=self._stream_texts,
+        ):
+            yield indices, vectors
+
+    async def _stream_texts(self, input_list: list[str]) -> AsyncIterator[tuple[list[int], list]]:
+        user = User(id="dummy", name="Dummy User", tap_app_name="dummy")
+
+        async for indices, batch_output, _ in self.stream_openai_embeddings(
+            model=self.embed_name,
+            input_list=input_list,
+            user=user,
+            httpx_client=httpx_client_pool.get_client(config.openai_embeddings_endpoint),
+            embedding_dimensions=768,
+        ):
+            yield indices, [item["embedding"] for item in batch_output]
+
     async def generate_openai_embeddings(
+        self,
         model,
         input_list: list,
         user: User,
@@ -98,15 +145,17 @@ class OpenAIEmbedModel(EmbedConnector):
     ) -> dict:
         """
         Generates embeddings for a given list of inputs using a specified model by making
-        requests to OpenAI's APIs. The embeddings are generated in batches up to a
-        maximum size of 8. This batch size per request was found to perform best after
-        experimentation of multiple batch sizes and the average chunk counts per document.
+        requests to OpenAI's APIs. In static mode inputs are sorted by length and packed into
+        requests bounded by the model's token budget and the configured maximum item count,
+        and the results are restored to input order. In dynamic mode batch size and the number
+        of requests in flight are tuned by the endpoint's shared AIMD controller.
 
         Args:
             model (str): The name of the model to use for generating embeddings.
             input_list (list): The list of input strings for which embeddings will be generated.
             user (User): The user to track and bill accurately for cost showback purposes.
-            httpx_client (Async Httpx Client): Singleton httpx client from lifespan
+            httpx_client (Async Httpx Client): Pooled httpx client, defaults to the shared
+            client for the configured endpoint.
             batch_mode (str): The mode of batching to use for generating embeddings. Options are
             'static' or 'dynamic'.
             embedding_dimensions (int | None): Custom dimensions for the model, if supported.
@@ -124,165 +173,64 @@ class OpenAIEmbedModel(EmbedConnector):
             during the call to OpenAI.
 
         """
-        input_size = len(input_list)
-
-        if batch_mode == "static":
-            batched_content_list = (
-                list(content_batching(input_list, config.openai_embeddings_batch_size))
-                if input_size > config.openai_embeddings_batch_size
-                else [input_list]
-            )
-
-        headers = {"Authorization": f"Bearer {config.openai_api_key}"}
         parsed_output, prompt_tokens, total_tokens = [], 0, 0
 
-        if batch_mode == "dynamic":
-            dynamic_batch_size = config.openai_embeddings_batch_size
-            recent_latencies = []
-
-        if httpx_client is None:
-            httpx_transport = httpx.AsyncHTTPTransport(retries=config.retry_count)
-            httpx_client = httpx.AsyncClient(http2=True, transport=httpx_transport)
-
-        async def batch_parallelism(batch):
-            nonlocal prompt_tokens, total_tokens
-
-            if not batch:
-                return []
-
-            openai_payload = {
-                "input": batch,
-                "model": model,
-                "encoding_format": "float",
-                **(
-                    {
-                        "dimensions": get_embedding_dims(
-                            model_name=model, embedding_dimensions=embedding_dimensions
-                        )
-                    }
-                    if model != "text-embedding-ada-002"
-                    else {}
-                ),
+        if batch_mode == "static":
+            # Errors are already translated and reported by the stream
+            batch_results = []
+            async for indices, batch_output, usage in self.stream_openai_embeddings(
+                model=model,
+                input_list=input_list,
+                user=user,
+                httpx_client=httpx_client,
+                embedding_dimensions=embedding_dimensions,
+                batch_mode="static",
+            ):
+                batch_results.append((indices, batch_output))
+                prompt_tokens += usage.get("prompt_tokens", 0)
+                total_tokens += usage.get("total_tokens", 0)
+            return {
+                "content_embedding": restore_order(batch_results, len(input_list)),
+                "usage": {"prompt_tokens": prompt_tokens, "total_tokens": total_tokens},
             }
 
-            start_time = time.time()
-
-            embeddings_response = await httpx_client.post(
-                url=config.openai_embeddings_endpoint,
-                json=openai_payload,
-                headers=headers,
-                timeout=config.openai_embeddings_timeout,
-            )
-
-            embeddings_time_ms = (time.time() - start_time) * 1000  # NOQA
-
-            if embeddings_response.status_code != 200:
-                if embeddings_response.status_code == 429:
-                    await metrics.emit_exception_metric(Exception("openai_rate_limit_error"))
-                    raise RateLimitError(router="openai", model=model)
-                else:
-                    await metrics.emit_exception_metric(
-                        Exception("generate_openai_embeddings_response_error")
-                    )
-                    raise OpenAIResponseError(embeddings_response.status_code)
-
-            json_res = embeddings_response.json()
-            if inspect.isawaitable(json_res):
-                embeddings_response_json = await json_res
-            else:
-                embeddings_response_json = json_res
-
-            response_data = embeddings_response_json["data"]
-
-            response_data_size, input_content_size = len(response_data), len(batch)
-            if response_data_size != input_content_size:
-                raise EmbeddingSizeMismatchError(input_content_size, response_data_size)
-
-            result = [
-                {
-                    "combined_sentence": batch[idx],
-                    "embedding": item["embedding"],
-                }
-                for idx, item in enumerate(response_data)
-            ]
-
-            usage = embeddings_response_json.get("usage", {})
-            prompt_tokens += usage.get("prompt_tokens", 0)
-            batch_prompt_tokens = usage.get("prompt_tokens", 0)
-            total_tokens += usage.get("total_tokens", 0)
-
-            batch_latency_ms = (time.time() - start_time) * 1000
+        if httpx_client is None:
+            httpx_client = httpx_client_pool.get_client(config.openai_embeddings_endpoint)
 
+        try:
             if batch_mode == "dynamic":
-                recent_latencies.append(batch_latency_ms)
-                if len(recent_latencies) > config.dynamic_batch_window:
-                    recent_latencies.pop(0)
-
-            run_background_task(
-                calculate_and_publish_token_metrics(
-                    input_list=batch,
-                    user=user,
-                    model=model,
-                    embeddings_time_ms=batch_latency_ms,
-                    prompt_tokens=batch_prompt_tokens,
-                    token_calculation=False,
+                controller = get_concurrency_controller(
+                    config.openai_embeddings_endpoint, config.openai_embeddings_batch_size
                 )
-            )
-
-            logger.info(
-                f"OpenAI call took: {batch_latency_ms}",
-                tap_application=user.tap_app_name,
-                user_id=user.id,
-            )
-
-            return result
-
-        def adjust_batch_size():
-            nonlocal dynamic_batch_size
-            avg_latency = mean(recent_latencies) if recent_latencies else 0
-            if (
-                avg_latency < config.latency_threshold_ms
-                and dynamic_batch_size < config.max_batch_size
-            ):
-                dynamic_batch_size = min(dynamic_batch_size + 1, config.max_batch_size)
-            elif (
-                avg_latency > config.latency_threshold_ms
-                and dynamic_batch_size > config.min_batch_size
-            ):
-                dynamic_batch_size = max(dynamic_batch_size - 1, config.min_batch_size)
 
-        try:
-            if batch_mode == "dynamic":
-                while input_list:
-                    batch = input_list[:dynamic_batch_size]
-                    input_list = input_list[dynamic_batch_size:]
-                    batch_results = await batch_parallelism(batch)
-                    parsed_output.extend(batch_results)
-                    adjust_batch_size()
-
-            if batch_mode == "static":
-                # TODO: Another ingest improvement will be to switch to ascompleted for earlier
-                # batch jobs to move to next step rather than all batches waiting
-                # till the slowest one.
-                if input_size != 1:
-                    batch_results = await asyncio.gather(
-                        *(batch_parallelism(batch) for batch in batched_content_list)
+                async def request_batch(batch: list) -> tuple[list[dict], dict]:
+                    return await self._request_openai_batch(
+                        model=model,
+                        batch=batch,
+                        user=user,
+                        httpx_client=httpx_client,
+                        embedding_dimensions=embedding_dimensions,
                     )
-                    parsed_output = [item for sublist in batch_results for item in sublist]
 
-                else:
-                    parsed_output = await batch_parallelism(input_list)
+                parsed_output, usages = await run_adaptive_batches(
+                    controller,
+                    input_list,
+                    request_batch,
+                    rate_limit_errors=(RateLimitError,),
+                )
+                prompt_tokens = sum(usage.get("prompt_tokens", 0) for usage in usages)
+                total_tokens = sum(usage.get("total_tokens", 0) for usage in usages)
 
             return {
                 "content_embedding": parsed_output,
                 "usage": {"prompt_tokens": prompt_tokens, "total_tokens": total_tokens},
             }
 
+        except RateLimitError as e:
+            raise e from e
         except EmbeddingSizeMismatchError as e:
             await metrics.emit_exception_metric(e)
             raise e from e
-        except RateLimitError as e:
-            raise e from e
         except OpenAIResponseError as e:
             await metrics.emit_exception_metric(e)
             raise e from e
@@ -291,3 +239,196 @@ class OpenAIEmbedModel(EmbedConnector):
                 Exception("generate_openai_embeddings_request_error")
             )
             raise OpenAIRequestError(e)
+
+    async def stream_openai_embeddings(
+        self,
+        model,
+        input_list: list,
+        user: User,
+        httpx_client: AsyncClient | None = None,
+        embedding_dimensions: Optional[int] = None,
+        batch_mode: str = config.batch_mode,
+    ) -> AsyncIterator[tuple[list[int], list[dict], dict]]:
+        """
+        Generates embeddings like ``generate_openai_embeddings``, but yields each batch as
+        soon as its request completes instead of waiting for the slowest one. In either mode
+        the endpoint's shared AIMD controller bounds the requests in flight and is fed their
+        latency and 429s; in dynamic mode it also sizes the batches.
+
+        Args:
+            model (str): The name of the model to use for generating embeddings.
+            input_list (list): The list of input strings for which embeddings will be generated.
+            user (User): The user to track and bill accurately for cost showback purposes.
+            httpx_client (Async Httpx Client): Pooled httpx client, defaults to the shared
+            client for the configured endpoint.
+            embedding_dimensions (int | None): Custom dimensions for the model, if supported.
+            batch_mode (str): 'static' for token-packed batches or 'dynamic' for batches
+            sized by the controller.
+
+        Yields:
+            tuple[list[int], list[dict], dict]: The positions of the batch's inputs in
+                input_list, the content embeddings of the batch and the batch's usage.
+
+        Raises:
+            EmbeddingSizeMismatchError (Exception): If there's a mismatch between the number of
+            requested embeddings and the number received in response.
+            OpenAIResponseError (Exception): If there is a non-200 status code response from
+            OpenAI's API.
+            OpenAIRequestError (Exception): If there is a network / request related exception
+            during the call to OpenAI.
+        """
+        if not input_list:
+            return
+
+        if httpx_client is None:
+            httpx_client = httpx_client_pool.get_client(config.openai_embeddings_endpoint)
+
+        controller = get_concurrency_controller(
+            config.openai_embeddings_endpoint, config.openai_embeddings_batch_size
+        )
+        token_counts = await asyncio.to_thread(count_tokens, input_list, model)
+        batched_content_list = None
+        if batch_mode == "static":
+            batched_content_list = token_aware_batching(
+                input_list,
+                model=model,
+                max_items=config.openai_embeddings_batch_size,
+                token_counts=token_counts,
+            )
+
+        async def request_batch(indices: list[int], batch: list) -> tuple[list[dict], dict]:
+            return await self._request_openai_batch(
+                model=model,
+                batch=batch,
+                user=user,
+                httpx_client=httpx_client,
+                embedding_dimensions=embedding_dimensions,
+                token_count=sum(token_counts[idx] for idx in indices),
+            )
+
+        try:
+            async for indices, batch_output, usage in stream_adaptive_batches(
+                controller,
+                input_list,
+                request_batch,
+                rate_limit_errors=(RateLimitError,),
+                batches=batched_content_list,
+            ):
+                yield indices, batch_output, usage
+        except (RateLimitError, EmbeddingSizeMismatchError, OpenAIResponseError) as e:
+            if not isinstance(e, RateLimitError):
+                await metrics.emit_exception_metric(e)
+            raise e from e
+        except Exception as e:
+            await metrics.emit_exception_metric(
+                Exception("generate_openai_embeddings_request_error")
+            )
+            raise OpenAIRequestError(e)
+
+    async def _request_openai_batch(
+        self,
+        model,
+        batch: list,
+        user: User,
+        httpx_client: AsyncClient,
+        embedding_dimensions: Optional[int] = None,
+        token_count: Optional[int] = None,
+    ) -> tuple[list[dict], dict]:
+        """
+        Sends a single embeddings request through the model's rate limiter and returns its
+        content embeddings and usage. token_count defaults to an estimate from the batch.
+        """
+        if not batch:
+            return [], {}
+
+        headers = {"Authorization": f"Bearer {config.openai_api_key}"}
+        openai_payload = {
+            "input": batch,
+            "model": model,
+            "encoding_format": config.openai_embeddings_encoding_format,
+            **(
+                {
+                    "dimensions": get_embedding_dims(
+                        model_name=model, embedding_dimensions=embedding_dimensions
+                    )
+                }
+                if model != "text-embedding-ada-002"
+                else {}
+            ),
+        }
+
+        start_time = time.time()
+
+        endpoint_pool = get_endpoint_pool("openai", config.openai_embeddings_endpoints)
+
+        async def post(url: str):
+            return await endpoint_pool.client_for(url, httpx_client).post(
+                url=url,
+                json=openai_payload,
+                headers=headers,
+                timeout=config.openai_embeddings_timeout,
+            )
+
+        async def send_request():
+            response = await endpoint_pool.call(post)
+            if response.status_code == 429:
+                await metrics.emit_exception_metric(Exception("openai_rate_limit_error"))
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                raise RateLimitError(router="openai", model=model, retry_after=retry_after)
+            return response
+
+        embeddings_response = await get_rate_limiter(model).call(
+            send_request,
+            tokens=token_count if token_count is not None else approximate_tokens(batch),
+            rate_limit_errors=(RateLimitError,),
+            on_wait=lambda waited, rate_limited: publish_rate_limit_wait(
+                model, waited, rate_limited
+            ),
+        )
+
+        if embeddings_response.status_code != 200:
+            await metrics.emit_exception_metric(
+                Exception("generate_openai_embeddings_response_error")
+            )
+            raise OpenAIResponseError(embeddings_response.status_code)
+
+        json_res = embeddings_response.json()
+        if inspect.isawaitable(json_res):
+            embeddings_response_json = await json_res
+        else:
+            embeddings_response_json = json_res
+
+        response_data = embeddings_response_json["data"]
+
+        response_data_size, input_content_size = len(response_data), len(batch)
+        if response_data_size != input_content_size:
+            raise EmbeddingSizeMismatchError(input_content_size, response_data_size)
+
+        # Base64 embeddings decode straight into float32 buffers
+        result = [
+            {
+                "combined_sentence": batch[idx],
+                "embedding": to_float32(item["embedding"]),
+            }
+            for idx, item in enumerate(response_data)
+        ]
+
+        usage = embeddings_response_json.get("usage", {})
+        batch_latency_ms = (time.time() - start_time) * 1000
+
+        usage_aggregator.record(
+            input_list=batch,
+            user=user,
+            model=model,
+            embeddings_time_ms=batch_latency_ms,
+            prompt_tokens=usage.get("prompt_tokens", 0),
+            token_calculation=False,
+        )
+
+        logger.info(
+            f"OpenAI call took: {batch_latency_ms}",
+            tap_application=user.tap_app_name,
+            user_id=user.id,
+        )
+
+        return result, usage
@@ -1,3 +1,4 @@
+import asyncio
 import time
 from typing import Optional
 
@@ -7,12 +8,20 @@ from platform_commons.errors.unauthorized_error import UnauthorizedError
 
 from config import Config
 from src.EmbedConnectors.commons import (
-    calculate_and_publish_token_metrics,
-    content_batching,
+    embed_with_cache,
     get_embedding_dims,
-    run_background_task,
+    publish_rate_limit_wait,
+    usage_aggregator,
 )
 from src.EmbedConnectors.EmbedConnector import EmbedConnector
+from src.EmbedConnectors.endpoint_pool import get_endpoint_pool
+from src.EmbedConnectors.rate_limiter import get_rate_limiter, parse_retry_after
+from src.EmbedConnectors.token_batching import (
+    approximate_tokens,
+    count_tokens,
+    restore_order,
+    token_aware_batching,
+)
 from src.Shared.Exceptions import (
     EmbeddingSizeMismatchError,
     RateLimitError,
@@ -20,6 +29,8 @@ from src.Shared.Exceptions import (
     ThinktankResponseError,
 )
 from src.Shared.RagDocument import RagDocument
+from src.Shared.vector_utils import rows_to_float32
+from utils.http.client_pool import httpx_client_pool
 from utils.platform_commons.logger import logger
 from utils.platform_commons.metrics import Metrics
 
@@ -32,6 +43,12 @@ metrics = Metrics(
 )
 
 
+def get_thinktank_concurrency(model: str) -> int:
+    """Returns the maximum number of in-flight ThinkTank embedding requests for a model."""
+    limits = config.thinktank_embeddings_concurrency
+    return max(1, int(limits.get(model, limits.get("default", 1))))
+
+
 class ThinkTankEmbedModel(EmbedConnector):
     api_key: str
 
@@ -66,16 +83,23 @@ class ThinkTankEmbedModel(EmbedConnector):
 
     async def embed(self, documents: list[RagDocument]) -> tuple[list, dict]:
         queries = [doc.content for doc in documents]
+        return await embed_with_cache(
+            input_list=queries,
+            model=self.embed_name,
+            embedding_dimensions=768,
+            embed_fn=self._embed_texts,
+        )
+
+    async def _embed_texts(self, input_list: list[str]) -> tuple[list, dict]:
         user = User(id="dummy", name="Dummy User", tap_app_name="dummy")
 
-        async with httpx.AsyncClient() as client:
-            embeddings_response = await self.generate_thinktank_embeddings(
-                model=self.embed_name,
-                input_list=queries,
-                user=user,
-                httpx_client=client,
-                embedding_dimensions=768,
-            )
+        embeddings_response = await self.generate_thinktank_embeddings(
+            model=self.embed_name,
+            input_list=input_list,
+            user=user,
+            httpx_client=httpx_client_pool.get_client(config.thinktank),
+            embedding_dimensions=768,
+        )
 
         vectors = [item["embedding"] for item in embeddings_response.get("content_embedding", [])]
         usage = embeddings_response.get("usage", {})
@@ -91,14 +115,17 @@ class ThinkTankEmbedModel(EmbedConnector):
     ) -> dict:
         """
         Generates embeddings for a given list of inputs using a specified model by making
-        requests to the thinktank service. The embeddings are generated in batches up to a
-        maximum size of 16 due to SCA constraints.
+        requests to the thinktank service. Inputs are sorted by length and packed into batches
+        bounded by the model's token budget and a maximum size of 16 due to SCA constraints.
+        Batches are sent concurrently, up to the model's configured concurrency, and results are
+        restored to input order.
 
         Args:
             model (str): The name of the model to use for generating embeddings.
             input_list (list): The list of input strings for which embeddings will be generated.
             user (User): The user for authentication with Target services.
-            httpx_client (Async Httpx Client): Singleton httpx client from lifespan
+            httpx_client (Async Httpx Client): Pooled httpx client, defaults to the shared
+            client for the thinktank endpoint.
         Returns:
             dict: A dictionary containing the list of content embeddings and usage information
                 including 'prompt_tokens' and 'total_tokens'.
@@ -114,96 +141,49 @@ class ThinkTankEmbedModel(EmbedConnector):
         """
 
         # SCA max batch size 16
-        if len(input_list) > 16:
-            batched_content_list = list(content_batching(input_list, 16))
-        else:
-            batched_content_list = [input_list]
+        token_counts = await asyncio.to_thread(count_tokens, input_list, model)
+        batched_content_list = list(
+            token_aware_batching(input_list, model=model, max_items=16, token_counts=token_counts)
+        )
 
         thinktank_url = config.thinktank
-        embeddings_url = thinktank_url + "/v1/embeddings"
         auth_header = {"Authorization": user.token}
 
-        parsed_output = []
         if httpx_client is None:
-            httpx_client = httpx.AsyncClient()
-        try:
-            prompt_tokens, total_tokens, batch_size = 0, 0, len(batched_content_list)
-            for batch in batched_content_list:
-                if not batch:
-                    continue
-
-                # for each sub batch create a thinktank call
-                if model != "text-embedding-ada-002":
-                    thinktank_embeddings_body = {
-                        "input": batch,
-                        "model": model,
-                        "dimensions": get_embedding_dims(
-                            model_name=model, embedding_dimensions=embedding_dimensions
-                        ),
-                    }
-                else:
-                    thinktank_embeddings_body = {"input": batch, "model": model}
-
-                start_time = time.time()
-                # TODO Search uses lifespan httpx, Ingest needs to use same after it refactors
-                embeddings_response = await httpx_client.post(
-                    url=embeddings_url,
-                    json=thinktank_embeddings_body,
+            httpx_client = httpx_client_pool.get_client(thinktank_url)
+
+        semaphore = asyncio.Semaphore(get_thinktank_concurrency(model))
+
+        async def run_batch(indices: list[int], batch: list):
+            async with semaphore:
+                batch_output, usage = await self._request_thinktank_batch(
+                    model=model,
+                    batch=batch,
+                    user=user,
+                    httpx_client=httpx_client,
                     headers=auth_header,
-                    timeout=35,
+                    embedding_dimensions=embedding_dimensions,
+                    token_count=sum(token_counts[idx] for idx in indices),
                 )
+            return indices, batch_output, usage
 
-                if embeddings_response.status_code == 401:
-                    await metrics.emit_exception_metric(
-                        Exception("generate_thinktank_embeddings_auth_error")
-                    )
-                    raise UnauthorizedError("ThinkTank API returned a 401 unauthorized error.")
-                if embeddings_response.status_code == 429:
-                    await metrics.emit_exception_metric(
-                        Exception("generate_thinktank_embeddings_rate_limit_error")
-                    )
-                    raise RateLimitError(router="thinktank", model=model)
-                elif embeddings_response.status_code != 200:
-                    await metrics.emit_exception_metric(
-                        Exception("generate_thinktank_embeddings_response_error")
-                    )
-                    raise ThinktankResponseError(embeddings_response.status_code)
-
-                embeddings_response_json = embeddings_response.json()
-                response_data = embeddings_response_json["data"]
-                response_data_size, input_content_size = len(response_data), len(batch)
-                if response_data_size != input_content_size:
-                    raise EmbeddingSizeMismatchError(input_content_size, response_data_size)
-                for idx, item in enumerate(response_data):
-                    content_embedding = {
-                        "combined_sentence": batch[idx],
-                        "embedding": item["embedding"],
-                    }
-                    parsed_output.append(content_embedding)
-                if batch_size > 1:
-                    prompt_tokens += embeddings_response_json["usage"]["prompt_tokens"]
-                    total_tokens += embeddings_response_json["usage"]["total_tokens"]
-                else:
-                    prompt_tokens = embeddings_response_json["usage"]["prompt_tokens"]
-                    total_tokens = embeddings_response_json["usage"]["total_tokens"]
-
-                end_time = time.time()
-
-                embeddings_time_ms = (end_time - start_time) * 1000
-
-                run_background_task(
-                    calculate_and_publish_token_metrics(
-                        input_list=batch,
-                        user=user,
-                        model=model,
-                        embeddings_time_ms=embeddings_time_ms,
-                        prompt_tokens=prompt_tokens,
-                        token_calculation=False,
-                    )
-                )
+        tasks: list[asyncio.Task] = []
+        try:
+            tasks = [
+                asyncio.create_task(run_batch(indices, batch))
+                for indices, batch in batched_content_list
+                if batch
+            ]
+            batch_results = await asyncio.gather(*tasks)
+
+            parsed_output, prompt_tokens, total_tokens = [], 0, 0
+            for indices, batch_output, usage in batch_results:
+                parsed_output.append((indices, batch_output))
+                prompt_tokens += usage.get("prompt_tokens", 0)
+                total_tokens += usage.get("total_tokens", 0)
 
             generated_embeddings = {
-                "content_embedding": parsed_output,
+                "content_embedding": restore_order(parsed_output, len(input_list)),
                 "usage": {"prompt_tokens": prompt_tokens, "total_tokens": total_tokens},
             }
 
@@ -225,6 +205,106 @@ class ThinkTankEmbedModel(EmbedConnector):
                 Exception("generate_thinktank_embeddings_request_error")
             )
             raise ThinktankRequestError(e)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _request_thinktank_batch(
+        self,
+        model: str,
+        batch: list,
+        user: User,
+        httpx_client: httpx.AsyncClient,
+        headers: dict,
+        embedding_dimensions: Optional[int] = None,
+        token_count: Optional[int] = None,
+    ) -> tuple[list[dict], dict]:
+        """
+        Sends a single embeddings request through the model's rate limiter and returns its
+        content embeddings and usage. token_count defaults to an estimate from the batch.
+        """
+        if model != "text-embedding-ada-002":
+            thinktank_embeddings_body = {
+                "input": batch,
+                "model": model,
+                "dimensions": get_embedding_dims(
+                    model_name=model, embedding_dimensions=embedding_dimensions
+                ),
+            }
+        else:
+            thinktank_embeddings_body = {"input": batch, "model": model}
+
+        start_time = time.time()
+
+        endpoint_pool = get_endpoint_pool(
+            "thinktank", [url + "/v1/embeddings" for url in config.thinktank_urls]
+        )
+
+        async def post(url: str):
+            return await endpoint_pool.client_for(url, httpx_client).post(
+                url=url,
+                json=thinktank_embeddings_body,
+                headers=headers,
+                timeout=35,
+            )
+
+        async def send_request():
+            response = await endpoint_pool.call(post)
+            if response.status_code == 429:
+                await metrics.emit_exception_metric(
+                    Exception("generate_thinktank_embeddings_rate_limit_error")
+                )
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                raise RateLimitError(router="thinktank", model=model, retry_after=retry_after)
+            return response
+
+        embeddings_response = await get_rate_limiter(model).call(
+            send_request,
+            tokens=token_count if token_count is not None else approximate_tokens(batch),
+            rate_limit_errors=(RateLimitError,),
+            on_wait=lambda waited, rate_limited: publish_rate_limit_wait(
+                model, waited, rate_limited
+            ),
+        )
+
+        if embeddings_response.status_code == 401:
+            await metrics.emit_exception_metric(
+                Exception("generate_thinktank_embeddings_auth_error")
+            )
+            raise UnauthorizedError("ThinkTank API returned a 401 unauthorized error.")
+        elif embeddings_response.status_code != 200:
+            await metrics.emit_exception_metric(
+                Exception("generate_thinktank_embeddings_response_error")
+            )
+            raise ThinktankResponseError(embeddings_response.status_code)
+
+        embeddings_response_json = embeddings_response.json()
+        response_data = embeddings_response_json["data"]
+        response_data_size, input_content_size = len(response_data), len(batch)
+        if response_data_size != input_content_size:
+            raise EmbeddingSizeMismatchError(input_content_size, response_data_size)
+        embeddings = rows_to_float32([item["embedding"] for item in response_data])
+        batch_output = [
+            {
+                "combined_sentence": batch[idx],
+                "embedding": embedding,
+            }
+            for idx, embedding in enumerate(embeddings)
+        ]
+        usage = embeddings_response_json.get("usage", {})
+
+        embeddings_time_ms = (time.time() - start_time) * 1000
+
+        usage_aggregator.record(
+            input_list=batch,
+            user=user,
+            model=model,
+            embeddings_time_ms=embeddings_time_ms,
+            prompt_tokens=usage.get("prompt_tokens", 0),
+            token_calculation=False,
+        )
+
+        return batch_output, usage
 
     async def validate_thinktank_access(self, model: str | None, user: User):
         """
@@ -239,18 +319,18 @@ class ThinkTankEmbedModel(EmbedConnector):
             auth_url = thinktank_url + f"/v1/models/{model or config.default_embedding_model}"
         auth_header = {"Authorization": user.token}
         try:
-            async with httpx.AsyncClient() as client:
-                auth_response = await client.get(url=auth_url, headers=auth_header)
-                if auth_response.status_code == 401:
-                    await metrics.emit_exception_metric(
-                        Exception("validate_thinktank_access_auth_error")
-                    )
-                    raise UnauthorizedError("ThinkTank API returned a 401 unauthorized error.")
-                elif auth_response.status_code != 200:
-                    await metrics.emit_exception_metric(
-                        Exception("validate_thinktank_access_auth_error")
-                    )
-                    raise ThinktankResponseError(auth_response.status_code)
+            client = httpx_client_pool.get_client(auth_url)
+            auth_response = await client.get(url=auth_url, headers=auth_header)
+            if auth_response.status_code == 401:
+                await metrics.emit_exception_metric(
+                    Exception("validate_thinktank_access_auth_error")
+                )
+                raise UnauthorizedError("ThinkTank API returned a 401 unauthorized error.")
+            elif auth_response.status_code != 200:
+                await metrics.emit_exception_metric(
+                    Exception("validate_thinktank_access_auth_error")
+                )
+                raise ThinktankResponseError(auth_response.status_code)
 
         except UnauthorizedError:
             raise
@@ -0,0 +1,146 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from config import Config
+from src.EmbedConnectors.embedding_cache import normalise_text
+from src.EmbedConnectors.token_batching import approximate_tokens
+
+settings = Config()
+
+
+@dataclass
+class DedupPlan:
+    """Which chunks of a batch need embedding and where each resulting vector is fanned out."""
+
+    # Content key of each distinct text that still needs embedding
+    keys: list[bytes] = field(default_factory=list)
+    # Position of the chunk sent to the embed model for each distinct text
+    unique_indices: list[int] = field(default_factory=list)
+    # Positions of every chunk sharing each distinct text, including the one embedded
+    fan_out: list[list[int]] = field(default_factory=list)
+    # Chunk positions resolved from vectors embedded for earlier files, with their vector
+    resolved: list[tuple[list[int], Any]] = field(default_factory=list)
+    chunks_deduplicated: int = 0
+    tokens_saved: int = 0
+
+
+class ChunkDeduplicator:
+    """
+    Collapses identical chunk texts so each is embedded only once.
+
+    Texts are compared after unicode and whitespace normalisation. Within a batch, every
+    distinct text is embedded once and its vector shared by all chunks carrying it. Across
+    batches, the vectors of the last ``window_size`` distinct texts are kept so repeated
+    boilerplate (headers, footers, disclaimers) in later files is not embedded again. A
+    disabled deduplicator plans every chunk to be embedded on its own.
+
+    The window is only useful if it outlives a single file, so pipelines share one
+    deduplicator per embed model and dimensions through ``get_deduplicator``.
+    """
+
+    def __init__(self, window_size: int, enabled: bool = True):
+        self.window_size = window_size
+        self.enabled = enabled
+        self._window: OrderedDict[bytes, Any] = OrderedDict()
+        self._lock = threading.Lock()
+        self.chunks_deduplicated = 0
+        self.tokens_saved = 0
+
+    @staticmethod
+    def key(text: str) -> bytes:
+        """Returns a compact content key for a chunk's normalised text."""
+        return hashlib.blake2b(normalise_text(text).encode("utf-8"), digest_size=16).digest()
+
+    def plan(self, texts: list[str]) -> DedupPlan:
+        """
+        Groups a batch of chunk texts by content.
+
+        Args:
+            texts (list[str]): The chunk texts, in chunk order.
+
+        Returns:
+            DedupPlan: The chunks to embed, how to fan their vectors out, and the chunks
+            already resolved from the cross-batch window.
+        """
+        if not self.enabled:
+            positions = list(range(len(texts)))
+            return DedupPlan(
+                keys=[b""] * len(texts),
+                unique_indices=positions,
+                fan_out=[[position] for position in positions],
+            )
+
+        plan = DedupPlan()
+        groups: dict[bytes, int] = {}
+        resolved: dict[bytes, tuple[list[int], Any]] = {}
+        duplicate_texts = []
+        keys = [self.key(text) for text in texts]
+        with self._lock:
+            for position, (text, key) in enumerate(zip(texts, keys)):
+                if key in resolved:
+                    resolved[key][0].append(position)
+                    duplicate_texts.append(text)
+                elif key in self._window:
+                    self._window.move_to_end(key)
+                    resolved[key] = ([position], self._window[key])
+                    duplicate_texts.append(text)
+                elif key in groups:
+                    plan.fan_out[groups[key]].append(position)
+                    duplicate_texts.append(text)
+                else:
+                    groups[key] = len(plan.keys)
+                    plan.keys.append(key)
+                    plan.unique_indices.append(position)
+                    plan.fan_out.append([position])
+
+        plan.resolved = list(resolved.values())
+        plan.chunks_deduplicated = len(duplicate_texts)
+        plan.tokens_saved = approximate_tokens(duplicate_texts) if duplicate_texts else 0
+        with self._lock:
+            self.chunks_deduplicated += plan.chunks_deduplicated
+            self.tokens_saved += plan.tokens_saved
+        return plan
+
+    def remember(self, key: bytes, vector: Any):
+        """Adds an embedded text's vector to the cross-batch window, evicting the oldest."""
+        if not self.enabled or self.window_size <= 0:
+            return
+        with self._lock:
+            self._window[key] = vector
+            self._window.move_to_end(key)
+            while len(self._window) > self.window_size:
+                self._window.popitem(last=False)
+
+
+_deduplicators: dict[tuple[str, Optional[int]], ChunkDeduplicator] = {}
+_deduplicators_lock = threading.Lock()
+
+
+def get_deduplicator(model: str, dimensions: Optional[int] = None) -> ChunkDeduplicator:
+    """
+    Returns the process-wide deduplicator for an embed model, creating it on first use.
+
+    Celery and Hatchet build a new pipeline for every task, so a per-pipeline window would
+    start empty for every file; this one is shared by every pipeline in the process that
+    embeds with the same model.
+
+    Args:
+        model (str): The embedding model name.
+        dimensions (int | None): The requested embedding dimensions, since vectors of
+            different sizes from the same model cannot be shared.
+
+    Returns:
+        ChunkDeduplicator: The deduplicator for the model and dimensions.
+    """
+    key = (model, dimensions)
+    with _deduplicators_lock:
+        deduplicator = _deduplicators.get(key)
+        if deduplicator is None:
+            deduplicator = _deduplicators[key] = ChunkDeduplicator(
+                window_size=settings.chunk_dedup_window_items,
+                enabled=settings.chunk_dedup_enabled,
+            )
+        return deduplicator
@@ -1,15 +1,18 @@
 import asyncio
 import json
 import uuid
+from collections.abc import AsyncIterator, Awaitable, Callable
 from typing import Any, Optional, TypedDict
 
-import tiktoken
 from confluent_kafka import KafkaException
 from httpx import AsyncClient, HTTPError, HTTPStatusError
 from platform_commons.auth.user import User
 
 from config import Config
+from src.EmbedConnectors.embedding_cache import EmbeddingCache, embedding_cache
+from src.EmbedConnectors.usage_aggregator import UsageAggregator, UsageRecord
 from src.Shared.Exceptions import (
+    EmbeddingSizeMismatchError,
     InvalidModelDimensions,
     InvalidModelError,
     UnsupportedDimensionError,
@@ -120,32 +123,6 @@ def get_embedding_dims(
     return default_dimensions
 
 
-def content_batching(content_list: list, batch_size: int):
-    """
-    Generator that yields batches of content from a list based on a specified batch size.
-
-    Args:
-        content_list (list): The list of input content text to be batched.
-        batch_size (int): The size of each batch.
-
-    Yields:
-        list: A batch of content items.
-
-    Raises:
-        ZeroDivisionError (Exception): If batch_size is zero. placeholder for user configurable
-        batchsize - pending discussion with SCA
-        ValueError (Exception): If batch_size is negative
-    """
-    if batch_size == 0:
-        raise ZeroDivisionError("batch_size cannot be zero")
-    if batch_size < 0:
-        raise ValueError("batch_size cannot be negative")
-    if not isinstance(content_list, list):
-        raise TypeError("content_list must be a list")
-    for i in range(0, len(content_list), batch_size):
-        yield content_list[i : i + batch_size]
-
-
 async def validate_user_for_tap_quota(tap_application: str, user_token: str):
     """
     Fetches usage for TAP application from Assimilator to verify registration of Quota
@@ -244,7 +221,156 @@ def run_background_task(coro):
     asyncio.create_task(coro)
 
 
-async def publish_usage_history(user: User, model: str, tokens_used: int):
+def publish_rate_limit_wait(model: str, waited_s: float, rate_limited: int):
+    """
+    Publishes how long an embeddings request waited on its rate limiter.
+
+    Args:
+        model (str): The embedding model name, used for metric tagging.
+        waited_s (float): Seconds spent waiting for capacity and backing off from 429s.
+        rate_limited (int): The number of 429s absorbed before the request succeeded.
+    """
+    if settings.metrics_enabled:
+        run_background_task(
+            metrics.write(
+                name="embeddings_rate_limiter",
+                tags={"model": model},
+                fields={"wait_ms": waited_s * 1000, "rate_limited": rate_limited},
+            )
+        )
+
+
+def publish_dedup_savings(model: str, chunks_deduplicated: int, tokens_saved: int):
+    """
+    Publishes how much embedding work duplicate chunk elimination avoided.
+
+    Args:
+        model (str): The embedding model name, used for metric tagging.
+        chunks_deduplicated (int): Chunks that reused another chunk's vector.
+        tokens_saved (int): The approximate tokens those chunks would have cost.
+    """
+    if settings.metrics_enabled and chunks_deduplicated:
+        run_background_task(
+            metrics.write(
+                name="embeddings_dedup",
+                tags={"model": model},
+                fields={"chunks": chunks_deduplicated, "tokens_saved": tokens_saved},
+            )
+        )
+
+
+async def embed_with_cache(
+    input_list: list[str],
+    model: str,
+    embedding_dimensions: Optional[int],
+    embed_fn: Callable[[list[str]], Awaitable[tuple[list, dict]]],
+    cache: EmbeddingCache = embedding_cache,
+) -> tuple[list, dict]:
+    """
+    Serves embeddings from the content-addressed cache and only sends misses to the provider.
+
+    Args:
+        input_list (list[str]): The input strings to embed.
+        model (str): The embedding model name, part of the cache key.
+        embedding_dimensions (int | None): The requested dimensions, part of the cache key.
+        embed_fn (Callable): Coroutine function embedding a list of strings and returning
+            the vectors in input order along with the provider usage.
+        cache (EmbeddingCache): The cache to use, defaults to the process-wide cache.
+
+    Returns:
+        tuple[list, dict]: The vectors in input order and the usage reported for the misses.
+
+    Raises:
+        EmbeddingSizeMismatchError (Exception): If embed_fn returns a different number of
+        vectors than it was given inputs.
+    """
+    if not settings.embedding_cache_enabled or not input_list:
+        return await embed_fn(input_list)
+
+    keys = [EmbeddingCache.cache_key(text, model, embedding_dimensions) for text in input_list]
+    vectors = await cache.aget_many(keys)
+    miss_indices = [idx for idx, vector in enumerate(vectors) if vector is None]
+
+    usage: dict = {}
+    if miss_indices:
+        miss_vectors, usage = await embed_fn([input_list[idx] for idx in miss_indices])
+        if len(miss_vectors) != len(miss_indices):
+            raise EmbeddingSizeMismatchError(len(miss_indices), len(miss_vectors))
+        for idx, vector in zip(miss_indices, miss_vectors):
+            vectors[idx] = vector
+        await cache.aset_many(
+            {keys[idx]: vector for idx, vector in zip(miss_indices, miss_vectors)}
+        )
+
+    if settings.metrics_enabled:
+        run_background_task(
+            metrics.write(
+                name="embeddings_cache",
+                tags={"model": model},
+                fields={
+                    "hits": len(input_list) - len(miss_indices),
+                    "misses": len(miss_indices),
+                },
+            )
+        )
+
+    return vectors, usage
+
+
+async def stream_with_cache(
+    input_list: list[str],
+    model: str,
+    embedding_dimensions: Optional[int],
+    stream_fn: Callable[[list[str]], AsyncIterator[tuple[list[int], list]]],
+    cache: EmbeddingCache = embedding_cache,
+) -> AsyncIterator[tuple[list[int], list]]:
+    """
+    Streaming counterpart of ``embed_with_cache``. Cache hits are yielded first as a single
+    batch, then misses are streamed from the provider as each request completes.
+
+    Args:
+        input_list (list[str]): The input strings to embed.
+        model (str): The embedding model name, part of the cache key.
+        embedding_dimensions (int | None): The requested dimensions, part of the cache key.
+        stream_fn (Callable): Async generator function yielding the positions (relative to
+            its input) and vectors of each completed batch.
+        cache (EmbeddingCache): The cache to use, defaults to the process-wide cache.
+
+    Yields:
+        tuple[list[int], list]: The positions in input_list and the vectors of a batch.
+    """
+    if not settings.embedding_cache_enabled or not input_list:
+        async for indices, vectors in stream_fn(input_list):
+            yield indices, vectors
+        return
+
+    keys = [EmbeddingCache.cache_key(text, model, embedding_dimensions) for text in input_list]
+    cached = await cache.aget_many(keys)
+    hit_indices = [idx for idx, vector in enumerate(cached) if vector is not None]
+    miss_indices = [idx for idx, vector in enumerate(cached) if vector is None]
+
+    if settings.metrics_enabled:
+        run_background_task(
+            metrics.write(
+                name="embeddings_cache",
+                tags={"model": model},
+                fields={"hits": len(hit_indices), "misses": len(miss_indices)},
+            )
+        )
+
+    if hit_indices:
+        yield hit_indices, [cached[idx] for idx in hit_indices]
+
+    if miss_indices:
+        async for local_indices, vectors in stream_fn([input_list[idx] for idx in miss_indices]):
+            if len(local_indices) != len(vectors):
+                raise EmbeddingSizeMismatchError(len(local_indices), len(vectors))
+            indices = [miss_indices[idx] for idx in local_indices]
+            await cache.aset_many({keys[idx]: vector for idx, vector in zip(indices, vectors)})
+            yield indices, vectors
+
+
+async def publish_usage_history(user: User, model: str, tokens_used: int, requests: int = 1):
     """
     Publishes usage history to Assimilator kafka topic for the given user, model, and tokens.
 
@@ -252,6 +378,7 @@ async def publish_usage_history(user: User, model: str, tokens_used: int):
         user (User): The user for whom to publish usage history.
         model (str): The model for which to publish usage history.
         tokens_used (int): The tokens used in the request.
+        requests (int): The number of requests the tokens were aggregated over.
 
     Raises:
         BufferError: If the producer's local buffer is full.
@@ -268,7 +395,7 @@ async def publish_usage_history(user: User, model: str, tokens_used: int):
             "input_tokens": 0,
             "completion_tokens": tokens_used,
             "application": user.tap_app_name,
-            "requests": 1,
+            "requests": requests,
             "cost": total_cost,
             "transaction_id": str(
                 uuid.uuid4()
@@ -313,55 +440,48 @@ async def publish_usage_history(user: User, model: str, tokens_used: int):
     return True
 
 
-async def calculate_and_publish_token_metrics(
-    input_list: list,
-    user: User,
-    model: str,
-    embeddings_time_ms: float,
-    prompt_tokens: int,
-    token_calculation: bool,
-):
+async def publish_usage_record(record: UsageRecord):
     """
-    Calculates token counts for each item in the input list and publishes metrics.
-    This method is executed asynchronously and does not block the response of the API.
+    Publishes the usage aggregated for one (user, model) as one usage history message and one
+    metrics write.
 
     Args:
-        input_list (list): The list of input strings for which token usage will be calculated.
-        user (User): The user associated with the request, for metric tagging.
-        model (str): The model namser.tap_app_nae, used for metrics.
-        embeddings_time_ms (float): The time taken to generate embeddings, used for metrics.
-        prompt_tokens (int): The number of tokens used for the prompt.
-        token_calculation (bool): Whether to calculate the tokens used or not.
+        record (UsageRecord): The aggregated usage.
     """
-    logger.info(
-        f"Calculating and publishing token metrics for model: {model}",
-        user_id=user.id,
-        tap_application=user.tap_app_name,
-    )
-
-    def calculate_tokens(text: str) -> int:
-        tokenizer = tiktoken.get_encoding("cl100k_base")
-        tokens = tokenizer.encode(text)
-        return len(tokens)
+    user = record.user
+    try:
+        await publish_usage_history(
+            user=user, model=record.model, tokens_used=record.tokens, requests=record.requests
+        )
 
-    if token_calculation:
-        token_counts = [calculate_tokens(text) for text in input_list]
-        total_tokens = sum(token_counts)
-    else:
-        total_tokens = prompt_tokens
+        if settings.metrics_enabled:
+            await metrics.write(
+                name="embeddings_token_usage",
+                tags={
+                    "model": record.model,
+                    "user_id": user.id,
+                },
+                fields={
+                    "total_token_count": record.tokens,
+                    "input_item_count": record.items,
+                    "request_count": record.requests,
+                    "response_time_ms": record.latency_ms_mean,
+                    "max_response_time_ms": record.latency_ms_max,
+                },
+            )
+    except Exception as e:
+        logger.error(
+            f"Failed to publish aggregated usage for model {record.model}: {e}",
+            user_id=user.id,
+            tap_application=user.tap_app_name,
+        )
+        await metrics.emit_exception_metric(e)
 
-    await publish_usage_history(user=user, model=model, tokens_used=total_tokens)
 
-    if settings.metrics_enabled:
-        await metrics.write(
-            name="embeddings_token_usage",
-            tags={
-                "model": model,
-                "user_id": user.id,
-            },
-            fields={
-                "total_token_count": total_tokens,
-                "input_item_count": len(input_list),
-                "response_time_ms": embeddings_time_ms,
-            },
-        )
+# Singleton usage aggregator; embed connectors record usage per request and it is published in
+# batches per (user, model)
+usage_aggregator = UsageAggregator(
+    publish_fn=publish_usage_record,
+    flush_interval_s=settings.usage_flush_interval_s,
+    max_records=settings.usage_flush_max_records,
+)
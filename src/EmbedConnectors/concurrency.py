@@ -0,0 +1,378 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterable
+from contextvars import ContextVar
+from dataclasses import dataclass
+from statistics import mean
+from typing import Any, Optional
+
+from config import Config
+
+settings = Config()
+
+
+@dataclass
+class Slot:
+    """An in-flight request permit handed out by ``AIMDController.acquire``."""
+
+    batch_size: int
+    started_at: float
+    # Seconds the request spent waiting on a rate limiter rather than on the endpoint
+    waited_s: float = 0.0
+    # Whether a 429 was reported while the request was being retried
+    rate_limited: bool = False
+
+
+class AIMDController:
+    """
+    Additive-increase/multiplicative-decrease controller for one embeddings endpoint.
+
+    The controller tunes both the number of inputs per request and the number of requests in
+    flight. Every request that completes under ``latency_threshold_ms`` grows the concurrency
+    limit by roughly one per window of requests and the batch size by ``batch_step``. A 429, or
+    a windowed mean latency above the threshold, multiplies both by ``decrease_factor``. Only
+    requests started after the most recent decrease can trigger another one, so a burst of
+    429s from requests that were already in flight counts as a single congestion signal.
+
+    State is shared by every embed call in the process. Slot waiters park on a future of
+    their own event loop and are woken thread-safely, so the same controller can be used
+    from Celery, Hatchet and FastAPI loops at once.
+    """
+
+    def __init__(
+        self,
+        initial_batch_size: int,
+        min_batch_size: int,
+        max_batch_size: int,
+        initial_concurrency: int,
+        min_concurrency: int,
+        max_concurrency: int,
+        latency_threshold_ms: float,
+        decrease_factor: float = 0.5,
+        batch_step: int = 1,
+        window: int = 5,
+    ):
+        if not 0 < decrease_factor < 1:
+            raise ValueError("decrease_factor must be between 0 and 1")
+        self.min_batch_size = max(1, min(min_batch_size, initial_batch_size))
+        self.max_batch_size = max(max_batch_size, initial_batch_size)
+        self.min_concurrency = max(1, min_concurrency)
+        self.max_concurrency = max(max_concurrency, self.min_concurrency)
+        self.latency_threshold_ms = latency_threshold_ms
+        self.decrease_factor = decrease_factor
+        self.batch_step = batch_step
+        self.batch_size = initial_batch_size
+        self.concurrency = float(
+            min(max(initial_concurrency, self.min_concurrency), self.max_concurrency)
+        )
+        self.in_flight = 0
+        self.rate_limited = 0
+        self._latencies: deque[float] = deque(maxlen=max(1, window))
+        self._last_decrease = 0.0
+        self._lock = threading.Lock()
+        self._waiters: list[tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+
+    @property
+    def limit(self) -> int:
+        """The number of requests currently allowed in flight."""
+        return int(self.concurrency)
+
+    async def acquire(self) -> Slot:
+        """
+        Waits until a request may be sent.
+
+        Returns:
+            Slot: The permit, carrying the batch size the request should use. It must be
+                handed back with ``release`` once the request finishes.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._lock:
+                if self.in_flight < self.limit:
+                    self.in_flight += 1
+                    return Slot(batch_size=self.batch_size, started_at=time.monotonic())
+                waiter = loop.create_future()
+                self._waiters.append((loop, waiter))
+            try:
+                await waiter
+            finally:
+                with self._lock:
+                    if (loop, waiter) in self._waiters:
+                        self._waiters.remove((loop, waiter))
+
+    async def release(self, slot: Slot, rate_limited: bool = False, failed: bool = False):
+        """Async form of ``release_nowait``."""
+        self.release_nowait(slot, rate_limited=rate_limited, failed=failed)
+
+    def release_nowait(self, slot: Slot, rate_limited: bool = False, failed: bool = False):
+        """
+        Returns a permit and feeds the outcome of its request back into the controller.
+        Safe to call from any thread or event loop.
+
+        Args:
+            slot (Slot): The permit returned by ``acquire``.
+            rate_limited (bool): Whether the endpoint answered with a 429.
+            failed (bool): Whether the request failed for another reason, in which case its
+                latency is not used as a signal.
+
+        Time the request spent waiting on a rate limiter is not counted as latency, and a
+        request that already reported a 429 through ``record_rate_limit`` is not used to
+        grow the limits.
+        """
+        latency_ms = (time.monotonic() - slot.started_at - slot.waited_s) * 1000
+        with self._lock:
+            self.in_flight -= 1
+            if rate_limited:
+                self.rate_limited += 1
+                self._decrease(slot)
+            elif not failed and not slot.rate_limited:
+                self._latencies.append(latency_ms)
+                if mean(self._latencies) > self.latency_threshold_ms:
+                    self._decrease(slot)
+                else:
+                    self._increase()
+            waiters, self._waiters = self._waiters, []
+        # Every waiter retries, since an increase may have freed more than one permit
+        for loop, waiter in waiters:
+            self._wake(loop, waiter)
+
+    @staticmethod
+    def _wake(loop: asyncio.AbstractEventLoop, waiter: asyncio.Future):
+        def wake():
+            if not waiter.done():
+                waiter.set_result(None)
+
+        try:
+            loop.call_soon_threadsafe(wake)
+        except RuntimeError:
+            # The waiter's loop is closed; nothing is left waiting on it
+            pass
+
+    def record_rate_limit(self, slot: Slot):
+        """Feeds a 429 into the controller while its request is still being retried."""
+        with self._lock:
+            slot.rate_limited = True
+            self.rate_limited += 1
+            self._decrease(slot)
+
+    def _increase(self):
+        self.concurrency = min(self.concurrency + 1 / self.concurrency, self.max_concurrency)
+        self.batch_size = min(self.batch_size + self.batch_step, self.max_batch_size)
+
+    def _decrease(self, slot: Slot):
+        if slot.started_at < self._last_decrease:
+            return
+        self._last_decrease = time.monotonic()
+        self._latencies.clear()
+        self.concurrency = max(self.concurrency * self.decrease_factor, self.min_concurrency)
+        self.batch_size = max(int(self.batch_size * self.decrease_factor), self.min_batch_size)
+
+    def stats(self) -> dict[str, Any]:
+        """Returns the controller's current settings, for health checks and debugging."""
+        return {
+            "batch_size": self.batch_size,
+            "concurrency_limit": self.limit,
+            "in_flight": self.in_flight,
+            "rate_limited": self.rate_limited,
+        }
+
+
+# The controller and permit of the batch running in the current task, so the rate limiter
+# can report waits and absorbed 429s against it
+_current_slot: ContextVar[Optional[tuple[AIMDController, Slot]]] = ContextVar(
+    "current_slot", default=None
+)
+
+
+def report_limiter_wait(seconds: float):
+    """Excludes time spent waiting on a rate limiter from the current batch's latency."""
+    current = _current_slot.get()
+    if current is not None:
+        current[1].waited_s += seconds
+
+
+def report_rate_limited():
+    """Feeds a 429 absorbed by a retry into the current batch's controller right away,
+    instead of only once the retries run out."""
+    current = _current_slot.get()
+    if current is not None:
+        controller, slot = current
+        controller.record_rate_limit(slot)
+
+
+_controllers: dict[str, AIMDController] = {}
+_controllers_lock = threading.Lock()
+
+
+def get_concurrency_controller(endpoint: str, initial_batch_size: int) -> AIMDController:
+    """
+    Returns the process-wide controller for an embeddings endpoint, creating it on first use.
+
+    Args:
+        endpoint (str): The embeddings endpoint URL.
+        initial_batch_size (int): The batch size to start from, usually the connector's
+            configured batch size.
+
+    Returns:
+        AIMDController: The controller shared by every embed call against the endpoint.
+    """
+    with _controllers_lock:
+        controller = _controllers.get(endpoint)
+        if controller is None:
+            controller = _controllers[endpoint] = AIMDController(
+                initial_batch_size=initial_batch_size,
+                min_batch_size=settings.min_batch_size,
+                max_batch_size=settings.max_batch_size,
+                initial_concurrency=settings.embed_initial_concurrency,
+                min_concurrency=settings.embed_min_concurrency,
+                max_concurrency=settings.embed_max_concurrency,
+                latency_threshold_ms=settings.latency_threshold_ms,
+                decrease_factor=settings.embed_aimd_decrease_factor,
+                batch_step=settings.embed_aimd_batch_step,
+                window=settings.dynamic_batch_window,
+            )
+        return controller
+
+
+def concurrency_stats() -> dict[str, dict[str, Any]]:
+    """Returns the state of every endpoint controller created in this process."""
+    with _controllers_lock:
+        return {endpoint: controller.stats() for endpoint, controller in _controllers.items()}
+
+
+async def stream_adaptive_batches(
+    controller: AIMDController,
+    input_list: list,
+    request_fn: Callable[[list[int], list], Awaitable[tuple[list, dict]]],
+    rate_limit_errors: tuple[type[Exception], ...] = (),
+    batches: Optional[Iterable[tuple[list[int], list]]] = None,
+) -> AsyncIterator[tuple[list[int], list, dict]]:
+    """
+    Sends input_list in batches paced by an AIMD controller, yielding each batch as soon as
+    its request completes.
+
+    Every request holds one of the controller's permits, so no more than its concurrency
+    limit are in flight, and its latency and any 429 are fed back into the controller. By
+    default batches are cut from the front of input_list as permits become available, so the
+    batch size follows the controller while the call is running. Pre-cut ``batches``, such
+    as token-packed ones, are sent as they are and only their concurrency is controlled.
+
+    Args:
+        controller (AIMDController): The controller for the endpoint being called.
+        input_list (list): The inputs to send.
+        request_fn (Callable): Sends one batch, given its positions in input_list and its
+            inputs, and returns its results and usage.
+        rate_limit_errors (tuple[type[Exception], ...]): Exceptions that signal a 429.
+        batches (Iterable | None): Positions and inputs of pre-cut batches, if any.
+
+    Yields:
+        tuple[list[int], list, dict]: The positions in input_list, the results and the usage
+            of a batch.
+
+    Raises:
+        Exception: The first error raised by request_fn. Outstanding batches are cancelled.
+    """
+    pending = [batch for batch in batches if batch[1]] if batches is not None else None
+    completed: asyncio.Queue[asyncio.Task] = asyncio.Queue()
+    tasks: list[asyncio.Task] = []
+    failed = False
+    # Permits of batches whose task has not started yet, by slot identity. A task cancelled
+    # before its coroutine runs never reaches run_batch, so its permit is returned here.
+    unstarted: dict[int, Slot] = {}
+
+    async def run_batch(slot: Slot, indices: list[int], batch: list):
+        nonlocal failed
+        unstarted.pop(id(slot), None)
+        # Each task runs in a copy of the context, so this only covers its own batch
+        _current_slot.set((controller, slot))
+        try:
+            batch_output, usage = await request_fn(indices, batch)
+        except rate_limit_errors:
+            failed = True
+            await controller.release(slot, rate_limited=True)
+            raise
+        except BaseException:
+            failed = True
+            await controller.release(slot, failed=True)
+            raise
+        await controller.release(slot)
+        return indices, batch_output, usage
+
+    async def launch():
+        position = 0
+        total = len(pending) if pending is not None else len(input_list)
+        while position < total:
+            slot = await controller.acquire()
+            if failed:
+                await controller.release(slot, failed=True)
+                return
+            if pending is not None:
+                indices, batch = pending[position]
+                position += 1
+            else:
+                batch = input_list[position : position + slot.batch_size]
+                indices = list(range(position, position + len(batch)))
+                position += len(batch)
+            unstarted[id(slot)] = slot
+            task = asyncio.create_task(run_batch(slot, indices, batch))
+            task.add_done_callback(completed.put_nowait)
+            tasks.append(task)
+
+    launcher = asyncio.create_task(launch())
+    launcher.add_done_callback(completed.put_nowait)
+    try:
+        launched, yielded = False, 0
+        while not launched or yielded < len(tasks):
+            task = await completed.get()
+            if task is launcher:
+                # Re-raises if sending stopped on an error or a cancellation
+                task.result()
+                launched = True
+                continue
+            yield task.result()
+            yielded += 1
+    finally:
+        launcher.cancel()
+        for task in tasks:
+            task.cancel()
+        for slot in unstarted.values():
+            controller.release_nowait(slot, failed=True)
+        unstarted.clear()
+
+
+async def run_adaptive_batches(
+    controller: AIMDController,
+    input_list: list,
+    request_fn: Callable[[list], Awaitable[tuple[list, dict]]],
+    rate_limit_errors: tuple[type[Exception], ...] = (),
+) -> tuple[list, list[dict]]:
+    """
+    Sends input_list in batches sized and paced by an AIMD controller, like
+    ``stream_adaptive_batches``, and waits for all of them.
+
+    Args:
+        controller (AIMDController): The controller for the endpoint being called.
+        input_list (list): The inputs to send.
+        request_fn (Callable): Sends one batch and returns its results and usage.
+        rate_limit_errors (tuple[type[Exception], ...]): Exceptions that signal a 429.
+
+    Returns:
+        tuple[list, list[dict]]: The results in input order and the usage of every batch.
+
+    Raises:
+        Exception: The first error raised by request_fn. Outstanding batches are cancelled.
+    """
+    results: list = [None] * len(input_list)
+    usages: list[dict] = []
+    async for indices, batch_output, usage in stream_adaptive_batches(
+        controller,
+        input_list,
+        lambda indices, batch: request_fn(batch),
+        rate_limit_errors=rate_limit_errors,
+    ):
+        for idx, result in zip(indices, batch_output):
+            results[idx] = result
+        usages.append(usage)
+    return results, usages
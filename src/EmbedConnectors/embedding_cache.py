@@ -0,0 +1,232 @@
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+
+from config import Config
+from src.Shared.vector_utils import VECTOR_DTYPE, VectorLike, to_float32
+
+settings = Config()
+
+
+def normalise_text(text: str) -> str:
+    """Normalises unicode and collapses whitespace so trivially different chunks share a key."""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+class EmbeddingCache:
+    """
+    Content-addressed embedding cache with a bounded in-memory LRU backed by SQLite.
+
+    Vectors are keyed on a hash of (normalised text, model name, dimensions). Lookups check
+    the memory tier first and fall back to the disk tier, promoting disk hits into memory.
+    Vectors are stored as packed float32, so a hit is returned without float-by-float decoding.
+    The disk tier is evicted least-recently-used first once it grows past ``max_disk_bytes``.
+    """
+
+    def __init__(
+        self,
+        max_memory_items: int,
+        db_path: Optional[str] = None,
+        max_disk_bytes: int = 0,
+    ):
+        self.max_memory_items = max_memory_items
+        self.db_path = db_path
+        self.max_disk_bytes = max_disk_bytes
+        self._memory: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._lock = threading.Lock()
+        self._connection: Optional[sqlite3.Connection] = None
+        self._disk_bytes = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def cache_key(text: str, model: str, dimensions: Optional[int]) -> str:
+        """
+        Builds the content address for a chunk of text embedded by a model.
+
+        Args:
+            text (str): The raw input text.
+            model (str): The embedding model name.
+            dimensions (int | None): The requested embedding dimensions.
+
+        Returns:
+            str: A sha256 hex digest.
+        """
+        payload = f"{model}\x1f{dimensions}\x1f{normalise_text(text)}"
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _db(self) -> Optional[sqlite3.Connection]:
+        if not self.db_path:
+            return None
+        if self._connection is None:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "key TEXT PRIMARY KEY, vector BLOB NOT NULL, "
+                "size INTEGER NOT NULL, last_access REAL NOT NULL)"
+            )
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS embeddings_last_access ON embeddings (last_access)"
+            )
+            self._disk_bytes = connection.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM embeddings"
+            ).fetchone()[0]
+            self._connection = connection
+        return self._connection
+
+    def _remember(self, key: str, vector: np.ndarray):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+
+    def get_many(self, keys: list[str]) -> list[Optional[np.ndarray]]:
+        """
+        Looks up vectors for the given keys.
+
+        Args:
+            keys (list[str]): Cache keys built with ``cache_key``.
+
+        Returns:
+            list[np.ndarray | None]: The cached float32 vector for each key, in input order, or
+                None for a miss.
+        """
+        with self._lock:
+            results: list[Optional[np.ndarray]] = [None] * len(keys)
+            disk_lookups: dict[str, list[int]] = {}
+            for idx, key in enumerate(keys):
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    results[idx] = vector
+                    self.memory_hits += 1
+                else:
+                    disk_lookups.setdefault(key, []).append(idx)
+
+            db = self._db()
+            if db is not None and disk_lookups:
+                found = []
+                lookup_keys = list(disk_lookups)
+                # Stay below SQLite's bound-parameter limit
+                for start in range(0, len(lookup_keys), 500):
+                    chunk = lookup_keys[start : start + 500]
+                    placeholders = ",".join("?" * len(chunk))
+                    found.extend(
+                        db.execute(
+                            f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                            chunk,
+                        ).fetchall()
+                    )
+                now = time.time()
+                for key, blob in found:
+                    vector = np.frombuffer(blob, dtype=VECTOR_DTYPE)
+                    self._remember(key, vector)
+                    for idx in disk_lookups.pop(key):
+                        results[idx] = vector
+                        self.disk_hits += 1
+                if found:
+                    db.executemany(
+                        "UPDATE embeddings SET last_access = ? WHERE key = ?",
+                        [(now, key) for key, _ in found],
+                    )
+                    db.commit()
+
+            self.misses += sum(len(indices) for indices in disk_lookups.values())
+            return results
+
+    def set_many(self, items: dict[str, VectorLike]):
+        """
+        Stores vectors in both tiers, evicting from disk if it exceeds its byte budget.
+
+        Args:
+            items (dict[str, VectorLike]): Vectors keyed by ``cache_key``.
+        """
+        if not items:
+            return
+        with self._lock:
+            items = {key: to_float32(vector) for key, vector in items.items()}
+            for key, vector in items.items():
+                self._remember(key, vector)
+
+            db = self._db()
+            if db is None:
+                return
+            now = time.time()
+            rows = []
+            for key, vector in items.items():
+                blob = vector.tobytes()
+                rows.append((key, blob, len(blob), now))
+            existing = 0
+            for start in range(0, len(rows), 500):
+                chunk = [row[0] for row in rows[start : start + 500]]
+                existing += db.execute(
+                    f"SELECT COALESCE(SUM(size), 0) FROM embeddings "
+                    f"WHERE key IN ({','.join('?' * len(chunk))})",
+                    chunk,
+                ).fetchone()[0]
+            db.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, size, last_access) "
+                "VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            self._disk_bytes += sum(row[2] for row in rows) - existing
+            if self.max_disk_bytes and self._disk_bytes > self.max_disk_bytes:
+                self._evict(db)
+            db.commit()
+
+    def _evict(self, db: sqlite3.Connection):
+        # Trim to 90% of the budget so we don't evict on every subsequent insert
+        target = int(self.max_disk_bytes * 0.9)
+        cursor = db.execute("SELECT key, size FROM embeddings ORDER BY last_access ASC")
+        evicted = []
+        for key, size in cursor:
+            if self._disk_bytes <= target:
+                break
+            evicted.append((key,))
+            self._disk_bytes -= size
+        db.executemany("DELETE FROM embeddings WHERE key = ?", evicted)
+
+    async def aget_many(self, keys: list[str]) -> list[Optional[np.ndarray]]:
+        """Async variant of ``get_many`` that keeps disk I/O off the event loop."""
+        return await asyncio.to_thread(self.get_many, keys)
+
+    async def aset_many(self, items: dict[str, VectorLike]):
+        """Async variant of ``set_many`` that keeps disk I/O off the event loop."""
+        await asyncio.to_thread(self.set_many, items)
+
+    def clear(self):
+        """Drops every cached vector from both tiers."""
+        with self._lock:
+            self._memory.clear()
+            db = self._db()
+            if db is not None:
+                db.execute("DELETE FROM embeddings")
+                db.commit()
+                self._disk_bytes = 0
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+# Singleton embedding cache shared by all embed connectors in the process
+embedding_cache = EmbeddingCache(
+    max_memory_items=settings.embedding_cache_memory_items,
+    db_path=settings.embedding_cache_path or None,
+    max_disk_bytes=settings.embedding_cache_max_disk_bytes,
+)
@@ -0,0 +1,309 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import Any, Optional
+
+import httpx
+
+from config import Config
+from utils.http.client_pool import HttpClientPool, httpx_client_pool
+
+settings = Config()
+
+SendFn = Callable[[str], Awaitable[httpx.Response]]
+
+
+@dataclass
+class EndpointState:
+    """Health and latency bookkeeping for one replica of an embeddings endpoint."""
+
+    url: str
+    ewma_latency_ms: Optional[float] = None
+    in_flight: int = 0
+    consecutive_failures: int = 0
+    failures: int = 0
+    requests: int = 0
+    # Monotonic time until which the circuit is open; 0 means closed
+    open_until: float = 0.0
+    probing: bool = False
+
+    def is_open(self, now: float) -> bool:
+        return self.open_until > now
+
+    def stats(self) -> dict[str, Any]:
+        if not self.open_until:
+            circuit = "closed"
+        else:
+            circuit = "open" if self.is_open(time.monotonic()) else "half-open"
+        return {
+            "ewma_latency_ms": self.ewma_latency_ms,
+            "in_flight": self.in_flight,
+            "requests": self.requests,
+            "failures": self.failures,
+            "circuit": circuit,
+        }
+
+
+class EndpointPool:
+    """
+    Load balancer over the replicas of one embeddings endpoint.
+
+    Each request goes to the replica with the lowest exponentially weighted moving average
+    latency, scaled by the requests it already has in flight; replicas with no samples yet
+    are tried first. ``failure_threshold`` consecutive transport errors or 5xx responses
+    open a replica's circuit for ``reset_s`` seconds, after which a single probe request is
+    let through to close it again. When every circuit is open the replica closest to
+    reopening is used rather than failing the call outright.
+
+    With hedging enabled, a request still outstanding after the pool's recent
+    ``hedge_quantile`` latency is duplicated to another replica and the first usable
+    response wins; the slower request is cancelled.
+    """
+
+    def __init__(
+        self,
+        urls: list[str],
+        ewma_alpha: float = 0.2,
+        failure_threshold: int = 5,
+        reset_s: float = 30.0,
+        hedging: bool = False,
+        hedge_quantile: float = 0.95,
+        hedge_min_delay_ms: float = 50.0,
+        hedge_min_samples: int = 20,
+        latency_window: int = 200,
+    ):
+        if not urls:
+            raise ValueError("An endpoint pool needs at least one URL")
+        self.endpoints = [EndpointState(url=url) for url in urls]
+        self.ewma_alpha = ewma_alpha
+        self.failure_threshold = failure_threshold
+        self.reset_s = reset_s
+        self.hedging = hedging
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_delay_ms = hedge_min_delay_ms
+        self.hedge_min_samples = hedge_min_samples
+        self.hedges = 0
+        self.hedge_wins = 0
+        self._latencies: deque[float] = deque(maxlen=latency_window)
+        self._lock = threading.Lock()
+
+    @property
+    def primary_url(self) -> str:
+        return self.endpoints[0].url
+
+    def client_for(
+        self, url: str, default_client: httpx.AsyncClient, pool: HttpClientPool = httpx_client_pool
+    ) -> httpx.AsyncClient:
+        """
+        Returns the client to send a request to ``url`` with.
+
+        Args:
+            url (str): The replica chosen for the request.
+            default_client (httpx.AsyncClient): The caller's client for the primary replica.
+            pool (HttpClientPool): The pool other replicas' clients are taken from.
+
+        Returns:
+            httpx.AsyncClient: ``default_client`` if ``url`` shares the primary replica's
+            origin, otherwise the pooled client for ``url``.
+        """
+        if pool.endpoint_key(url) == pool.endpoint_key(self.primary_url):
+            return default_client
+        return pool.get_client(url)
+
+    def _score(self, endpoint: EndpointState) -> float:
+        return (endpoint.ewma_latency_ms or 0.0) * (endpoint.in_flight + 1)
+
+    def choose(self, exclude: Optional[EndpointState] = None) -> EndpointState:
+        """
+        Picks the replica for the next request.
+
+        Args:
+            exclude (EndpointState | None): A replica to avoid if any other is usable, e.g.
+                the one a hedged request was first sent to.
+
+        Returns:
+            EndpointState: The chosen replica, with its in-flight count already incremented.
+        """
+        now = time.monotonic()
+        with self._lock:
+            candidates = [endpoint for endpoint in self.endpoints if endpoint is not exclude]
+            candidates = candidates or self.endpoints
+            closed = [endpoint for endpoint in candidates if not endpoint.open_until]
+            probes = [
+                endpoint
+                for endpoint in candidates
+                if endpoint.open_until and not endpoint.is_open(now) and not endpoint.probing
+            ]
+            if closed:
+                endpoint = min(closed, key=self._score)
+            elif probes:
+                endpoint = probes[0]
+                endpoint.probing = True
+            else:
+                endpoint = min(candidates, key=lambda candidate: candidate.open_until)
+            endpoint.in_flight += 1
+            endpoint.requests += 1
+            return endpoint
+
+    def record(self, endpoint: EndpointState, latency_ms: Optional[float], failed: bool):
+        """
+        Feeds the outcome of a request back into the replica's score and circuit.
+
+        Args:
+            endpoint (EndpointState): The replica returned by ``choose``.
+            latency_ms (float | None): The request latency, or None if it says nothing about
+                the replica's speed (cancelled or rate limited requests).
+            failed (bool): Whether the request hit a transport error or a 5xx.
+        """
+        with self._lock:
+            endpoint.in_flight -= 1
+            endpoint.probing = False
+            if failed:
+                endpoint.failures += 1
+                endpoint.consecutive_failures += 1
+                if endpoint.open_until or endpoint.consecutive_failures >= self.failure_threshold:
+                    endpoint.open_until = time.monotonic() + self.reset_s
+                return
+            if latency_ms is None:
+                return
+            endpoint.consecutive_failures = 0
+            endpoint.open_until = 0.0
+            if endpoint.ewma_latency_ms is None:
+                endpoint.ewma_latency_ms = latency_ms
+            else:
+                endpoint.ewma_latency_ms += self.ewma_alpha * (
+                    latency_ms - endpoint.ewma_latency_ms
+                )
+            self._latencies.append(latency_ms)
+
+    def hedge_delay_s(self) -> Optional[float]:
+        """Returns how long to wait before hedging a request, or None if there is too
+        little latency history to pick a delay."""
+        with self._lock:
+            if len(self._latencies) < self.hedge_min_samples:
+                return None
+            ordered = sorted(self._latencies)
+        quantile_ms = ordered[min(len(ordered) - 1, int(self.hedge_quantile * len(ordered)))]
+        return max(quantile_ms, self.hedge_min_delay_ms) / 1000
+
+    async def _attempt(self, endpoint: EndpointState, send_fn: SendFn) -> httpx.Response:
+        started_at = time.monotonic()
+        try:
+            response = await send_fn(endpoint.url)
+        except httpx.TransportError:
+            self.record(endpoint, None, failed=True)
+            raise
+        except Exception:
+            self.record(endpoint, None, failed=False)
+            raise
+        latency_ms = (time.monotonic() - started_at) * 1000
+        if response.status_code >= 500:
+            self.record(endpoint, None, failed=True)
+        else:
+            self.record(endpoint, None if response.status_code == 429 else latency_ms, failed=False)
+        return response
+
+    async def call(self, send_fn: SendFn, hedge: Optional[bool] = None) -> httpx.Response:
+        """
+        Sends a request to the best replica, hedging it to a second one if it is slow.
+
+        Args:
+            send_fn (Callable): Sends the request to the given URL and returns the response.
+            hedge (bool | None): Overrides the pool's hedging setting for this request.
+
+        Returns:
+            httpx.Response: The first response that is neither a 5xx nor a 429, or the last
+            response received if every attempt returned one.
+
+        Raises:
+            Exception: The first error raised by ``send_fn`` if no attempt returned a response.
+        """
+        hedge_delay = self.hedge_delay_s() if (self.hedging if hedge is None else hedge) else None
+        primary = self.choose()
+        attempts = {asyncio.create_task(self._attempt(primary, send_fn)): primary}
+        pending = set(attempts)
+        error: Optional[BaseException] = None
+        fallback: Optional[httpx.Response] = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, timeout=hedge_delay, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    # The primary is slower than usual: race a duplicate against it
+                    hedge_delay = None
+                    endpoint = self.choose(exclude=primary)
+                    task = asyncio.create_task(self._attempt(endpoint, send_fn))
+                    attempts[task] = endpoint
+                    pending.add(task)
+                    self.hedges += 1
+                    continue
+                for task in done:
+                    if task.exception() is not None:
+                        error = error or task.exception()
+                        continue
+                    response = task.result()
+                    if response.status_code >= 500 or response.status_code == 429:
+                        fallback = response
+                        continue
+                    if attempts[task] is not primary:
+                        self.hedge_wins += 1
+                    return response
+                hedge_delay = None
+            if fallback is not None:
+                return fallback
+            raise error
+        finally:
+            # Cancelled attempts may never start running, so their bookkeeping is done here
+            for task, endpoint in attempts.items():
+                if not task.done():
+                    task.cancel()
+                    self.record(endpoint, None, failed=False)
+
+    def stats(self) -> dict[str, Any]:
+        """Returns per-replica scores and circuit states, for health checks and debugging."""
+        with self._lock:
+            return {
+                "hedges": self.hedges,
+                "hedge_wins": self.hedge_wins,
+                "endpoints": {endpoint.url: endpoint.stats() for endpoint in self.endpoints},
+            }
+
+
+_pools: dict[str, EndpointPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_endpoint_pool(name: str, urls: list[str]) -> EndpointPool:
+    """
+    Returns the process-wide pool for an embeddings service, creating it on first use.
+
+    Args:
+        name (str): The service the replicas belong to, e.g. "openai".
+        urls (list[str]): The replica URLs. The first is the primary one.
+
+    Returns:
+        EndpointPool: The pool shared by every embed call against the service.
+    """
+    with _pools_lock:
+        pool = _pools.get(name)
+        if pool is None:
+            pool = _pools[name] = EndpointPool(
+                urls=urls,
+                ewma_alpha=settings.embed_endpoint_ewma_alpha,
+                failure_threshold=settings.embed_circuit_failure_threshold,
+                reset_s=settings.embed_circuit_reset_s,
+                hedging=settings.embed_hedging_enabled,
+                hedge_quantile=settings.embed_hedge_quantile,
+                hedge_min_delay_ms=settings.embed_hedge_min_delay_ms,
+            )
+        return pool
+
+
+def endpoint_pool_stats() -> dict[str, dict[str, Any]]:
+    """Returns the state of every endpoint pool created in this process."""
+    with _pools_lock:
+        return {name: pool.stats() for name, pool in _pools.items()}
@@ -0,0 +1,128 @@
+from dataclasses import dataclass, field
+from typing import Optional
+
+from config import Config
+from src.EmbedConnectors.embedding_cache import normalise_text
+from src.EmbedConnectors.token_batching import APPROX_CHARS_PER_TOKEN, get_tokenizer
+from src.Shared.Exceptions import EmbeddingInputTooLongError
+from src.Shared.RagDocument import RagDocument
+
+settings = Config()
+
+OVERSIZE_POLICIES = ("truncate", "split", "drop", "error")
+
+
+def get_input_token_limit(model: Optional[str]) -> int:
+    """
+    Returns the maximum number of tokens a single embedding input may have.
+
+    Args:
+        model (str | None): The embedding model name.
+
+    Returns:
+        int: The per-input token limit for the model.
+    """
+    limits = settings.embedding_input_token_limits
+    return limits.get(model or "", limits.get("default", 8191))
+
+
+@dataclass
+class GuardReport:
+    """What the guard changed in a batch of embedding inputs."""
+
+    truncated: int = 0
+    split: int = 0
+    dropped_ids: list[str] = field(default_factory=list)
+
+
+class InputGuard:
+    """
+    Pre-flight check keeping every embedding input within its model's token limit.
+
+    Whitespace is collapsed first. Only inputs with more characters than the limit can exceed
+    it, so only those are tokenised, with the model's cached encoder. Oversized inputs are
+    then handled according to ``policy``:
+
+    - ``truncate`` keeps the leading ``limit`` tokens.
+    - ``split`` cuts the input into consecutive pieces of at most ``limit`` tokens, each
+      embedded as its own chunk with an ``_<n>`` suffix on the chunk ID.
+    - ``drop`` leaves the input out.
+    - ``error`` raises ``EmbeddingInputTooLongError``.
+
+    A single oversized input therefore no longer fails the provider request for its whole
+    batch.
+    """
+
+    def __init__(
+        self,
+        model: Optional[str],
+        policy: str = "truncate",
+        max_tokens: Optional[int] = None,
+        normalise_whitespace: bool = True,
+    ):
+        if policy not in OVERSIZE_POLICIES:
+            raise ValueError(f"policy must be one of {OVERSIZE_POLICIES}, got '{policy}'")
+        self.model = model
+        self.policy = policy
+        self.max_tokens = max_tokens or get_input_token_limit(model)
+        self.normalise_whitespace = normalise_whitespace
+
+    def _pieces(self, text: str) -> list[str]:
+        """Cuts text into consecutive pieces of at most ``max_tokens`` tokens."""
+        tokenizer = get_tokenizer(self.model)
+        if tokenizer is None:
+            width = self.max_tokens * APPROX_CHARS_PER_TOKEN
+            if len(text) <= width:
+                return [text]
+            return [text[start : start + width] for start in range(0, len(text), width)]
+        tokens = tokenizer.encode_ordinary(text)
+        if len(tokens) <= self.max_tokens:
+            return [text]
+        return [
+            tokenizer.decode(tokens[start : start + self.max_tokens])
+            for start in range(0, len(tokens), self.max_tokens)
+        ]
+
+    def apply(self, documents: list[RagDocument]) -> tuple[list[RagDocument], GuardReport]:
+        """
+        Normalises the documents' text and enforces the token limit.
+
+        Args:
+            documents (list[RagDocument]): The chunks about to be embedded.
+
+        Returns:
+            tuple[list[RagDocument], GuardReport]: The chunks to embed, in order, and a report
+            of what was truncated, split or dropped. Chunks that needed no change are
+            returned as they are.
+
+        Raises:
+            EmbeddingInputTooLongError: If the policy is ``error`` and an input is too long.
+        """
+        report = GuardReport()
+        guarded = []
+        for document in documents:
+            text = document.content
+            if self.normalise_whitespace:
+                text = normalise_text(text)
+            # A token spans at least one character, so shorter texts need no tokenising
+            pieces = [text] if len(text) <= self.max_tokens else self._pieces(text)
+
+            if len(pieces) == 1:
+                if text == document.content:
+                    guarded.append(document)
+                else:
+                    guarded.append(RagDocument(document.id, text, document.metadata))
+            elif self.policy == "truncate":
+                report.truncated += 1
+                guarded.append(RagDocument(document.id, pieces[0], document.metadata))
+            elif self.policy == "split":
+                report.split += 1
+                guarded.extend(
+                    RagDocument(f"{document.id}_{idx}", piece, document.metadata)
+                    for idx, piece in enumerate(pieces)
+                )
+            elif self.policy == "drop":
+                report.dropped_ids.append(document.id)
+            else:
+                raise EmbeddingInputTooLongError(document.id, self.model, self.max_tokens)
+        return guarded, report
@@ -0,0 +1,155 @@
+import asyncio
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Any
+
+from config import Config
+from src.EmbedConnectors.embedding_cache import normalise_text
+
+settings = Config()
+
+EmbedQueriesFn = Callable[[list[str]], Awaitable[list[Any]]]
+
+
+class QueryEmbeddingCache:
+    """
+    TTL + LRU cache of search query embeddings, with single-flight upstream calls.
+
+    Entries are namespaced, typically by (pipeline id, model, dimensions), so pipelines never
+    share vectors. Concurrent lookups of the same uncached query wait on a single embedding
+    call instead of each calling the model.
+    """
+
+    def __init__(self, max_items: int, ttl_seconds: float):
+        self.max_items = max_items
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[tuple, tuple[float, Any]] = OrderedDict()
+        self._inflight: dict[tuple, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    @staticmethod
+    def key(namespace: Hashable, query: str) -> tuple:
+        """Builds the cache key for a query, ignoring whitespace differences."""
+        return (namespace, normalise_text(query))
+
+    def get(self, namespace: Hashable, query: str) -> Any | None:
+        """
+        Returns the cached embedding for a query, or None if it is missing or expired.
+
+        Args:
+            namespace (Hashable): The cache namespace, e.g. (pipeline id, model, dimensions).
+            query (str): The search query.
+
+        Returns:
+            The cached vector, or None.
+        """
+        key = self.key(namespace, query)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, vector = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return vector
+
+    def put(self, namespace: Hashable, query: str, vector: Any):
+        """Stores a query embedding, evicting the least recently used entries if full."""
+        key = self.key(namespace, query)
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, vector)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_items:
+            self._entries.popitem(last=False)
+
+    async def get_or_embed(self, namespace: Hashable, query: str, embed_fn: EmbedQueriesFn):
+        """
+        Returns the embedding for a query, calling the model at most once per uncached query.
+
+        Args:
+            namespace (Hashable): The cache namespace, e.g. (pipeline id, model, dimensions).
+            query (str): The search query.
+            embed_fn (Callable): Embeds a list of queries, returning their vectors in order.
+
+        Returns:
+            The query's vector.
+        """
+        vector = self.get(namespace, query)
+        if vector is not None:
+            self.hits += 1
+            return vector
+
+        key = self.key(namespace, query)
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.coalesced += 1
+            # Shield so a cancelled follower does not cancel the shared call
+            return await asyncio.shield(inflight)
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            vectors = await embed_fn([query])
+            if not vectors:
+                raise ValueError("Failed to generate embeddings for query")
+            vector = vectors[0]
+            self.put(namespace, query, vector)
+            future.set_result(vector)
+            return vector
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved in case no follower was waiting
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    async def prewarm(
+        self,
+        namespace: Hashable,
+        queries: list[str],
+        embed_fn: EmbedQueriesFn,
+        batch_size: int = 100,
+    ) -> int:
+        """
+        Embeds and caches popular queries ahead of traffic.
+
+        Args:
+            namespace (Hashable): The cache namespace, e.g. (pipeline id, model, dimensions).
+            queries (list[str]): The queries to warm.
+            embed_fn (Callable): Embeds a list of queries, returning their vectors in order.
+            batch_size (int): The number of queries embedded per call.
+
+        Returns:
+            int: The number of queries that were embedded.
+        """
+        missing = list(
+            dict.fromkeys(
+                query for query in queries if query.strip() and self.get(namespace, query) is None
+            )
+        )
+        for start in range(0, len(missing), batch_size):
+            batch = missing[start : start + batch_size]
+            for query, vector in zip(batch, await embed_fn(batch)):
+                self.put(namespace, query, vector)
+        return len(missing)
+
+    def stats(self) -> dict[str, int]:
+        """Returns hit, miss and coalesced counts, for health checks and debugging."""
+        return {
+            "items": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+        }
+
+
+# Singleton query embedding cache shared by the search endpoints of a process
+query_embedding_cache = QueryEmbeddingCache(
+    max_items=settings.query_cache_max_items,
+    ttl_seconds=settings.query_cache_ttl_seconds,
+)
@@ -0,0 +1,328 @@
+import asyncio
+import random
+import threading
+import time
+import weakref
+from abc import ABC, abstractmethod
+from collections.abc import Awaitable, Callable
+from email.utils import parsedate_to_datetime
+from typing import Any, Optional, TypeVar
+
+import redis.asyncio as aioredis
+from redis.exceptions import RedisError
+
+from config import Config
+from src.EmbedConnectors.concurrency import report_limiter_wait, report_rate_limited
+from utils.platform_commons.logger import logger
+
+settings = Config()
+
+T = TypeVar("T")
+
+# Base delay for exponential backoff when a 429 carries no Retry-After header
+BACKOFF_BASE_S = 1.0
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parses a Retry-After header given either as delay seconds or as an HTTP date.
+
+    Args:
+        value (str | None): The raw header value.
+
+    Returns:
+        float | None: The number of seconds to wait, or None if the header is missing or
+            malformed.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RateLimiter(ABC):
+    """
+    Base class for token-bucket rate limiters guarding an embeddings model.
+
+    Each limiter enforces a requests-per-minute and a tokens-per-minute budget. Buckets may go
+    into debt: a request that does not fit waits for exactly as long as it takes the bucket
+    to refill, so concurrent callers are served in arrival order without polling. A 429 from
+    the provider pauses every caller until its Retry-After has elapsed.
+    """
+
+    def __init__(self, requests_per_minute: int = 0, tokens_per_minute: int = 0):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+
+    @abstractmethod
+    async def reserve(self, tokens: int) -> float:
+        """
+        Reserves capacity for one request.
+
+        Args:
+            tokens (int): The number of tokens the request will consume.
+
+        Returns:
+            float: The number of seconds the caller must wait before sending.
+        """
+
+    @abstractmethod
+    async def block(self, seconds: float):
+        """Pauses all callers of the limiter for the given number of seconds."""
+
+    async def acquire(self, tokens: int) -> float:
+        """
+        Waits until a request may be sent.
+
+        Args:
+            tokens (int): The number of tokens the request will consume.
+
+        Returns:
+            float: The number of seconds spent waiting.
+        """
+        wait = await self.reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    async def call(
+        self,
+        request_fn: Callable[[], Awaitable[T]],
+        tokens: int,
+        rate_limit_errors: tuple[type[Exception], ...],
+        max_retries: int = settings.embed_rate_limit_max_retries,
+        max_backoff: float = settings.embed_rate_limit_max_backoff_s,
+        on_wait: Optional[Callable[[float, int], Any]] = None,
+    ) -> T:
+        """
+        Sends a request once capacity is available, waiting out 429s instead of failing.
+
+        A rate-limit error's ``retry_after`` attribute, when set, is honoured for every
+        caller of the limiter; otherwise the request backs off exponentially with jitter.
+        When the call runs inside an adaptive batch, every absorbed 429 and every second
+        spent waiting are reported to the batch's concurrency controller, so it backs off
+        on the first 429 and does not mistake limiter waits for endpoint latency.
+
+        Args:
+            request_fn (Callable): Sends the request.
+            tokens (int): The number of tokens the request will consume.
+            rate_limit_errors (tuple[type[Exception], ...]): Exceptions that signal a 429.
+            max_retries (int): How many 429s to absorb before re-raising.
+            max_backoff (float): Upper bound in seconds for a single backoff.
+            on_wait (Callable | None): Called with the total seconds spent waiting and the
+                number of 429s absorbed, once the request has been sent successfully.
+
+        Returns:
+            The result of request_fn.
+
+        Raises:
+            Exception: The last rate-limit error once max_retries is exhausted, or any other
+            error raised by request_fn.
+        """
+        waited, attempt = 0.0, 0
+        while True:
+            wait = await self.acquire(tokens)
+            report_limiter_wait(wait)
+            waited += wait
+            try:
+                result = await request_fn()
+            except rate_limit_errors as e:
+                if attempt >= max_retries:
+                    raise
+                report_rate_limited()
+                retry_after = getattr(e, "retry_after", None)
+                if retry_after is None:
+                    wait = random.uniform(0, min(max_backoff, BACKOFF_BASE_S * 2**attempt))
+                    await asyncio.sleep(wait)
+                else:
+                    wait = min(retry_after, max_backoff)
+                    await self.block(wait)
+                report_limiter_wait(wait)
+                waited += wait
+                attempt += 1
+                continue
+            if on_wait is not None and (waited or attempt):
+                on_wait(waited, attempt)
+            return result
+
+
+class LocalRateLimiter(RateLimiter):
+    """Token-bucket rate limiter whose budgets are shared within the current process."""
+
+    def __init__(self, requests_per_minute: int = 0, tokens_per_minute: int = 0):
+        super().__init__(requests_per_minute, tokens_per_minute)
+        now = time.monotonic()
+        # Bucket name -> [level, last refill]
+        self._buckets = {
+            "requests": [float(requests_per_minute), now],
+            "tokens": [float(tokens_per_minute), now],
+        }
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _take(self, bucket: str, rate: int, cost: int, now: float) -> float:
+        if rate <= 0:
+            return 0.0
+        level, refilled_at = self._buckets[bucket]
+        level = min(float(rate), level + (now - refilled_at) * rate / 60) - cost
+        self._buckets[bucket] = [level, now]
+        return -level * 60 / rate if level < 0 else 0.0
+
+    async def reserve(self, tokens: int) -> float:
+        with self._lock:
+            now = time.monotonic()
+            return max(
+                self._blocked_until - now,
+                self._take("requests", self.requests_per_minute, 1, now),
+                self._take("tokens", self.tokens_per_minute, tokens, now),
+                0.0,
+            )
+
+    async def block(self, seconds: float):
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+        await asyncio.sleep(seconds)
+
+
+class RedisRateLimiter(RateLimiter):
+    """
+    Token-bucket rate limiter whose budgets are shared by every worker through Redis.
+
+    Bucket updates run in a Lua script against the Redis server clock, so workers on
+    different hosts agree on refill times. If Redis is unavailable the limiter degrades to a
+    process-local limiter rather than failing the embedding call.
+    """
+
+    _RESERVE_SCRIPT = """
+    redis.replicate_commands()
+    local now_parts = redis.call('TIME')
+    local now = tonumber(now_parts[1]) + tonumber(now_parts[2]) / 1000000
+    local wait = 0
+    local blocked = tonumber(redis.call('HGET', KEYS[1], 'blocked_until') or '0')
+    if blocked > now then wait = blocked - now end
+    local budgets = {
+        {'requests', tonumber(ARGV[1]), 1},
+        {'tokens', tonumber(ARGV[2]), tonumber(ARGV[3])},
+    }
+    for _, budget in ipairs(budgets) do
+        local name, rate, cost = budget[1], budget[2], budget[3]
+        if rate > 0 then
+            local level = tonumber(redis.call('HGET', KEYS[1], name) or rate)
+            local refilled_at = tonumber(redis.call('HGET', KEYS[1], name .. '_at') or now)
+            level = math.min(rate, level + (now - refilled_at) * rate / 60) - cost
+            redis.call('HSET', KEYS[1], name, tostring(level), name .. '_at', tostring(now))
+            if level < 0 then wait = math.max(wait, -level * 60 / rate) end
+        end
+    end
+    redis.call('EXPIRE', KEYS[1], 120)
+    return tostring(wait)
+    """
+
+    _BLOCK_SCRIPT = """
+    redis.replicate_commands()
+    local now_parts = redis.call('TIME')
+    local now = tonumber(now_parts[1]) + tonumber(now_parts[2]) / 1000000
+    local blocked = tonumber(redis.call('HGET', KEYS[1], 'blocked_until') or '0')
+    local blocked_until = math.max(blocked, now + tonumber(ARGV[1]))
+    redis.call('HSET', KEYS[1], 'blocked_until', tostring(blocked_until))
+    redis.call('EXPIRE', KEYS[1], 120)
+    return 1
+    """
+
+    def __init__(self, key: str, requests_per_minute: int = 0, tokens_per_minute: int = 0):
+        super().__init__(requests_per_minute, tokens_per_minute)
+        self.key = f"embed_rate_limit:{key}"
+        self._fallback = LocalRateLimiter(requests_per_minute, tokens_per_minute)
+        # Whether the last call fell back to local limits, so the switch is logged once
+        self._degraded = False
+        # redis.asyncio connections are bound to the loop that opened them
+        self._clients: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, aioredis.Redis] = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def _client(self) -> aioredis.Redis:
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            client = self._clients[loop] = aioredis.Redis(
+                host=settings.redis_cache_host,
+                port=settings.redis_cache_port,
+                db=settings.redis_cache_db,
+                username=settings.redis_cache_username,
+                password=settings.redis_cache_password,
+                socket_timeout=settings.redis_socket_timeout,
+            )
+        return client
+
+    def _redis_failed(self, error: RedisError):
+        if not self._degraded:
+            self._degraded = True
+            logger.warning(f"Redis rate limiter unavailable, using local limits: {error}")
+
+    def _redis_succeeded(self):
+        if self._degraded:
+            self._degraded = False
+            logger.info("Redis rate limiter available again, using shared limits.")
+
+    async def reserve(self, tokens: int) -> float:
+        try:
+            wait = await self._client().eval(
+                self._RESERVE_SCRIPT,
+                1,
+                self.key,
+                self.requests_per_minute,
+                self.tokens_per_minute,
+                tokens,
+            )
+        except RedisError as e:
+            self._redis_failed(e)
+            return await self._fallback.reserve(tokens)
+        self._redis_succeeded()
+        return float(wait)
+
+    async def block(self, seconds: float):
+        try:
+            await self._client().eval(self._BLOCK_SCRIPT, 1, self.key, seconds)
+        except RedisError as e:
+            self._redis_failed(e)
+            await self._fallback.block(seconds)
+            return
+        self._redis_succeeded()
+        await asyncio.sleep(seconds)
+
+
+_limiters: dict[str, RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(model: str) -> RateLimiter:
+    """
+    Returns the process-wide rate limiter for an embeddings model, creating it on first use.
+
+    Args:
+        model (str): The embedding model name, used to look up its budgets.
+
+    Returns:
+        RateLimiter: A Redis-backed limiter if ``embed_rate_limit_backend`` is "redis",
+            otherwise a process-local one.
+    """
+    with _limiters_lock:
+        limiter = _limiters.get(model)
+        if limiter is None:
+            limits = settings.embed_rate_limits.get(
+                model, settings.embed_rate_limits.get("default", {})
+            )
+            requests_per_minute = int(limits.get("requests_per_minute", 0))
+            tokens_per_minute = int(limits.get("tokens_per_minute", 0))
+            if settings.embed_rate_limit_backend == "redis":
+                limiter = RedisRateLimiter(model, requests_per_minute, tokens_per_minute)
+            else:
+                limiter = LocalRateLimiter(requests_per_minute, tokens_per_minute)
+            _limiters[model] = limiter
+        return limiter
@@ -0,0 +1,154 @@
+from collections.abc import Generator
+from functools import lru_cache
+from typing import Optional
+
+import tiktoken
+
+from config import Config
+
+settings = Config()
+
+# Rough characters-per-token ratio used when no tiktoken encoding can be loaded
+APPROX_CHARS_PER_TOKEN = 4
+
+
+@lru_cache(maxsize=16)
+def get_tokenizer(model: Optional[str]) -> Optional[tiktoken.Encoding]:
+    """
+    Returns the cached tiktoken encoding for a model, falling back to cl100k_base for
+    models tiktoken does not know about (e.g. jina-v2-base).
+
+    Args:
+        model (str | None): The embedding model name.
+
+    Returns:
+        tiktoken.Encoding | None: The encoding, or None if no encoding could be loaded, in
+            which case token counts are approximated from character length.
+    """
+    try:
+        return tiktoken.encoding_for_model(model or "")
+    except KeyError:
+        pass
+    try:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return None
+
+
+def count_tokens(content_list: list[str], model: Optional[str]) -> list[int]:
+    """
+    Counts tokens for each input using the model's cached encoding.
+
+    Args:
+        content_list (list[str]): The input strings.
+        model (str | None): The embedding model name.
+
+    Returns:
+        list[int]: The token count of each input, in input order.
+    """
+    tokenizer = get_tokenizer(model)
+    if tokenizer is None:
+        return [max(1, len(text) // APPROX_CHARS_PER_TOKEN) for text in content_list]
+    return [len(tokens) for tokens in tokenizer.encode_ordinary_batch(content_list)]
+
+
+def approximate_tokens(content_list: list[str]) -> int:
+    """
+    Cheaply estimates the total token count of a batch from its character length.
+
+    Args:
+        content_list (list[str]): The input strings.
+
+    Returns:
+        int: The approximate number of tokens across all inputs.
+    """
+    return sum(max(1, len(text) // APPROX_CHARS_PER_TOKEN) for text in content_list)
+
+
+def get_request_token_budget(model: Optional[str]) -> int:
+    """
+    Returns the maximum number of tokens to pack into a single embeddings request.
+
+    Args:
+        model (str | None): The embedding model name.
+
+    Returns:
+        int: The per-request token budget for the model.
+    """
+    budgets = settings.embedding_request_token_budgets
+    return budgets.get(model or "", budgets.get("default", 8191))
+
+
+def token_aware_batching(
+    content_list: list[str],
+    model: Optional[str],
+    max_items: int,
+    max_tokens: Optional[int] = None,
+    token_counts: Optional[list[int]] = None,
+) -> Generator[tuple[list[int], list[str]], None, None]:
+    """
+    Generator that packs inputs into requests bounded by a token budget and an item cap.
+
+    Inputs are sorted by token count so each request holds similarly sized texts, which
+    reduces padding on the model server. Each batch is yielded with the original positions
+    of its items so callers can restore input order.
+
+    Args:
+        content_list (list[str]): The input strings to batch.
+        model (str | None): The embedding model name, used for the tokenizer and budget.
+        max_items (int): Maximum number of inputs per request.
+        max_tokens (int | None): Token budget per request. Defaults to the model's budget.
+        token_counts (list[int] | None): Pre-computed token counts for content_list.
+
+    Yields:
+        tuple[list[int], list[str]]: The original indices and the texts of a batch.
+
+    Raises:
+        ValueError (Exception): If max_items is not positive or token_counts does not match
+        content_list.
+    """
+    if max_items <= 0:
+        raise ValueError("max_items must be positive")
+    if not isinstance(content_list, list):
+        raise TypeError("content_list must be a list")
+    if token_counts is None:
+        token_counts = count_tokens(content_list, model)
+    if len(token_counts) != len(content_list):
+        raise ValueError("token_counts must have one entry per input")
+    if max_tokens is None:
+        max_tokens = get_request_token_budget(model)
+
+    order = sorted(range(len(content_list)), key=lambda idx: token_counts[idx])
+    batch_indices: list[int] = []
+    batch_tokens = 0
+    for idx in order:
+        tokens = token_counts[idx]
+        if batch_indices and (
+            len(batch_indices) >= max_items or batch_tokens + tokens > max_tokens
+        ):
+            yield batch_indices, [content_list[i] for i in batch_indices]
+            batch_indices, batch_tokens = [], 0
+        # An input larger than the whole budget still gets a request of its own
+        batch_indices.append(idx)
+        batch_tokens += tokens
+    if batch_indices:
+        yield batch_indices, [content_list[i] for i in batch_indices]
+
+
+def restore_order(batches: list[tuple[list[int], list]], size: int) -> list:
+    """
+    Merges per-batch results back into input order.
+
+    Args:
+        batches (list[tuple[list[int], list]]): The original indices of each batch paired
+            with that batch's results.
+        size (int): The number of inputs.
+
+    Returns:
+        list: The results in original input order.
+    """
+    ordered: list = [None] * size
+    for indices, results in batches:
+        for idx, result in zip(indices, results):
+            ordered[idx] = result
+    return ordered
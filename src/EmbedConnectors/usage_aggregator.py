@@ -0,0 +1,143 @@
+import asyncio
+import threading
+import weakref
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from src.EmbedConnectors.token_batching import count_tokens
+
+
+@dataclass
+class UsageRecord:
+    """Token usage and latency accumulated for one (user, model) between flushes."""
+
+    user: Any
+    model: str
+    tokens: int = 0
+    items: int = 0
+    requests: int = 0
+    latency_ms_total: float = 0.0
+    latency_ms_max: float = 0.0
+    # Inputs whose tokens the provider did not report, counted off-loop at flush time
+    uncounted_texts: list[str] = field(default_factory=list)
+
+    @property
+    def latency_ms_mean(self) -> float:
+        return self.latency_ms_total / self.requests if self.requests else 0.0
+
+
+class UsageAggregator:
+    """
+    Buffers embedding usage per (user, model) and publishes it in periodic batches.
+
+    Recording is a cheap in-memory update on the embedding hot path. Records are flushed every
+    ``flush_interval_s`` seconds, or sooner once ``max_records`` requests are pending, with one
+    publish call per (user, model). Inputs that need local token counting are tokenised in a
+    worker thread during the flush.
+    """
+
+    def __init__(
+        self,
+        publish_fn: Callable[[UsageRecord], Awaitable[Any]],
+        flush_interval_s: float,
+        max_records: int,
+        count_tokens_fn: Callable[[list[str], Optional[str]], list[int]] = count_tokens,
+    ):
+        self.publish_fn = publish_fn
+        self.flush_interval_s = flush_interval_s
+        self.max_records = max_records
+        self.count_tokens_fn = count_tokens_fn
+        self._records: dict[tuple, UsageRecord] = {}
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._flushers: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Task] = (
+            weakref.WeakKeyDictionary()
+        )
+        self._flush_scheduled = False
+
+    def record(
+        self,
+        input_list: list,
+        user: Any,
+        model: str,
+        embeddings_time_ms: float,
+        prompt_tokens: int,
+        token_calculation: bool,
+    ):
+        """
+        Adds one embedding request's usage to the buffer.
+
+        Args:
+            input_list (list): The inputs of the request.
+            user (User): The user to attribute the usage to.
+            model (str): The embedding model name.
+            embeddings_time_ms (float): The request latency.
+            prompt_tokens (int): The tokens reported by the provider.
+            token_calculation (bool): Whether tokens must be counted locally instead.
+        """
+        key = (user.id, user.tap_app_name, model)
+        with self._lock:
+            record = self._records.get(key)
+            if record is None:
+                record = self._records[key] = UsageRecord(user=user, model=model)
+            if token_calculation:
+                record.uncounted_texts.extend(input_list)
+            else:
+                record.tokens += prompt_tokens
+            record.items += len(input_list)
+            record.requests += 1
+            record.latency_ms_total += embeddings_time_ms
+            record.latency_ms_max = max(record.latency_ms_max, embeddings_time_ms)
+            self._pending += 1
+            flush_now = self._pending >= self.max_records and not self._flush_scheduled
+            if flush_now:
+                self._flush_scheduled = True
+
+        self._ensure_flusher()
+        if flush_now:
+            asyncio.get_running_loop().create_task(self.flush())
+
+    def _ensure_flusher(self):
+        loop = asyncio.get_running_loop()
+        flusher = self._flushers.get(loop)
+        if flusher is None or flusher.done():
+            self._flushers[loop] = loop.create_task(self._flush_periodically())
+
+    async def _flush_periodically(self):
+        while True:
+            await asyncio.sleep(self.flush_interval_s)
+            try:
+                await self.flush()
+            except Exception:
+                # publish_fn reports its own failures; keep flushing on the next interval
+                continue
+
+    async def flush(self) -> int:
+        """
+        Publishes everything buffered so far.
+
+        Returns:
+            int: The number of (user, model) records published.
+        """
+        with self._lock:
+            records, self._records = list(self._records.values()), {}
+            self._pending = 0
+            self._flush_scheduled = False
+
+        for record in records:
+            if record.uncounted_texts:
+                counts = await asyncio.to_thread(
+                    self.count_tokens_fn, record.uncounted_texts, record.model
+                )
+                record.tokens += sum(counts)
+                record.uncounted_texts = []
+            await self.publish_fn(record)
+        return len(records)
+
+    async def aclose(self):
+        """Stops the periodic flusher of the running loop and publishes what is buffered."""
+        flusher = self._flushers.pop(asyncio.get_running_loop(), None)
+        if flusher is not None:
+            flusher.cancel()
+        await self.flush()
@@ -1,6 +1,7 @@
 from src.EmbedConnectors import EmbedConnector
 from src.EmbedConnectors.EmbedConnectorEnum import EmbedConnectorEnum
 from src.EmbedConnectors.HamEmbedModel import HamEmbedModel
+from src.EmbedConnectors.LocalHashEmbedModel import LocalHashEmbedModel
 from src.EmbedConnectors.OpenAIEmbedModel import OpenAIEmbedModel
 from src.EmbedConnectors.ThinkTankEmbedModel import ThinkTankEmbedModel
 from src.Shared.Exceptions import InvalidEmbedConnectorException
@@ -23,6 +24,8 @@ class EmbedConnectorFactory:
             return OpenAIEmbedModel(**embed_information)
         elif embed_connector_enum == EmbedConnectorEnum.thinktankembed:
             return ThinkTankEmbedModel(**embed_information)
+        elif embed_connector_enum == EmbedConnectorEnum.local_hash:
+            return LocalHashEmbedModel(**embed_information)
         else:
             raise InvalidEmbedConnectorException(
                 f"{embed_connector_name} is an invalid embed connector. "
@@ -1,18 +1,77 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+
+from config import Config
 from src.Shared.Exceptions import InvalidSinkConnectorException
 from src.SinkConnectors.ElasticsearchSink import ElasticsearchSink
 from src.SinkConnectors.SinkConnector import SinkConnector
 from src.SinkConnectors.SinkConnectorEnum import SinkConnectorEnum
 from utils.platform_commons.logger import logger
 
+settings = Config()
+
 available_sink_connectors = [enum.value for enum in list(SinkConnectorEnum)]
 
 
 class SinkConnectorFactory:
-    """Class that leverages the Factory pattern to get the appropriate sink connector"""
+    """Class that leverages the Factory pattern to get the appropriate sink connector
+
+    Sinks are cached per configuration fingerprint, so API requests and tasks for the same
+    pipeline reuse one instance. Entries unused for ``sink_cache_idle_ttl_s`` seconds are
+    evicted, as are the least recently used ones beyond ``sink_cache_max_items``.
+    """
+
+    _cache: "OrderedDict[str, tuple[SinkConnector, float]]" = OrderedDict()
+    _lock = threading.Lock()
 
     @staticmethod
-    def get_sink(sink_name: str, sink_information: dict) -> SinkConnector:
+    def fingerprint(sink_connector_name: str, sink_information: dict) -> str:
+        """Returns the cache key of a sink configuration."""
+        material = json.dumps(
+            {"sink": sink_connector_name, "settings": sink_information}, sort_keys=True, default=str
+        )
+        return hashlib.sha256(material.encode()).hexdigest()
+
+    @classmethod
+    def _evict(cls, now: float):
+        while cls._cache:
+            key, (_, last_used) = next(iter(cls._cache.items()))
+            if len(cls._cache) <= settings.sink_cache_max_items and (
+                now - last_used < settings.sink_cache_idle_ttl_s
+            ):
+                break
+            del cls._cache[key]
+
+    @classmethod
+    def get_sink(cls, sink_name: str, sink_information: dict) -> SinkConnector:
         sink_connector_name = sink_name.replace(" ", "").lower()
+        key = cls.fingerprint(sink_connector_name, sink_information)
+        now = time.monotonic()
+        with cls._lock:
+            cls._evict(now)
+            entry = cls._cache.get(key)
+            if entry is not None:
+                cls._cache[key] = (entry[0], now)
+                cls._cache.move_to_end(key)
+                return entry[0]
+
+        sink = cls._create_sink(sink_connector_name, sink_information)
+        with cls._lock:
+            # A concurrent caller may have created the same sink; keep the first one
+            entry = cls._cache.get(key)
+            if entry is not None:
+                sink = entry[0]
+            cls._cache[key] = (sink, now)
+            cls._cache.move_to_end(key)
+            cls._evict(now)
+        return sink
+
+    @staticmethod
+    def _create_sink(sink_connector_name: str, sink_information: dict) -> SinkConnector:
         sink_connector_enum = SinkConnectorEnum.as_data_connector_enum(
             sink_connector_name=sink_connector_name
         )
@@ -25,3 +84,19 @@ class SinkConnectorFactory:
                 f"{sink_connector_name} is an invalid sink connector. "
                 f"Available connectors: {available_sink_connectors}"
             )
+
+    @classmethod
+    def stats(cls) -> dict[str, Any]:
+        """Returns the number of cached sinks and the cache limits."""
+        with cls._lock:
+            return {
+                "cached_sinks": len(cls._cache),
+                "max_items": settings.sink_cache_max_items,
+                "idle_ttl_s": settings.sink_cache_idle_ttl_s,
+            }
+
+    @classmethod
+    def clear(cls):
+        """Drops every cached sink."""
+        with cls._lock:
+            cls._cache.clear()
@@ -5,22 +5,35 @@ from collections.abc import Generator
 from datetime import UTC, datetime
 from typing import Any
 
+from config import Config
 from src.Chunkers.Chunker import Chunker
+from src.EmbedConnectors.chunk_dedup import get_deduplicator
+from src.EmbedConnectors.commons import get_embedding_dims, publish_dedup_savings
 from src.EmbedConnectors.EmbedConnector import EmbedConnector
+from src.EmbedConnectors.input_guard import InputGuard
 from src.ModelFactories.ChunkerFactory import ChunkerFactory
 from src.ModelFactories.DataConnectorFactory import DataConnectorFactory
 from src.ModelFactories.EmbedConnectorFactory import EmbedConnectorFactory
 from src.ModelFactories.LoaderFactory import LoaderFactory
 from src.ModelFactories.SinkConnectorFactory import SinkConnectorFactory
 from src.Shared.CloudFile import CloudFileSchema
-from src.Shared.Exceptions import InvalidDataConnectorException, InvalidEmbedConnectorException
+from src.Shared.Exceptions import (
+    InvalidDataConnectorException,
+    InvalidEmbedConnectorException,
+    InvalidModelDimensions,
+    InvalidModelError,
+    UnsupportedDimensionError,
+)
 from src.Shared.LocalFile import LocalFile
 from src.Shared.pipeline_config_schema import PipelineConfigSchema
 from src.Shared.RagDocument import RagDocument
 from src.Shared.RagVector import RagVector
+from src.Shared.vector_transform import VectorTransform
 from src.SinkConnectors.SinkConnector import SinkConnector
 from src.Sources.SourceConnector import SourceConnector
 
+settings = Config()
+
 
 class Pipeline:
     """
@@ -41,6 +54,18 @@ class Pipeline:
         self.sources = self._initialize_sources(pipeline_config.sources)
         self.embed_model = self._initialize_embed_model(pipeline_config.embed_model)
         self.sink = self._initialize_sink(pipeline_config.sink)
+        self.vector_transform = self._initialize_vector_transform(pipeline_config.vector_transform)
+        self._declare_vector_shape(pipeline_config.embed_model)
+        self.input_guard = InputGuard(
+            model=self.embed_model.embed_name,
+            policy=settings.embedding_input_oversize_policy,
+            normalise_whitespace=settings.embedding_input_normalise_whitespace,
+        )
+        # Shared across files and tasks so boilerplate chunks repeated between them are
+        # embedded once
+        self.deduplicator = get_deduplicator(
+            self.embed_model.embed_name, pipeline_config.embed_model.settings.get("dimensions")
+        )
 
     def _initialize_sources(self, source_configs: list) -> list:
         """Initializes source connectors from configuration."""
@@ -78,6 +103,48 @@ class Pipeline:
         """Initializes the sink connector."""
         return SinkConnectorFactory.get_sink(sink_config.type, sink_config.settings)
 
+    def _initialize_vector_transform(self, vector_transform_config) -> VectorTransform:
+        """
+        Initializes the post-embedding vector transform, checking that the embed model allows
+        its vectors to be truncated to the configured dimensions.
+        """
+        vector_transform = VectorTransform(vector_transform_config)
+        dimensions = vector_transform.config.dimensions
+        if dimensions is not None:
+            try:
+                get_embedding_dims(
+                    model_name=self.embed_model.embed_name, embedding_dimensions=dimensions
+                )
+            except InvalidModelError:
+                logger.warning(
+                    f"Cannot check that {self.embed_model.embed_name} supports truncation "
+                    f"to {dimensions} dimensions."
+                )
+        if not vector_transform.is_identity:
+            logger.info(f"Vectors will be transformed before ingestion: {vector_transform.config}")
+        return vector_transform
+
+    def _declare_vector_shape(self, embed_model_config):
+        """Tells the sink the dims and element type of the vectors it will store, so it can
+        create its index with a matching vector mapping."""
+        try:
+            source_dimensions = get_embedding_dims(
+                model_name=self.embed_model.embed_name,
+                embedding_dimensions=embed_model_config.settings.get("dimensions"),
+            )
+        except (InvalidModelError, InvalidModelDimensions, UnsupportedDimensionError):
+            logger.warning(
+                f"Unknown dimensions for {self.embed_model.embed_name}; the sink will size its "
+                "index from the first vectors stored."
+            )
+            return
+        shape = self.vector_transform.metadata(source_dimensions)
+        dimensions = shape["dimensions"]
+        if shape["element_type"] == "bit":
+            # Sign bits are packed into whole bytes
+            dimensions = -(-dimensions // 8) * 8
+        self.sink.configure_vectors(dimensions, shape["element_type"])
+
     def _update_state(self, step: str, status: str):
         self.state[step] = {
             "status": status,
@@ -182,16 +249,71 @@ class Pipeline:
     # @retry(stop=stop_after_attempt(5), wait=wait_exponential(multiplier=1, min=1, max=60))
     async def embed_and_ingest(self, chunks: list[RagDocument]) -> int:
         logger.info(f"Starting embedding for {len(chunks)} chunks.")
-        vector_embeddings, _ = await self.embed_model.embed(documents=chunks)
-        vectors_to_store = [
-            RagVector(id=chunk.id, vector=embedding, metadata=chunk.metadata)
-            for chunk, embedding in zip(chunks, vector_embeddings)
-        ]
-        vectors_written = self.sink.store(vectors_to_store)
+        # Oversized inputs would otherwise fail the provider request for their whole batch
+        chunks, report = self.input_guard.apply(chunks)
+        if report.truncated or report.split or report.dropped_ids:
+            logger.warning(
+                f"Chunks over the {self.input_guard.max_tokens} token limit: "
+                f"{report.truncated} truncated, {report.split} split, "
+                f"{len(report.dropped_ids)} dropped {report.dropped_ids}."
+            )
+        plan = self.deduplicator.plan([chunk.content for chunk in chunks])
+        if plan.chunks_deduplicated:
+            logger.info(
+                f"Reusing vectors for {plan.chunks_deduplicated} duplicate chunks, "
+                f"saving ~{plan.tokens_saved} tokens."
+            )
+            publish_dedup_savings(
+                self.embed_model.embed_name, plan.chunks_deduplicated, plan.tokens_saved
+            )
+
+        vectors_written = 0
+        if plan.resolved:
+            fan_out, vector_embeddings = zip(*plan.resolved)
+            vectors_written += await self._store_vectors(chunks, fan_out, vector_embeddings)
+
+        unique_chunks = [chunks[idx] for idx in plan.unique_indices]
+        # Store each batch as soon as it is embedded rather than waiting on the slowest request
+        async for indices, vector_embeddings in self.embed_model.embed_stream(
+            documents=unique_chunks
+        ):
+            for idx, embedding in zip(indices, vector_embeddings):
+                self.deduplicator.remember(plan.keys[idx], embedding)
+            fan_out = [plan.fan_out[idx] for idx in indices]
+            vectors_written += await self._store_vectors(chunks, fan_out, vector_embeddings)
         logger.info(f"Stored {vectors_written} vectors in the vector database.")
         return vectors_written
 
+    async def _store_vectors(self, chunks: list[RagDocument], fan_out, vector_embeddings) -> int:
+        """
+        Writes each embedding to the sink once for every chunk position it is fanned out to.
+
+        The write is awaited, so embedding requests already in flight keep running while
+        the sink indexes this batch.
+        """
+        vectors_to_store = [
+            RagVector(
+                id=chunks[idx].id,
+                vector=embedding,
+                metadata=chunks[idx].metadata,
+                text=chunks[idx].content,
+            )
+            for positions, embedding in zip(fan_out, vector_embeddings)
+            for idx in positions
+        ]
+        vectors_to_store = self.vector_transform.apply(vectors_to_store)
+        return await self.sink.astore(vectors_to_store)
+
     async def run_pipeline(self, extract_type: str):
+        if extract_type == "full":
+            # A full run rewrites the whole sink; let it load without incremental upkeep
+            async with self.sink.abulk_load():
+                await self._run_documents(extract_type)
+        else:
+            await self._run_documents(extract_type)
+        logger.info("Pipeline run completed.")
+
+    async def _run_documents(self, extract_type: str):
         tasks = []
         async for source, file in self.run_extraction(extract_type):
             tasks.append(self.process_and_ingest_document(source, file))
@@ -201,8 +323,6 @@ class Pipeline:
             if isinstance(result, Exception):
                 logger.error(f"Pipeline run failed with error: {result}")
 
-        logger.info("Pipeline run completed.")
-
     def search(self, query: str, top_k: int = 5) -> list[dict]:
         """
         Search the sink for relevant data based on the query.
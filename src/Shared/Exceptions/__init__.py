@@ -131,11 +131,12 @@ class RateLimitError(Exception):
     This exception is raised when there are request errors to a model provider
     """
 
-    def __init__(self, router: str, model: str):
+    def __init__(self, router: str, model: str, retry_after: float | None = None):
         self.reason = (
             f"We have reached our rate limit with the model provider for model {model} "
             f"through router {router}. Please try again after some time."
         )
+        self.retry_after = retry_after
         super().__init__(self.reason)
 
 
@@ -325,16 +326,49 @@ def embedding_size_mismatch_error_to_error_response(
     )
 
 
+class EmbeddingInputTooLongError(Exception):
+    """
+    This exception is raised when an embedding input exceeds its model's token limit
+    """
+
+    def __init__(self, document_id: str, model: str | None, max_tokens: int):
+        self.document_id = document_id
+        self.reason = f"Input {document_id} exceeds the {max_tokens} token limit of model {model}."
+        super().__init__(self.reason)
+
+
+def embedding_input_too_long_error_to_error_response(
+    error: EmbeddingInputTooLongError,
+) -> ErrorResponse:
+    """
+    Translates a EmbeddingInputTooLongError into an ErrorResponse for logging
+    and building web responses in a consistent way.
+
+    Args:
+        error (EmbeddingInputTooLongError): the error to translate
+
+    Returns:
+        ErrorResponse: an error response for use in logging and building web response
+    """
+
+    return ErrorResponse(
+        message=error.reason,
+        error_type="Bad Request",
+        code="embedding_input_too_long_error",
+    )
+
+
 class HAMRateLimitError(Exception):
     """
     This exception is raised when HAM returns a 429 status code
     """
 
-    def __init__(self):
+    def __init__(self, retry_after: float | None = None):
         self.reason = (
             "We have reached the provider rate limit with HAM/On-prem models. Please "
             "try again after some time."
         )
+        self.retry_after = retry_after
         super().__init__(self.reason)
 
 
@@ -390,6 +424,40 @@ def ham_request_error_to_error_response(
     )
 
 
+class OauthTokenRetrievalError(Exception):
+    """
+    This exception is raised when an OAuth access token cannot be retrieved
+    """
+
+    def __init__(self, status_code: int | None = None, detail: str = ""):
+        self.status_code = status_code
+        self.reason = (
+            f"Failed to retrieve an OAuth access token. status_code: {status_code}. {detail}"
+        )
+        super().__init__(self.reason)
+
+
+def oauth_token_retrieval_error_to_error_response(
+    error: OauthTokenRetrievalError,
+) -> ErrorResponse:
+    """
+    Translates a OauthTokenRetrievalError into an ErrorResponse for logging
+    and building web responses in a consistent way.
+
+    Args:
+        error (OauthTokenRetrievalError): the error to translate
+
+    Returns:
+        ErrorResponse: an error response for use in logging and building web response
+    """
+
+    return ErrorResponse(
+        message=error.reason,
+        error_type="Internal Server Error",
+        code="oauth_token_retrieval_error",
+    )
+
+
 class AzureBlobConnectionException(Exception):
     """Raised if establishing a connection to Azure Blob fails"""
 
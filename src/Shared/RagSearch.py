@@ -1,6 +1,8 @@
 from typing import Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
+
+from src.Shared.vector_utils import to_list
 
 
 class RagSearchResult(BaseModel):
@@ -8,3 +10,10 @@ class RagSearchResult(BaseModel):
     metadata: dict = Field(..., description="Search result vector metadata")
     score: Optional[float] = Field(None, description="Search result similarity score")
     vector: Optional[list[float]] = Field(None, description="Search result vector")
+    text: Optional[str] = Field(None, description="Search result chunk text")
+
+    @field_validator("vector", mode="before")
+    @classmethod
+    def unpack_vector(cls, value):
+        # Search results are serialised to JSON, so packed vectors are converted to lists
+        return to_list(value)
@@ -1,8 +1,19 @@
 from abc import ABC
+from typing import Optional
+
+import numpy as np
+
+from src.Shared.vector_utils import VectorLike, as_vector
 
 
 class RagVector(ABC):
-    def __init__(self, id: str, vector: list[float], metadata: dict) -> None:
+    def __init__(
+        self, id: str, vector: VectorLike, metadata: dict, text: Optional[str] = None
+    ) -> None:
         self.id: str = id
-        self.vector: list[float] = vector
+        # Held as packed float32; lists, raw bytes and base64 strings are converted on entry.
+        # Vectors already quantised to int8 or packed bits are kept as they are
+        self.vector: np.ndarray = as_vector(vector)
         self.metadata: dict = metadata
+        # Chunk text the vector was embedded from, for sinks that also index it lexically
+        self.text: Optional[str] = text
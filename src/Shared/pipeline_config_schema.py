@@ -1,10 +1,13 @@
 # src/schemas/pipeline_config_schema.py
 
+from typing import Optional
+
 from pydantic import BaseModel, Field
 
 from src.Shared.embed_config_schema import EmbedConfigSchema
 from src.Shared.sink_config_schema import SinkConfigSchema
 from src.Shared.source_config_schema import SourceConfigSchema
+from src.Shared.vector_transform_config_schema import VectorTransformConfigSchema
 
 
 class PipelineConfigSchema(BaseModel):
@@ -13,3 +16,6 @@ class PipelineConfigSchema(BaseModel):
     sources: list[SourceConfigSchema] = Field(..., description="List of source configurations")
     embed_model: EmbedConfigSchema = Field(..., description="Configuration for the embedding model")
     sink: SinkConfigSchema = Field(..., description="Configuration for the sink (Vector DB)")
+    vector_transform: Optional[VectorTransformConfigSchema] = Field(
+        None, description="Truncation and quantisation applied to vectors before the sink"
+    )
@@ -0,0 +1,86 @@
+from typing import Any, Optional
+
+import numpy as np
+
+from src.Shared.RagVector import RagVector
+from src.Shared.vector_transform_config_schema import VectorTransformConfigSchema
+from src.Shared.vector_utils import quantize_binary, quantize_int8, truncate_dimensions
+
+# Metadata key under which the transform applied to a vector is recorded
+TRANSFORM_METADATA_KEY = "_vector_transform"
+
+# Elasticsearch dense_vector element types matching each quantisation
+ELEMENT_TYPES = {"none": "float", "int8": "byte", "binary": "bit"}
+
+
+class VectorTransform:
+    """
+    Post-embedding stage that shrinks vectors before they are written to the sink.
+
+    Vectors are first truncated to ``dimensions`` and re-normalised, which is only meaningful
+    for Matryoshka models, then optionally quantised to int8 or packed sign bits. The applied
+    parameters are recorded in each vector's metadata so searches and index mappings can be
+    matched to what was stored.
+    """
+
+    def __init__(self, config: Optional[VectorTransformConfigSchema] = None):
+        self.config = config or VectorTransformConfigSchema()
+
+    @property
+    def is_identity(self) -> bool:
+        return self.config.dimensions is None and self.config.quantization == "none"
+
+    def output_dimensions(self, source_dimensions: int) -> int:
+        """Returns the number of dimensions the sink mapping should declare for stored vectors."""
+        if self.config.dimensions is None:
+            return source_dimensions
+        return min(self.config.dimensions, source_dimensions)
+
+    def metadata(self, source_dimensions: int) -> dict[str, Any]:
+        """
+        Describes the transform applied to a vector of ``source_dimensions`` dimensions.
+
+        Args:
+            source_dimensions (int): The number of dimensions returned by the embed model.
+
+        Returns:
+            dict: The source and stored dimensions, the quantisation and the matching
+            Elasticsearch element type.
+        """
+        return {
+            "source_dimensions": source_dimensions,
+            "dimensions": self.output_dimensions(source_dimensions),
+            "quantization": self.config.quantization,
+            "element_type": ELEMENT_TYPES[self.config.quantization],
+        }
+
+    def transform(self, vector: np.ndarray) -> np.ndarray:
+        """
+        Applies the configured truncation and quantisation to one float32 embedding.
+
+        Args:
+            vector (np.ndarray): The embedding returned by the embed model.
+
+        Returns:
+            np.ndarray: A float32, int8 or packed-bit vector.
+        """
+        if self.config.dimensions is not None and self.config.dimensions < len(vector):
+            vector = truncate_dimensions(vector, self.config.dimensions)
+        if self.config.quantization == "int8":
+            return quantize_int8(vector)
+        if self.config.quantization == "binary":
+            return quantize_binary(vector)
+        return vector
+
+    def apply(self, vectors: list[RagVector]) -> list[RagVector]:
+        """Transforms a batch of vectors in place, recording the transform in their metadata."""
+        if self.is_identity:
+            return vectors
+        for rag_vector in vectors:
+            source_dimensions = len(rag_vector.vector)
+            rag_vector.vector = self.transform(rag_vector.vector)
+            rag_vector.metadata = {
+                **rag_vector.metadata,
+                TRANSFORM_METADATA_KEY: self.metadata(source_dimensions),
+            }
+        return vectors
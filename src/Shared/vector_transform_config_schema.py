@@ -0,0 +1,16 @@
+# src/schemas/vector_transform_config_schema.py
+
+from typing import Literal, Optional
+
+from pydantic import BaseModel, Field
+
+
+class VectorTransformConfigSchema(BaseModel):
+    dimensions: Optional[int] = Field(
+        None,
+        gt=0,
+        description="Truncate Matryoshka embeddings to this many leading dimensions",
+    )
+    quantization: Literal["none", "int8", "binary"] = Field(
+        "none", description="Quantisation applied to vectors before they reach the sink"
+    )
@@ -0,0 +1,133 @@
+import base64
+from typing import Union
+
+import numpy as np
+
+# Embeddings are held as packed little-endian float32, the precision providers return
+VECTOR_DTYPE = np.dtype("<f4")
+
+VectorLike = Union[np.ndarray, list[float], bytes, str]
+
+
+def to_float32(vector: VectorLike) -> np.ndarray:
+    """
+    Converts an embedding to a packed float32 array, without copying if it already is one.
+
+    Args:
+        vector (np.ndarray | list[float] | bytes | str): The embedding as an array, a list of
+            floats, raw little-endian float32 bytes, or a base64 string of those bytes.
+
+    Returns:
+        np.ndarray: A one-dimensional float32 array.
+    """
+    if isinstance(vector, str):
+        return decode_base64_vector(vector)
+    if isinstance(vector, bytes | bytearray | memoryview):
+        return np.frombuffer(vector, dtype=VECTOR_DTYPE)
+    return np.asarray(vector, dtype=VECTOR_DTYPE)
+
+
+def decode_base64_vector(encoded: str) -> np.ndarray:
+    """
+    Decodes an embedding returned with ``encoding_format="base64"``.
+
+    Args:
+        encoded (str): Base64 of the embedding's little-endian float32 bytes.
+
+    Returns:
+        np.ndarray: A read-only float32 view over the decoded bytes.
+    """
+    return np.frombuffer(base64.b64decode(encoded), dtype=VECTOR_DTYPE)
+
+
+def rows_to_float32(rows: list) -> list[np.ndarray]:
+    """
+    Packs a batch of embeddings into one contiguous float32 matrix and returns its rows.
+
+    The rows are views into a single buffer, so a batch costs one allocation rather than one
+    per embedding.
+
+    Args:
+        rows (list): Embeddings of equal length, as lists of floats or arrays.
+
+    Returns:
+        list[np.ndarray]: One float32 view per embedding.
+    """
+    if not rows:
+        return []
+    return list(np.asarray(rows, dtype=VECTOR_DTYPE))
+
+
+def to_list(vector: VectorLike | None) -> list[float] | None:
+    """Converts an embedding to a list of floats for JSON responses."""
+    if vector is None or isinstance(vector, list):
+        return vector
+    return to_float32(vector).tolist()
+
+
+def as_vector(vector: VectorLike) -> np.ndarray:
+    """
+    Converts an embedding to an array, keeping quantised integer vectors as they are.
+
+    Args:
+        vector (np.ndarray | list[float] | bytes | str): The embedding. Integer arrays produced
+            by ``quantize_int8`` or ``quantize_binary`` are returned unchanged.
+
+    Returns:
+        np.ndarray: A one-dimensional float32 array, or the given integer array.
+    """
+    if isinstance(vector, np.ndarray) and vector.dtype.kind in "iu":
+        return vector
+    return to_float32(vector)
+
+
+def truncate_dimensions(vector: np.ndarray, dimensions: int) -> np.ndarray:
+    """
+    Keeps the leading ``dimensions`` components of a Matryoshka embedding and re-normalises it.
+
+    Args:
+        vector (np.ndarray): A float32 embedding.
+        dimensions (int): The number of leading components to keep.
+
+    Returns:
+        np.ndarray: A new float32 vector with an L2 norm of 1, or all zeros if the truncated
+        components are all zero.
+    """
+    truncated = np.array(vector[:dimensions], dtype=VECTOR_DTYPE)
+    norm = np.linalg.norm(truncated)
+    if norm > 0:
+        truncated /= norm
+    return truncated
+
+
+def quantize_int8(vector: np.ndarray) -> np.ndarray:
+    """
+    Scalar-quantises an embedding to int8 by scaling its largest component to 127.
+
+    The scale differs per vector, which leaves cosine similarity unchanged up to rounding, so
+    the result suits cosine indexes but not dot-product ones.
+
+    Args:
+        vector (np.ndarray): A float32 embedding.
+
+    Returns:
+        np.ndarray: An int8 vector of the same length.
+    """
+    max_abs = float(np.max(np.abs(vector))) if len(vector) else 0.0
+    if max_abs == 0:
+        return np.zeros(len(vector), dtype=np.int8)
+    return np.rint(np.asarray(vector) * (127.0 / max_abs)).astype(np.int8)
+
+
+def quantize_binary(vector: np.ndarray) -> np.ndarray:
+    """
+    Binary-quantises an embedding to one sign bit per component, packed eight to a byte.
+
+    Args:
+        vector (np.ndarray): A float32 embedding. Its length should be a multiple of 8.
+
+    Returns:
+        np.ndarray: An int8 vector of ``ceil(len(vector) / 8)`` packed bytes, the layout
+        Elasticsearch expects for ``bit`` vectors.
+    """
+    return np.packbits(np.asarray(vector) > 0).view(np.int8)
@@ -1,8 +1,10 @@
-from typing import Any
+from collections.abc import AsyncIterator, Iterator
+from typing import Any, Optional, Union
 
-from elasticsearch import Elasticsearch
-from pydantic import Extra, Field, validator
+from elasticsearch import AsyncElasticsearch, BadRequestError
+from pydantic import Extra, Field, PrivateAttr, validator
 
+from config import Config
 from src.Shared.Exceptions import (
     ElasticsearchConnectionException,
     ElasticsearchIndexInfoException,
@@ -11,10 +13,22 @@ from src.Shared.Exceptions import (
 )
 from src.Shared.RagSearch import RagSearchResult
 from src.Shared.RagSinkInfo import RagSinkInfo
+from src.Shared.RagVector import RagVector
+from src.Shared.vector_transform import TRANSFORM_METADATA_KEY
+from src.SinkConnectors.bulk_writer import BulkResult, BulkWriter, summarise_errors
+from src.SinkConnectors.client_registry import es_client_registry
+from src.SinkConnectors.document_export import DocumentExporter
+from src.SinkConnectors.filter_compiler import compile_filters
 from src.SinkConnectors.filter_utils import FilterCondition
+from src.SinkConnectors.hybrid_search import HybridQuery, reciprocal_rank_fusion
 from src.SinkConnectors.SinkConnector import SinkConnector
 from utils.platform_commons.logger import logger
 
+settings = Config()
+
+# Index settings a bulk load may change, with their values while it runs
+_BULK_LOAD_SETTINGS = {"index.refresh_interval": "-1", "index.number_of_replicas": 0}
+
 # Import your types for RagSearchResult and RagSinkInfo, FilterCondition, etc.
 
 
@@ -31,35 +45,255 @@ class ElasticsearchSink(SinkConnector):
         default_factory=lambda: ["hosts", "index"], description="List of required properties"
     )
     optional_properties: list[str] = Field(
-        default_factory=lambda: ["doc_type"], description="List of optional properties"
+        default_factory=lambda: [
+            "doc_type",
+            "bulk_max_actions",
+            "bulk_max_bytes",
+            "bulk_max_in_flight",
+            "bulk_max_retries",
+            "api_key",
+            "basic_auth",
+            "similarity",
+            "hnsw_m",
+            "hnsw_ef_construction",
+            "num_candidates",
+            "refresh_policy",
+            "bulk_load_drop_replicas",
+        ],
+        description="List of optional properties",
     )
 
     hosts: list[str] = Field(..., description="List of Elasticsearch hosts.")
     index: str = Field(..., description="Elasticsearch index to store data.")
     doc_type: str = Field("_doc", description="Elasticsearch document type. Defaults to '_doc'.")
+    bulk_max_actions: int = Field(
+        settings.elasticsearch_bulk_max_actions, description="Documents per _bulk request."
+    )
+    bulk_max_bytes: int = Field(
+        settings.elasticsearch_bulk_max_bytes, description="Bytes per _bulk request."
+    )
+    bulk_max_in_flight: int = Field(
+        settings.elasticsearch_bulk_max_in_flight,
+        description="_bulk requests sent at the same time.",
+    )
+    bulk_max_retries: int = Field(
+        settings.elasticsearch_bulk_max_retries,
+        description="Times documents rejected with a retryable status are resent.",
+    )
+    api_key: Optional[str] = Field(None, exclude=True, description="Elasticsearch API key.")
+    basic_auth: Optional[tuple[str, str]] = Field(
+        None, exclude=True, description="Elasticsearch username and password."
+    )
+    similarity: str = Field(
+        settings.elasticsearch_vector_similarity,
+        description="dense_vector similarity: cosine, dot_product, l2_norm or max_inner_product.",
+    )
+    hnsw_m: int = Field(settings.elasticsearch_hnsw_m, description="HNSW graph neighbours.")
+    hnsw_ef_construction: int = Field(
+        settings.elasticsearch_hnsw_ef_construction,
+        description="HNSW candidates considered while building the graph.",
+    )
+    num_candidates: int = Field(
+        settings.elasticsearch_knn_num_candidates,
+        description="Nearest neighbour candidates gathered per shard for a kNN search.",
+    )
+    refresh_policy: str = Field(
+        settings.elasticsearch_refresh_policy,
+        description="Refresh policy of incremental writes: wait_for, true or false.",
+    )
+    bulk_load_drop_replicas: bool = Field(
+        settings.elasticsearch_bulk_load_drop_replicas,
+        description="Whether full loads run without replicas until they end.",
+    )
     config: dict[str, Any] = Field(default_factory=dict)
 
+    _bulk_writer: BulkWriter = PrivateAttr()
+    # (dims, element_type) the pipeline declared for its vectors, used when creating the index
+    _declared_shape: Optional[tuple[int, str]] = PrivateAttr(default=None)
+    _index_ready: bool = PrivateAttr(default=False)
+    _bulk_loading: bool = PrivateAttr(default=False)
+
     class Config:
         extra = Extra.allow
         arbitrary_types_allowed = True
 
     def __init__(self, **data):
         super().__init__(**data)
-        self.es_client = Elasticsearch(self.hosts)
+        # Sinks on the same cluster share one client and its connection pool
+        self.es_client = es_client_registry.get_client(self.hosts, self.api_key, self.basic_auth)
+        self._bulk_writer = self._make_bulk_writer(self.es_client)
+
+    def _make_bulk_writer(self, client) -> BulkWriter:
+        return BulkWriter(
+            client,
+            self.index,
+            max_actions=self.bulk_max_actions,
+            max_bytes=self.bulk_max_bytes,
+            max_in_flight=self.bulk_max_in_flight,
+            max_retries=self.bulk_max_retries,
+            retry_backoff_s=settings.elasticsearch_bulk_retry_backoff_s,
+        )
+
+    @property
+    def async_es_client(self) -> AsyncElasticsearch:
+        """The shared async client for this sink's cluster on the running event loop."""
+        return es_client_registry.get_async_client(self.hosts, self.api_key, self.basic_auth)
 
-    def ensure_index_exists(self):
-        """Ensure the Elasticsearch index exists, create if missing."""
+    def configure_vectors(self, dimensions: int, element_type: str = "float"):
+        """Declares the shape of the vectors the pipeline will store, for the index mapping."""
+        self._declared_shape = (dimensions, element_type)
+
+    @staticmethod
+    def vector_shape(vector: RagVector) -> tuple[int, str]:
+        """
+        Returns the dense_vector dims and element type matching a stored vector.
+
+        Vectors that went through a ``VectorTransform`` carry their element type in their
+        metadata; packed bit vectors hold eight dimensions per byte.
+        """
+        transform = (vector.metadata or {}).get(TRANSFORM_METADATA_KEY) or {}
+        element_type = transform.get("element_type", "float")
+        dims = len(vector.vector) * (8 if element_type == "bit" else 1)
+        return dims, element_type
+
+    def index_mapping(self, dims: int, element_type: str = "float") -> dict[str, Any]:
+        """
+        Returns the mapping the sink creates its index with.
+
+        Args:
+            dims (int): The number of dimensions of the stored vectors.
+            element_type (str): ``float``, ``byte`` or ``bit``.
+
+        Returns:
+            dict: A mapping indexing ``vector`` as an HNSW ``dense_vector`` field and
+            metadata strings as keywords.
+        """
+        # Bit vectors are compared by hamming distance, which Elasticsearch exposes as l2_norm
+        similarity = "l2_norm" if element_type == "bit" else self.similarity
+        return {
+            # Metadata strings are filtered on exactly, by term, terms and wildcard clauses,
+            # so they are indexed as keywords rather than analysed text
+            "dynamic_templates": [
+                {
+                    "metadata_strings": {
+                        "path_match": "metadata.*",
+                        "match_mapping_type": "string",
+                        "mapping": {"type": "keyword", "ignore_above": 8191},
+                    }
+                }
+            ],
+            "properties": {
+                "vector": {
+                    "type": "dense_vector",
+                    "dims": dims,
+                    "element_type": element_type,
+                    "index": True,
+                    "similarity": similarity,
+                    "index_options": {
+                        "type": "hnsw",
+                        "m": self.hnsw_m,
+                        "ef_construction": self.hnsw_ef_construction,
+                    },
+                },
+                # Chunk text, for the lexical half of hybrid searches
+                "text": {"type": "text"},
+                "metadata": {"type": "object"},
+            },
+        }
+
+    def _create_mapping(
+        self, vectors: Optional[list[RagVector]] = None
+    ) -> Optional[dict[str, Any]]:
+        """Picks the mapping for a new index from the vectors about to be stored, falling back
+        to the shape the pipeline declared."""
+        shape = self.vector_shape(vectors[0]) if vectors else self._declared_shape
+        if shape is None:
+            logger.warning(
+                f"Creating index '{self.index}' without a vector mapping: vector shape unknown."
+            )
+            return None
+        if self._declared_shape and shape != self._declared_shape:
+            logger.warning(
+                f"Vectors for '{self.index}' have shape {shape}, not the declared "
+                f"{self._declared_shape}; mapping the index from the vectors."
+            )
+        return self.index_mapping(*shape)
+
+    def _check_mapping(self, mapping: dict[str, Any]):
+        """Warns when an existing index cannot serve kNN searches."""
+        for index_mapping in mapping.values():
+            vector_field = index_mapping.get("mappings", {}).get("properties", {}).get("vector")
+            if (vector_field or {}).get("type") != "dense_vector":
+                logger.warning(
+                    f"Index '{self.index}' does not map 'vector' as a dense_vector; kNN "
+                    "searches will fail until it is reindexed."
+                )
+
+    @staticmethod
+    def _already_exists(error: BadRequestError) -> bool:
+        # A concurrent writer created the index between the exists check and the create
+        return error.error == "resource_already_exists_exception"
+
+    def ensure_index_exists(self, vectors: Optional[list[RagVector]] = None):
+        """
+        Ensure the Elasticsearch index exists, creating it with a dense_vector mapping if
+        missing. The check is made once per sink.
+
+        Args:
+            vectors (list[RagVector] | None): Vectors about to be stored, to size the mapping.
+        """
+        if self._index_ready:
+            return
         try:
             if not self.es_client.indices.exists(index=self.index):
                 logger.warning(f"Index '{self.index}' not found. Creating index...")
-                self.es_client.indices.create(index=self.index)
-                logger.info(f"Index '{self.index}' created successfully.")
+                try:
+                    self.es_client.indices.create(
+                        index=self.index, mappings=self._create_mapping(vectors)
+                    )
+                    logger.info(f"Index '{self.index}' created successfully.")
+                except BadRequestError as e:
+                    if not self._already_exists(e):
+                        raise
             else:
                 logger.info(f"Index '{self.index}' already exists.")
+                self._check_mapping(self.es_client.indices.get_mapping(index=self.index))
+            self._index_ready = True
         except Exception as e:
             logger.error(f"Failed to check/create index: {e}")
             raise
 
+    async def aensure_index_exists(self, vectors: Optional[list[RagVector]] = None):
+        """Async counterpart of ``ensure_index_exists``."""
+        if self._index_ready:
+            return
+        try:
+            if not await self.async_es_client.indices.exists(index=self.index):
+                logger.warning(f"Index '{self.index}' not found. Creating index...")
+                try:
+                    await self.async_es_client.indices.create(
+                        index=self.index, mappings=self._create_mapping(vectors)
+                    )
+                    logger.info(f"Index '{self.index}' created successfully.")
+                except BadRequestError as e:
+                    if not self._already_exists(e):
+                        raise
+            else:
+                logger.info(f"Index '{self.index}' already exists.")
+                self._check_mapping(
+                    await self.async_es_client.indices.get_mapping(index=self.index)
+                )
+            self._index_ready = True
+        except Exception as e:
+            logger.error(f"Failed to check/create index: {e}")
+            raise
+
+    @validator("refresh_policy")
+    def validate_refresh_policy(cls, value):
+        if value not in ("wait_for", "true", "false"):
+            raise ValueError("refresh_policy must be one of: wait_for, true, false")
+        return value
+
     @validator("sink_name", pre=True, always=True)
     def validate_sink_name(cls, value):
         if not value:
@@ -73,8 +307,7 @@ class ElasticsearchSink(SinkConnector):
 
     def validation(self) -> bool:
         try:
-            es = Elasticsearch(self.hosts)
-            if not es.ping():
+            if not self.es_client.ping():
                 raise ElasticsearchConnectionException(
                     f"Could not connect to Elasticsearch at {self.hosts}."
                 )
@@ -84,90 +317,458 @@ class ElasticsearchSink(SinkConnector):
             )
         return True
 
-    def store(self, vectors_to_store: list[Any]) -> int:
+    def _check_bulk_result(self, result: BulkResult, total: int) -> int:
+        """Logs the documents a bulk write could not store and returns the written count."""
+        if result.errors:
+            logger.error(
+                f"Failed to store {len(result.errors)} of {total} vectors in "
+                f"'{self.index}': {summarise_errors(result.errors)}"
+            )
+            if not result.written:
+                raise ElasticsearchInsertionException(
+                    f"Failed to store vectors in Elasticsearch. "
+                    f"Errors: {summarise_errors(result.errors)}"
+                )
+        return result.written
+
+    def _store_refresh(self) -> str:
+        # Refreshes are suspended during a bulk load, so waiting for one would hang the write
+        return "false" if self._bulk_loading else self.refresh_policy
+
+    def begin_bulk_load(self) -> Optional[dict[str, Any]]:
+        """
+        Suspends periodic refreshes on the index for a full load, and drops its replicas
+        when ``bulk_load_drop_replicas`` is set, so segments are not built and copied while
+        the bulk of the documents is written. A missing index is created first from the
+        declared vector shape.
+
+        Returns:
+            dict | None: The previous values of the changed settings, for ``end_bulk_load``,
+            or None if the index could not be prepared.
+        """
         try:
+            if self._declared_shape is None and not self.es_client.indices.exists(index=self.index):
+                logger.warning(
+                    f"Vector shape for '{self.index}' unknown; loading it without suspending "
+                    "refreshes."
+                )
+                return None
             self.ensure_index_exists()
-            vectors_stored = 0
-            for vector in vectors_to_store:
-                doc = {"vector": vector.vector, "metadata": vector.metadata}
-                response = self.es_client.index(index=self.index, id=vector.id, document=doc)
-                if response.get("result") in ["created", "updated"]:
-                    vectors_stored += 1
+            current = self._index_settings()
+            suspended = {
+                name: value
+                for name, value in _BULK_LOAD_SETTINGS.items()
+                if name != "index.number_of_replicas" or self.bulk_load_drop_replicas
+            }
+            # None resets a setting that was not set on the index to its default
+            previous = {name: current.get(name) for name in suspended}
+            self.es_client.indices.put_settings(index=self.index, settings=suspended)
+        except Exception as e:
+            logger.error(f"Failed to prepare '{self.index}' for a bulk load: {e}")
+            return None
+        self._bulk_loading = True
+        logger.info(f"Bulk load of '{self.index}' started with settings {suspended}.")
+        return previous
+
+    def _index_settings(self) -> dict[str, Any]:
+        response = self.es_client.indices.get_settings(index=self.index, flat_settings=True)
+        return next(iter(response.values()))["settings"]
+
+    def resume_bulk_load(self, state: Optional[dict[str, Any]]):
+        """Stops this sink's writes from waiting for refreshes while a load is in progress."""
+        self._bulk_loading = state is not None
+
+    def end_bulk_load(self, state: Optional[dict[str, Any]]):
+        """
+        Ends a full load: refreshes the index, force-merges it down to
+        ``elasticsearch_bulk_load_max_segments`` segments so searches walk fewer HNSW
+        graphs, and restores the settings ``begin_bulk_load`` changed. The settings are
+        restored even if the refresh or the merge fails. A load whose settings were already
+        restored, e.g. by the worker that wrote it before a failure handler ends it again,
+        is left alone rather than refreshed and merged a second time. When the index had
+        the suspended settings before the load, an ended load cannot be told apart from a
+        running one, and ending it again only repeats the refresh and the merge.
+
+        Args:
+            state (dict | None): What ``begin_bulk_load`` returned.
+        """
+        self._bulk_loading = False
+        if state is None:
+            return
+        try:
+            # Ending a load restores its settings, so a load ended already no longer has
+            # the suspended values
+            current = self._index_settings()
+            if any(str(current.get(name)) != str(_BULK_LOAD_SETTINGS[name]) for name in state):
+                logger.info(f"Bulk load of '{self.index}' was already ended.")
+                return
+        except Exception as e:
+            logger.warning(f"Could not check whether '{self.index}' is still bulk loading: {e}")
+        try:
             self.es_client.indices.refresh(index=self.index)
+            if settings.elasticsearch_bulk_load_max_segments > 0:
+                # Merging a large index takes far longer than an ordinary request
+                self.es_client.options(
+                    request_timeout=settings.elasticsearch_force_merge_timeout_s
+                ).indices.forcemerge(
+                    index=self.index,
+                    max_num_segments=settings.elasticsearch_bulk_load_max_segments,
+                )
+        except Exception as e:
+            logger.error(f"Failed to refresh and force-merge '{self.index}': {e}")
+        finally:
+            self.es_client.indices.put_settings(index=self.index, settings=state)
+            logger.info(f"Bulk load of '{self.index}' ended; settings restored to {state}.")
+
+    def store(self, vectors_to_store: list[RagVector]) -> int:
+        """
+        Indexes the vectors with the ``_bulk`` API.
+
+        Documents Elasticsearch rejects are logged and left out of the returned count, so
+        a partially failed batch does not fail the ones that were written. The requests use
+        the sink's ``refresh_policy``, or no refresh at all during a bulk load.
+
+        Args:
+            vectors_to_store (list[RagVector]): The vectors to index.
+
+        Returns:
+            int: The number of vectors Elasticsearch acknowledged.
+
+        Raises:
+            ElasticsearchInsertionException: If the request fails or no vector was written.
+        """
+        if not vectors_to_store:
+            return 0
+        try:
+            self.ensure_index_exists(vectors_to_store)
+            result = self._bulk_writer.write(vectors_to_store, refresh=self._store_refresh())
         except Exception as e:
             raise ElasticsearchInsertionException(
                 f"Failed to store vectors in Elasticsearch. Exception: {e}"
             )
-        return vectors_stored
+        return self._check_bulk_result(result, len(vectors_to_store))
 
-    def get_documents(self, size: int = 10) -> list[RagSearchResult]:
+    async def astore(self, vectors_to_store: list[RagVector]) -> int:
+        """Async counterpart of ``store``, indexing without blocking the event loop."""
+        if not vectors_to_store:
+            return 0
+        try:
+            await self.aensure_index_exists(vectors_to_store)
+            result = await self._make_bulk_writer(self.async_es_client).awrite(
+                vectors_to_store, refresh=self._store_refresh()
+            )
+        except Exception as e:
+            raise ElasticsearchInsertionException(
+                f"Failed to store vectors in Elasticsearch. Exception: {e}"
+            )
+        return self._check_bulk_result(result, len(vectors_to_store))
+
+    @staticmethod
+    def _to_result(hit: dict[str, Any], score: Optional[float]) -> RagSearchResult:
+        return RagSearchResult(
+            id=hit["_id"],
+            metadata=hit["_source"].get("metadata", {}),
+            score=score,
+            vector=hit["_source"].get("vector"),
+            text=hit["_source"].get("text"),
+        )
+
+    def _to_results(self, response: dict[str, Any]) -> list[RagSearchResult]:
+        results = []
+        for hit in response["hits"]["hits"]:
+            try:
+                results.append(self._to_result(hit, hit["_score"]))
+            except Exception as e:
+                logger.error(f"Failed to parse search result: {e}, hit: {hit}")
+        return results
+
+    @staticmethod
+    def source_filter(
+        include_vectors: bool = False, fields: Optional[list[str]] = None
+    ) -> Union[bool, dict[str, list[str]]]:
+        """
+        Returns the ``_source`` filter of a search.
+
+        Vectors make up most of every document, so they are left out of hits unless
+        ``include_vectors`` is set. ``fields`` narrows the source further to the listed
+        fields, such as ``text`` or ``metadata.title``.
+        """
+        if not fields:
+            return True if include_vectors else {"excludes": ["vector"]}
+        includes = list(fields)
+        if include_vectors and "vector" not in includes:
+            includes.append("vector")
+        return {"includes": includes}
+
+    def get_documents(
+        self, size: int = 10, include_vectors: bool = False, fields: Optional[list[str]] = None
+    ) -> list[RagSearchResult]:
         """
         Retrieve documents stored in the Elasticsearch index using a match_all query.
 
         Args:
             size (int): Number of documents to retrieve.
+            include_vectors (bool): Whether to return the stored vectors.
+            fields (list[str] | None): Source fields to return; all but the vector if None.
 
         Returns:
             List[RagSearchResult]: A list of search results.
         """
         try:
-            query_body = {"size": size, "query": {"match_all": {}}}
+            query_body = {
+                "size": size,
+                "query": {"match_all": {}},
+                "_source": self.source_filter(include_vectors, fields),
+            }
             response = self.es_client.search(index=self.index, body=query_body)
-            results = []
-            for hit in response["hits"]["hits"]:
-                result = RagSearchResult(
-                    id=hit["_id"],
-                    metadata=hit["_source"].get("metadata", {}),
-                    score=hit["_score"],
-                    vector=hit["_source"].get("vector"),
-                )
-                results.append(result)
-            return results
+            return self._to_results(response)
         except Exception as e:
             logger.error(f"Failed to retrieve documents: {e}", exc_info=True)
             raise ElasticsearchQueryException(f"Failed to query Elasticsearch. Exception: {e}")
 
+    def _exporter(
+        self,
+        client,
+        page_size: Optional[int],
+        slices: Optional[int],
+        include_vectors: bool,
+        fields: Optional[list[str]],
+    ) -> DocumentExporter:
+        return DocumentExporter(
+            client,
+            self.index,
+            page_size=page_size or settings.elasticsearch_export_page_size,
+            slices=slices or settings.elasticsearch_export_slices,
+            keep_alive=settings.elasticsearch_export_keep_alive,
+            source=self.source_filter(include_vectors, fields),
+        )
+
+    def export_documents(
+        self,
+        page_size: Optional[int] = None,
+        slices: Optional[int] = None,
+        include_vectors: bool = False,
+        fields: Optional[list[str]] = None,
+    ) -> Iterator[RagSearchResult]:
+        """
+        Streams every document of the index, for dumps and migrations of any size.
+
+        Unlike ``get_documents``, the export is not capped at 10,000 hits and holds only a
+        few pages in memory: it pages through a point in time with ``search_after``,
+        reading ``slices`` slices of it in parallel. Documents come in no particular order.
+
+        Args:
+            page_size (int | None): Hits per page. Defaults to
+                ``elasticsearch_export_page_size``.
+            slices (int | None): Slices read in parallel. Defaults to
+                ``elasticsearch_export_slices``.
+            include_vectors (bool): Whether to return the stored vectors.
+            fields (list[str] | None): Source fields to return; all but the vector if None.
+
+        Yields:
+            RagSearchResult: The documents, without a score.
+
+        Raises:
+            ElasticsearchQueryException: If a page cannot be read.
+        """
+        exporter = self._exporter(self.es_client, page_size, slices, include_vectors, fields)
+        pages = exporter.pages()
+        try:
+            for page in pages:
+                for hit in page:
+                    yield self._to_result(hit, None)
+        except Exception as e:
+            raise ElasticsearchQueryException(f"Failed to export documents. Exception: {e}")
+        finally:
+            # Stops the readers and closes the point in time when the consumer stops early
+            pages.close()
+
+    async def aexport_documents(
+        self,
+        page_size: Optional[int] = None,
+        slices: Optional[int] = None,
+        include_vectors: bool = False,
+        fields: Optional[list[str]] = None,
+    ) -> AsyncIterator[RagSearchResult]:
+        """Async counterpart of ``export_documents``."""
+        exporter = self._exporter(self.async_es_client, page_size, slices, include_vectors, fields)
+        pages = exporter.apages()
+        try:
+            async for page in pages:
+                for hit in page:
+                    yield self._to_result(hit, None)
+        except Exception as e:
+            raise ElasticsearchQueryException(f"Failed to export documents. Exception: {e}")
+        finally:
+            await pages.aclose()
+
+    def _search_body(
+        self,
+        vector: list[float],
+        number_of_results: int,
+        filters: list[FilterCondition],
+        num_candidates: Optional[int] = None,
+        source: Union[bool, dict[str, list[str]], None] = None,
+    ) -> dict[str, Any]:
+        filter_query = compile_filters(filters)
+        # Elasticsearch needs at least k candidates and accepts at most 10,000
+        candidates = min(max(num_candidates or self.num_candidates, number_of_results), 10_000)
+        knn: dict[str, Any] = {
+            "field": "vector",
+            "query_vector": vector,
+            "k": number_of_results,
+            "num_candidates": candidates,
+        }
+        if filter_query:
+            # Applied while the HNSW graph is searched, so k filtered hits still come back
+            knn["filter"] = filter_query
+        return {
+            "size": number_of_results,
+            "knn": knn,
+            "_source": self.source_filter() if source is None else source,
+        }
+
+    def _text_search_body(
+        self,
+        text: str,
+        number_of_results: int,
+        filters: list[FilterCondition],
+        source: Union[bool, dict[str, list[str]], None] = None,
+    ) -> dict[str, Any]:
+        query: dict[str, Any] = {"bool": {"must": [{"match": {"text": text}}]}}
+        filter_query = compile_filters(filters)
+        if filter_query:
+            query["bool"]["filter"] = [filter_query]
+        return {
+            "size": number_of_results,
+            "query": query,
+            "_source": self.source_filter() if source is None else source,
+        }
+
+    def _hybrid_searches(
+        self,
+        vector: list[float],
+        filters: list[FilterCondition],
+        num_candidates: Optional[int],
+        hybrid: HybridQuery,
+        source: Union[bool, dict[str, list[str]], None] = None,
+    ) -> list[dict[str, Any]]:
+        """Header and body pairs of the kNN and BM25 searches, for one ``_msearch`` request."""
+        window = hybrid.rank_window_size
+        return [
+            {},
+            self._search_body(vector, window, filters, num_candidates, source),
+            {},
+            self._text_search_body(hybrid.text, window, filters, source),
+        ]
+
+    def _fuse(
+        self, response: dict[str, Any], hybrid: HybridQuery, number_of_results: int
+    ) -> list[RagSearchResult]:
+        rankings = []
+        for search_response in response["responses"]:
+            if "error" in search_response:
+                raise ElasticsearchQueryException(
+                    f"Hybrid search failed: {search_response['error']}"
+                )
+            rankings.append(search_response["hits"]["hits"])
+        fused = reciprocal_rank_fusion(
+            rankings,
+            weights=[hybrid.knn_weight, hybrid.text_weight],
+            rank_constant=hybrid.rank_constant,
+            size=number_of_results,
+        )
+        return [self._to_result(hit, score) for hit, score in fused]
+
     def search(
-        self, vector: list[float], number_of_results: int, filters: list[FilterCondition] = []
+        self,
+        vector: list[float],
+        number_of_results: int,
+        filters: list[FilterCondition] = [],
+        num_candidates: Optional[int] = None,
+        hybrid: Optional[HybridQuery] = None,
+        include_vectors: bool = False,
+        fields: Optional[list[str]] = None,
     ) -> list[RagSearchResult]:
+        """
+        Finds the stored vectors nearest to ``vector`` with an approximate kNN search.
+
+        With ``hybrid``, a BM25 match on the chunk text is sent in the same ``_msearch``
+        request and the two rankings are combined with weighted reciprocal rank fusion, so
+        exact identifiers missed by the vectors and paraphrases missed by the keywords are
+        both found.
+
+        Args:
+            vector (list[float]): The query vector, transformed like the stored vectors.
+            number_of_results (int): The number of results to return.
+            filters (list[FilterCondition]): Conditions results must match, applied as a kNN
+                pre-filter.
+            num_candidates (int | None): Candidates gathered per shard; more is slower but
+                more accurate. Defaults to the sink's ``num_candidates``.
+            hybrid (HybridQuery | None): The query text and fusion settings of a hybrid
+                search.
+            include_vectors (bool): Whether to return the stored vectors, which are left
+                out of hits by default.
+            fields (list[str] | None): Source fields to return; all but the vector if None.
+
+        Returns:
+            list[RagSearchResult]: The best matches, most relevant first. Hybrid results are
+            scored by their fused RRF score.
+        """
         try:
-            es = Elasticsearch(self.hosts)
-            must_clauses = []
-            for condition in filters:
-                if condition.operator.value == "=":
-                    must_clauses.append({"term": {condition.field: condition.value}})
-                elif condition.operator.value in [">", ">=", "<", "<="]:
-                    range_operator = {" >": "gt", ">=": "gte", "<": "lt", "<=": "lte"}[
-                        condition.operator.value
-                    ]
-                    must_clauses.append(
-                        {"range": {condition.field: {range_operator: str(condition.value)}}}
-                    )
-                else:
-                    must_clauses.append({"match": {condition.field: condition.value}})
-            query_body = {"size": number_of_results, "query": {"bool": {"must": must_clauses}}}
-            response = es.search(index=self.index, body=query_body)
-            results = []
-            for hit in response["hits"]["hits"]:
-                try:
-                    result = RagSearchResult(
-                        id=hit["_id"],
-                        metadata=hit["_source"].get("metadata", {}),
-                        score=hit["_score"],
-                        vector=hit["_source"].get("vector"),
-                    )
-                    results.append(result)
-                except Exception as e:
-                    logger.error(f"Failed to parse search result: {e}, hit: {hit}")
+            source = self.source_filter(include_vectors, fields)
+            if hybrid is not None:
+                searches = self._hybrid_searches(vector, filters, num_candidates, hybrid, source)
+                response = self.es_client.msearch(index=self.index, searches=searches)
+                return self._fuse(response, hybrid, number_of_results)
+            query_body = self._search_body(
+                vector, number_of_results, filters, num_candidates, source
+            )
+            response = self.es_client.search(index=self.index, body=query_body)
+            return self._to_results(response)
+        except Exception as e:
+            raise ElasticsearchQueryException(f"Failed to query Elasticsearch. Exception: {e}")
+
+    async def asearch(
+        self,
+        vector: list[float],
+        number_of_results: int,
+        filters: list[FilterCondition] = [],
+        num_candidates: Optional[int] = None,
+        hybrid: Optional[HybridQuery] = None,
+        include_vectors: bool = False,
+        fields: Optional[list[str]] = None,
+    ) -> list[RagSearchResult]:
+        """Async counterpart of ``search``, so request handlers do not block the event loop."""
+        try:
+            source = self.source_filter(include_vectors, fields)
+            if hybrid is not None:
+                searches = self._hybrid_searches(vector, filters, num_candidates, hybrid, source)
+                response = await self.async_es_client.msearch(index=self.index, searches=searches)
+                return self._fuse(response, hybrid, number_of_results)
+            query_body = self._search_body(
+                vector, number_of_results, filters, num_candidates, source
+            )
+            response = await self.async_es_client.search(index=self.index, body=query_body)
+            return self._to_results(response)
         except Exception as e:
             raise ElasticsearchQueryException(f"Failed to query Elasticsearch. Exception: {e}")
-        return results
 
     def delete_vectors_with_file_id(self, file_id: str) -> bool:
         try:
-            es = Elasticsearch(self.hosts)
             query = {"query": {"term": {"metadata._file_entry_id": file_id}}}
-            response = es.delete_by_query(index=self.index, body=query)
+            response = self.es_client.delete_by_query(index=self.index, body=query)
+            return response.get("deleted", 0) > 0
+        except Exception as e:
+            raise ElasticsearchConnectionException(
+                f"Failed to delete vectors by file id. Exception: {e}"
+            )
+
+    async def adelete_vectors_with_file_id(self, file_id: str) -> bool:
+        """Async counterpart of ``delete_vectors_with_file_id``."""
+        try:
+            query = {"query": {"term": {"metadata._file_entry_id": file_id}}}
+            response = await self.async_es_client.delete_by_query(index=self.index, body=query)
             return response.get("deleted", 0) > 0
         except Exception as e:
             raise ElasticsearchConnectionException(
@@ -176,8 +777,7 @@ class ElasticsearchSink(SinkConnector):
 
     def info(self) -> RagSinkInfo:
         try:
-            es = Elasticsearch(self.hosts)
-            stats = es.indices.stats(index=self.index)
+            stats = self.es_client.indices.stats(index=self.index)
             doc_count = stats["_all"]["primaries"]["docs"]["count"]
             return RagSinkInfo(number_vectors_stored=doc_count)
         except Exception as e:
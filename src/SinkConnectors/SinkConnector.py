@@ -1,5 +1,9 @@
+import asyncio
 import json
 from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator, Iterator
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, Optional
 
 from pydantic import BaseModel
 
@@ -31,7 +35,7 @@ class SinkConnector(ABC, BaseModel):
 
     @abstractmethod
     def store(self, vectors_to_store: list[RagVector]) -> int:
-        """Store vectors with a given service"""
+        """Store vectors with a given service. Vectors arrive as packed float32 arrays."""
 
     @abstractmethod
     def get_documents(self, size: int) -> list[RagSearchResult]:
@@ -51,6 +55,64 @@ class SinkConnector(ABC, BaseModel):
     def info(self) -> RagSinkInfo:
         """Get information about what is stores in the sink"""
 
+    def configure_vectors(self, dimensions: int, element_type: str = "float"):
+        """Declares the shape of the vectors the pipeline will store. Sinks that need it to
+        create their collection or index override this."""
+
+    # Full loads. Sinks whose backend indexes faster with some features suspended, such as
+    # periodic refreshes, override these; a load may begin and end in different workers, so
+    # the state needed to undo the preparation is returned and handed back explicitly.
+
+    def begin_bulk_load(self) -> Optional[dict[str, Any]]:
+        """Prepares the sink for a full load. Returns the JSON serialisable state
+        ``end_bulk_load`` needs to undo it, or None when there is nothing to undo."""
+        return None
+
+    def resume_bulk_load(self, state: Optional[dict[str, Any]]):
+        """Tells this sink instance a load begun elsewhere is in progress."""
+
+    def end_bulk_load(self, state: Optional[dict[str, Any]]):
+        """Undoes ``begin_bulk_load`` and makes the loaded data searchable."""
+
+    @contextmanager
+    def bulk_load(self) -> Iterator[Optional[dict[str, Any]]]:
+        """Runs a full load in one process, ending it even if the load fails."""
+        state = self.begin_bulk_load()
+        try:
+            yield state
+        finally:
+            self.end_bulk_load(state)
+
+    @asynccontextmanager
+    async def abulk_load(self) -> AsyncIterator[Optional[dict[str, Any]]]:
+        """Async counterpart of ``bulk_load``."""
+        state = await asyncio.to_thread(self.begin_bulk_load)
+        try:
+            yield state
+        finally:
+            await asyncio.to_thread(self.end_bulk_load, state)
+
+    # Async counterparts of the methods above. Sinks with an async client override them;
+    # the defaults run the sync method in a worker thread so the event loop is not blocked.
+
+    async def astore(self, vectors_to_store: list[RagVector]) -> int:
+        """Store vectors with a given service without blocking the event loop"""
+        return await asyncio.to_thread(self.store, vectors_to_store)
+
+    async def asearch(
+        self,
+        vector: list[float],
+        number_of_results: int,
+        filters: list[FilterCondition] = [],
+        **options,
+    ) -> list[RagSearchResult]:
+        """Search vectors for a given service without blocking the event loop"""
+        return await asyncio.to_thread(self.search, vector, number_of_results, filters, **options)
+
+    async def adelete_vectors_with_file_id(self, file_id: str) -> bool:
+        """Deletes vectors for a specific file id without blocking the event loop"""
+        return await asyncio.to_thread(self.delete_vectors_with_file_id, file_id)
+
     def as_json(self):
         """Python does not have built-in serialization.
         We need this logic to be able to respond in our API..
@@ -0,0 +1,263 @@
+import asyncio
+import time
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Optional, Union
+
+from elasticsearch import ApiError, AsyncElasticsearch, Elasticsearch, TransportError
+from elasticsearch.serializer import OrjsonSerializer
+
+from src.Shared.RagVector import RagVector
+from utils.platform_commons.logger import logger
+
+# Item and request statuses worth sending again: rejected by a full write queue or a
+# node that is briefly unavailable
+RETRYABLE_STATUSES = frozenset({429, 502, 503, 504})
+
+
+@dataclass
+class BulkItemError:
+    """A document Elasticsearch did not write."""
+
+    id: str
+    status: int
+    error: Any
+
+
+@dataclass
+class BulkResult:
+    """Outcome of writing a batch of documents with the ``_bulk`` API."""
+
+    written: int = 0
+    requests: int = 0
+    retried_items: int = 0
+    errors: list[BulkItemError] = field(default_factory=list)
+
+    def merge(self, other: "BulkResult"):
+        self.written += other.written
+        self.requests += other.requests
+        self.retried_items += other.retried_items
+        self.errors.extend(other.errors)
+
+
+@dataclass
+class _Operation:
+    id: str
+    payload: bytes
+
+
+class BulkWriter:
+    """
+    Writes vectors to an index through the ``_bulk`` API.
+
+    Documents are serialised once, as NDJSON, and packed into requests of at most
+    ``max_actions`` documents and ``max_bytes`` bytes; a document larger than ``max_bytes``
+    is sent on its own. Up to ``max_in_flight`` requests run at the same time.
+
+    Elasticsearch reports the outcome of every document separately, so a request can
+    partially fail. Only the documents that failed with a retryable status (429 or a 5xx
+    gateway error) are sent again, with exponential backoff, up to ``max_retries`` times;
+    whole requests that fail the same way are retried likewise. Everything else is collected
+    as a ``BulkItemError`` and the written count only covers documents Elasticsearch
+    acknowledged.
+
+    ``write`` sends the requests from a thread pool with a sync client; ``awrite`` does the
+    same on the event loop with an ``AsyncElasticsearch`` client. Both take the ``refresh``
+    policy of the requests: ``"wait_for"`` returns once the documents are searchable, while
+    ``"false"`` or ``None`` leaves them to the index's own refresh.
+    """
+
+    def __init__(
+        self,
+        client: Union[Elasticsearch, AsyncElasticsearch],
+        index: str,
+        max_actions: int = 500,
+        max_bytes: int = 10 * 1024 * 1024,
+        max_in_flight: int = 2,
+        max_retries: int = 3,
+        retry_backoff_s: float = 0.5,
+    ):
+        if max_actions < 1 or max_bytes < 1 or max_in_flight < 1:
+            raise ValueError("max_actions, max_bytes and max_in_flight must be positive")
+        self.client = client
+        self.index = index
+        self.max_actions = max_actions
+        self.max_bytes = max_bytes
+        self.max_in_flight = max_in_flight
+        self.max_retries = max_retries
+        self.retry_backoff_s = retry_backoff_s
+        # orjson writes float32 and int8 numpy vectors directly, without converting them to lists
+        self.serializer = OrjsonSerializer()
+
+    def encode(self, vector: RagVector) -> _Operation:
+        """Serialises a vector into its NDJSON action and source lines."""
+        action = self.serializer.dumps({"index": {"_index": self.index, "_id": vector.id}})
+        document = {"vector": vector.vector, "metadata": vector.metadata}
+        if vector.text is not None:
+            document["text"] = vector.text
+        source = self.serializer.dumps(document)
+        return _Operation(id=vector.id, payload=action + b"\n" + source + b"\n")
+
+    def chunk(self, operations: list[_Operation]) -> Iterator[list[_Operation]]:
+        """Packs operations into requests within the action and byte limits."""
+        batch: list[_Operation] = []
+        batch_bytes = 0
+        for operation in operations:
+            size = len(operation.payload)
+            if batch and (len(batch) >= self.max_actions or batch_bytes + size > self.max_bytes):
+                yield batch
+                batch, batch_bytes = [], 0
+            batch.append(operation)
+            batch_bytes += size
+        if batch:
+            yield batch
+
+    def _backoff_s(self, attempt: int) -> float:
+        return self.retry_backoff_s * (2**attempt)
+
+    def _request_failed(
+        self, pending: list[_Operation], error: Exception, last_attempt: bool, result: BulkResult
+    ) -> bool:
+        """Records a request that failed as a whole. Returns whether to send it again."""
+        status = error.status_code if isinstance(error, ApiError) else 503
+        if status not in RETRYABLE_STATUSES or last_attempt:
+            result.errors.extend(
+                BulkItemError(id=operation.id, status=status, error=str(error))
+                for operation in pending
+            )
+            return False
+        logger.warning(f"Bulk request of {len(pending)} documents failed ({error}), retrying")
+        result.retried_items += len(pending)
+        return True
+
+    def _collect(
+        self,
+        pending: list[_Operation],
+        response: dict[str, Any],
+        last_attempt: bool,
+        result: BulkResult,
+    ) -> list[_Operation]:
+        """Records the per-item outcomes of a response. Returns the operations to resend."""
+        retry = []
+        # Items come back in the order their actions were sent
+        for operation, item in zip(pending, response["items"]):
+            outcome = next(iter(item.values()))
+            status = outcome.get("status", 500)
+            if 200 <= status < 300:
+                result.written += 1
+            elif status in RETRYABLE_STATUSES and not last_attempt:
+                retry.append(operation)
+            else:
+                result.errors.append(
+                    BulkItemError(id=operation.id, status=status, error=outcome.get("error"))
+                )
+        result.retried_items += len(retry)
+        return retry
+
+    @staticmethod
+    def _bulk_options(refresh: Optional[str]) -> dict[str, Any]:
+        return {"refresh": refresh} if refresh not in (None, "false") else {}
+
+    def _send(self, operations: list[_Operation], refresh: Optional[str] = None) -> BulkResult:
+        """Sends one request, then resends the retryable failures until none are left."""
+        result = BulkResult()
+        pending = operations
+        options = self._bulk_options(refresh)
+        for attempt in range(self.max_retries + 1):
+            last_attempt = attempt == self.max_retries
+            result.requests += 1
+            try:
+                response = self.client.bulk(
+                    operations=[operation.payload for operation in pending], **options
+                )
+            except (ApiError, TransportError) as e:
+                if not self._request_failed(pending, e, last_attempt, result):
+                    return result
+            else:
+                pending = self._collect(pending, response, last_attempt, result)
+                if not pending:
+                    return result
+            time.sleep(self._backoff_s(attempt))
+        return result
+
+    def write(self, vectors: list[RagVector], refresh: Optional[str] = None) -> BulkResult:
+        """
+        Writes the vectors to the index.
+
+        Args:
+            vectors (list[RagVector]): The vectors to index, one document each.
+            refresh (str | None): The refresh policy of the requests.
+
+        Returns:
+            BulkResult: How many documents were written, how many requests that took, and
+            the documents that could not be written.
+        """
+        result = BulkResult()
+        batches = list(self.chunk([self.encode(vector) for vector in vectors]))
+        if len(batches) <= 1 or self.max_in_flight == 1:
+            for batch in batches:
+                result.merge(self._send(batch, refresh))
+            return result
+        # The client's connection pool is thread safe, so requests can overlap
+        with ThreadPoolExecutor(max_workers=min(self.max_in_flight, len(batches))) as executor:
+            for batch_result in executor.map(lambda batch: self._send(batch, refresh), batches):
+                result.merge(batch_result)
+        return result
+
+    async def _asend(
+        self, operations: list[_Operation], refresh: Optional[str] = None
+    ) -> BulkResult:
+        """Async counterpart of ``_send``, for an ``AsyncElasticsearch`` client."""
+        result = BulkResult()
+        pending = operations
+        options = self._bulk_options(refresh)
+        for attempt in range(self.max_retries + 1):
+            last_attempt = attempt == self.max_retries
+            result.requests += 1
+            try:
+                response = await self.client.bulk(
+                    operations=[operation.payload for operation in pending], **options
+                )
+            except (ApiError, TransportError) as e:
+                if not self._request_failed(pending, e, last_attempt, result):
+                    return result
+            else:
+                pending = self._collect(pending, response, last_attempt, result)
+                if not pending:
+                    return result
+            await asyncio.sleep(self._backoff_s(attempt))
+        return result
+
+    async def awrite(self, vectors: list[RagVector], refresh: Optional[str] = None) -> BulkResult:
+        """
+        Async counterpart of ``write``. The writer's client must be an ``AsyncElasticsearch``.
+
+        Args:
+            vectors (list[RagVector]): The vectors to index, one document each.
+            refresh (str | None): The refresh policy of the requests.
+
+        Returns:
+            BulkResult: How many documents were written, how many requests that took, and
+            the documents that could not be written.
+        """
+        semaphore = asyncio.Semaphore(self.max_in_flight)
+
+        async def send(batch: list[_Operation]) -> BulkResult:
+            async with semaphore:
+                return await self._asend(batch, refresh)
+
+        result = BulkResult()
+        batches = self.chunk([self.encode(vector) for vector in vectors])
+        for batch_result in await asyncio.gather(*(send(batch) for batch in batches)):
+            result.merge(batch_result)
+        return result
+
+
+def summarise_errors(errors: list[BulkItemError], limit: int = 5) -> Optional[str]:
+    """Returns a short description of the first few item errors, for logging."""
+    if not errors:
+        return None
+    shown = "; ".join(f"{error.id} ({error.status}): {error.error}" for error in errors[:limit])
+    more = f" and {len(errors) - limit} more" if len(errors) > limit else ""
+    return shown + more
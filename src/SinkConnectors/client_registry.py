@@ -0,0 +1,170 @@
+import asyncio
+import hashlib
+import json
+import threading
+from typing import Any, Optional
+
+from elasticsearch import AsyncElasticsearch, Elasticsearch
+from elasticsearch.serializer import OrjsonSerializer
+
+from config import Config
+from utils.platform_commons.logger import logger
+
+settings = Config()
+
+
+class ElasticsearchClientRegistry:
+    """Process-wide registry of Elasticsearch clients keyed by cluster and credentials.
+
+    Every sink pointing at the same hosts with the same credentials shares one sync client
+    and, per event loop, one async client, so searches, deletes and stats calls reuse warm
+    connection pools instead of opening new connections. Async clients are bound to the
+    event loop that created them; one requested from a different loop is replaced.
+    """
+
+    def __init__(self, connections_per_node: int, request_timeout: float):
+        self.connections_per_node = connections_per_node
+        self.request_timeout = request_timeout
+        self._clients: dict[str, Elasticsearch] = {}
+        self._async_clients: dict[str, tuple[AsyncElasticsearch, asyncio.AbstractEventLoop]] = {}
+        self._hosts: dict[str, list[str]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def client_key(
+        hosts: list[str], api_key: Optional[str] = None, basic_auth: Optional[tuple] = None
+    ) -> str:
+        """Returns the fingerprint clients are shared by. Credentials are hashed, never kept."""
+        material = json.dumps(
+            {"hosts": sorted(hosts), "api_key": api_key, "basic_auth": basic_auth},
+            default=list,
+        )
+        return hashlib.sha256(material.encode()).hexdigest()[:16]
+
+    def _client_kwargs(self, api_key: Optional[str], basic_auth: Optional[tuple]) -> dict:
+        kwargs: dict[str, Any] = {
+            # orjson writes float32 numpy vectors directly, without converting them to lists
+            "serializer": OrjsonSerializer(),
+            "connections_per_node": self.connections_per_node,
+            "request_timeout": self.request_timeout,
+        }
+        if api_key:
+            kwargs["api_key"] = api_key
+        if basic_auth:
+            kwargs["basic_auth"] = tuple(basic_auth)
+        return kwargs
+
+    def get_client(
+        self, hosts: list[str], api_key: Optional[str] = None, basic_auth: Optional[tuple] = None
+    ) -> Elasticsearch:
+        """
+        Returns the shared sync client for a cluster, creating it on first use.
+
+        Args:
+            hosts (list[str]): The cluster's node URLs.
+            api_key (str | None): API key credentials, if the cluster needs them.
+            basic_auth (tuple | None): Username and password, if the cluster needs them.
+
+        Returns:
+            Elasticsearch: A client with a pooled, thread safe transport.
+        """
+        key = self.client_key(hosts, api_key, basic_auth)
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                client = Elasticsearch(hosts, **self._client_kwargs(api_key, basic_auth))
+                self._clients[key] = client
+                self._hosts[key] = list(hosts)
+                logger.info(f"Created shared Elasticsearch client for {hosts}")
+            return client
+
+    def get_async_client(
+        self, hosts: list[str], api_key: Optional[str] = None, basic_auth: Optional[tuple] = None
+    ) -> AsyncElasticsearch:
+        """
+        Returns the shared async client for a cluster on the running event loop.
+
+        Args:
+            hosts (list[str]): The cluster's node URLs.
+            api_key (str | None): API key credentials, if the cluster needs them.
+            basic_auth (tuple | None): Username and password, if the cluster needs them.
+
+        Returns:
+            AsyncElasticsearch: A pooled client bound to the running event loop.
+        """
+        key = self.client_key(hosts, api_key, basic_auth)
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            entry = self._async_clients.get(key)
+            if entry is not None:
+                client, client_loop = entry
+                if client_loop is loop:
+                    return client
+                logger.info(
+                    f"Replacing async Elasticsearch client for {hosts} bound to a stale loop"
+                )
+            client = AsyncElasticsearch(hosts, **self._client_kwargs(api_key, basic_auth))
+            self._async_clients[key] = (client, loop)
+            self._hosts[key] = list(hosts)
+            logger.info(f"Created shared async Elasticsearch client for {hosts}")
+            return client
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        """Returns the clients open per cluster, keyed by client fingerprint."""
+        with self._lock:
+            return {
+                key: {
+                    "hosts": hosts,
+                    "sync_client": key in self._clients,
+                    "async_client": key in self._async_clients,
+                    "connections_per_node": self.connections_per_node,
+                }
+                for key, hosts in self._hosts.items()
+            }
+
+    async def aclose(self):
+        """Closes every client, awaiting the async ones owned by the running event loop."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            async_clients, self._async_clients = self._async_clients, {}
+        for key, (client, client_loop) in async_clients.items():
+            if client_loop is not loop:
+                continue
+            try:
+                await client.close()
+            except Exception as e:
+                logger.error(f"Failed to close async Elasticsearch client {key}: {e}")
+        self._close_sync_clients()
+
+    def close(self):
+        """
+        Synchronous variant of ``aclose`` for shutdown hooks that run outside an event loop,
+        such as Celery's ``worker_process_shutdown`` signal.
+        """
+        with self._lock:
+            async_clients, self._async_clients = self._async_clients, {}
+        for key, (client, client_loop) in async_clients.items():
+            if client_loop.is_closed() or client_loop.is_running():
+                continue
+            try:
+                client_loop.run_until_complete(client.close())
+            except Exception as e:
+                logger.error(f"Failed to close async Elasticsearch client {key}: {e}")
+        self._close_sync_clients()
+
+    def _close_sync_clients(self):
+        with self._lock:
+            clients, self._clients = self._clients, {}
+            self._hosts.clear()
+        for key, client in clients.items():
+            try:
+                client.close()
+            except Exception as e:
+                logger.error(f"Failed to close Elasticsearch client {key}: {e}")
+
+
+# Singleton client registry shared across the process
+es_client_registry = ElasticsearchClientRegistry(
+    connections_per_node=settings.elasticsearch_connections_per_node,
+    request_timeout=settings.elasticsearch_request_timeout_s,
+)
@@ -0,0 +1,186 @@
+import asyncio
+import queue
+import threading
+from collections.abc import AsyncIterator, Iterator
+from typing import Any, Optional, Union
+
+from elasticsearch import AsyncElasticsearch, Elasticsearch
+
+from utils.platform_commons.logger import logger
+
+# Put by a slice reader once it has read its last page
+_SLICE_DONE = object()
+
+Page = list[dict[str, Any]]
+
+
+class DocumentExporter:
+    """
+    Reads every document of an index, page by page, in constant memory.
+
+    The reads go through a point in time (PIT), so the export sees the index as it was when
+    it started, and pages are fetched with ``search_after`` on ``_shard_doc``, which has no
+    10,000 hit limit and needs no scroll context. With ``slices`` above one, the PIT is
+    split into that many slices read in parallel. At most ``slices`` pages wait for the
+    consumer at a time, so a slow consumer slows the readers down instead of buffering
+    the index.
+
+    ``pages`` reads from threads with a sync client; ``apages`` does the same with tasks
+    on the event loop and an ``AsyncElasticsearch`` client. Both close the PIT when the
+    export ends, fails or is abandoned by the consumer.
+    """
+
+    def __init__(
+        self,
+        client: Union[Elasticsearch, AsyncElasticsearch],
+        index: str,
+        page_size: int = 1000,
+        slices: int = 1,
+        keep_alive: str = "2m",
+        source: Union[bool, dict[str, list[str]]] = True,
+    ):
+        if page_size < 1 or slices < 1:
+            raise ValueError("page_size and slices must be positive")
+        self.client = client
+        self.index = index
+        self.page_size = page_size
+        self.slices = slices
+        self.keep_alive = keep_alive
+        self.source = source
+
+    def page_body(
+        self, pit_id: str, slice_id: int, search_after: Optional[list[Any]] = None
+    ) -> dict[str, Any]:
+        """Returns the search body of the next page of a slice."""
+        body: dict[str, Any] = {
+            "size": self.page_size,
+            "query": {"match_all": {}},
+            "pit": {"id": pit_id, "keep_alive": self.keep_alive},
+            # The cheapest total order, made of the shard and the document's position in it
+            "sort": [{"_shard_doc": "asc"}],
+            "_source": self.source,
+            "track_total_hits": False,
+        }
+        if self.slices > 1:
+            body["slice"] = {"id": slice_id, "max": self.slices}
+        if search_after is not None:
+            body["search_after"] = search_after
+        return body
+
+    def _next_page(self, response: dict[str, Any]) -> tuple[Page, Optional[list[Any]]]:
+        """Returns the hits of a response and the sort values to continue after, or None
+        when the slice has no more pages."""
+        hits = response["hits"]["hits"]
+        if len(hits) < self.page_size:
+            return hits, None
+        return hits, hits[-1]["sort"]
+
+    def pages(self) -> Iterator[Page]:
+        """Yields the hits of the index one page at a time."""
+        pit_id = self.client.open_point_in_time(index=self.index, keep_alive=self.keep_alive)["id"]
+        pages: queue.Queue = queue.Queue(maxsize=self.slices)
+        stop = threading.Event()
+
+        def put(item) -> bool:
+            # Gives up once the consumer is gone, so a reader never blocks on a full queue
+            while not stop.is_set():
+                try:
+                    pages.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def read(slice_id: int):
+            current_pit, search_after = pit_id, None
+            try:
+                while True:
+                    response = self.client.search(
+                        body=self.page_body(current_pit, slice_id, search_after)
+                    )
+                    current_pit = response.get("pit_id", current_pit)
+                    hits, search_after = self._next_page(response)
+                    if hits and not put(hits):
+                        return
+                    if search_after is None:
+                        break
+            except Exception as e:
+                put(e)
+                return
+            put(_SLICE_DONE)
+
+        readers = [
+            threading.Thread(target=read, args=(slice_id,), daemon=True)
+            for slice_id in range(self.slices)
+        ]
+        for reader in readers:
+            reader.start()
+        try:
+            finished = 0
+            while finished < self.slices:
+                item = pages.get()
+                if item is _SLICE_DONE:
+                    finished += 1
+                elif isinstance(item, Exception):
+                    raise item
+                else:
+                    yield item
+        finally:
+            stop.set()
+            for reader in readers:
+                reader.join()
+            self._close(pit_id)
+
+    async def apages(self) -> AsyncIterator[Page]:
+        """Async counterpart of ``pages``. The exporter's client must be an
+        ``AsyncElasticsearch``."""
+        response = await self.client.open_point_in_time(
+            index=self.index, keep_alive=self.keep_alive
+        )
+        pit_id = response["id"]
+        pages: asyncio.Queue = asyncio.Queue(maxsize=self.slices)
+
+        async def read(slice_id: int):
+            current_pit, search_after = pit_id, None
+            try:
+                while True:
+                    response = await self.client.search(
+                        body=self.page_body(current_pit, slice_id, search_after)
+                    )
+                    current_pit = response.get("pit_id", current_pit)
+                    hits, search_after = self._next_page(response)
+                    if hits:
+                        await pages.put(hits)
+                    if search_after is None:
+                        break
+            except Exception as e:
+                await pages.put(e)
+                return
+            await pages.put(_SLICE_DONE)
+
+        readers = [asyncio.create_task(read(slice_id)) for slice_id in range(self.slices)]
+        try:
+            finished = 0
+            while finished < self.slices:
+                item = await pages.get()
+                if item is _SLICE_DONE:
+                    finished += 1
+                elif isinstance(item, Exception):
+                    raise item
+                else:
+                    yield item
+        finally:
+            for reader in readers:
+                reader.cancel()
+            await asyncio.gather(*readers, return_exceptions=True)
+            try:
+                await self.client.close_point_in_time(id=pit_id)
+            except Exception as e:
+                logger.warning(f"Failed to close point in time on '{self.index}': {e}")
+
+    def _close(self, pit_id: str):
+        try:
+            self.client.close_point_in_time(id=pit_id)
+        except Exception as e:
+            # The PIT expires on its own after keep_alive
+            logger.warning(f"Failed to close point in time on '{self.index}': {e}")
@@ -0,0 +1,143 @@
+import copy
+from functools import lru_cache
+from typing import Any, Optional
+
+from config import Config
+from src.SinkConnectors.filter_utils import FilterCondition, FilterOperator, FilterValue
+
+settings = Config()
+
+_RANGE_OPERATORS = {
+    FilterOperator.LESS_THAN: "lt",
+    FilterOperator.LESS_THAN_OR_EQUAL: "lte",
+    FilterOperator.GREATER_THAN: "gt",
+    FilterOperator.GREATER_THAN_OR_EQUAL: "gte",
+}
+
+# Operators whose clause is the negation of another operator's
+_NEGATED = {
+    FilterOperator.NOT_EQUAL: FilterOperator.EQUAL,
+    FilterOperator.NOT_IN: FilterOperator.IN,
+    FilterOperator.NOT_BETWEEN: FilterOperator.BETWEEN,
+    FilterOperator.NOT_LIKE: FilterOperator.LIKE,
+    FilterOperator.IS_NULL: FilterOperator.IS_NOT_NULL,
+}
+
+
+def _values(condition_value: FilterValue) -> list[Any]:
+    """Returns the values of a list operand; strings are taken as comma separated lists."""
+    if isinstance(condition_value, (list, tuple)):
+        return list(condition_value)
+    if isinstance(condition_value, str):
+        return [value.strip() for value in condition_value.split(",")]
+    return [condition_value]
+
+
+def like_to_wildcard(pattern: str) -> str:
+    """Translates a SQL LIKE pattern into an Elasticsearch wildcard pattern."""
+    translated = []
+    escaped = False
+    for char in pattern:
+        if escaped:
+            translated.append(char if char in "%_" else "\\" + char)
+            escaped = False
+        elif char == "\\":
+            escaped = True
+        elif char == "%":
+            translated.append("*")
+        elif char == "_":
+            translated.append("?")
+        elif char in "*?":
+            translated.append("\\" + char)
+        else:
+            translated.append(char)
+    if escaped:
+        translated.append("\\\\")
+    return "".join(translated)
+
+
+def _clause(field: str, operator: FilterOperator, value: FilterValue) -> dict[str, Any]:
+    """Returns the positive clause of an operator; negated operators reuse it."""
+    if operator == FilterOperator.EQUAL:
+        return {"term": {field: value}}
+    if operator in _RANGE_OPERATORS:
+        return {"range": {field: {_RANGE_OPERATORS[operator]: value}}}
+    if operator == FilterOperator.IN:
+        return {"terms": {field: _values(value)}}
+    if operator == FilterOperator.BETWEEN:
+        bounds = _values(value)
+        if len(bounds) != 2:
+            raise ValueError(f"BETWEEN on '{field}' needs two values, got {value!r}")
+        return {"range": {field: {"gte": bounds[0], "lte": bounds[1]}}}
+    if operator == FilterOperator.LIKE:
+        if not isinstance(value, str):
+            raise ValueError(f"LIKE on '{field}' needs a string pattern, got {value!r}")
+        return {"wildcard": {field: {"value": like_to_wildcard(value)}}}
+    if operator == FilterOperator.IS_NOT_NULL:
+        return {"exists": {"field": field}}
+    raise ValueError(f"Unsupported filter operator: {operator}")
+
+
+def _freeze(value: FilterValue) -> tuple[Any, Any]:
+    """Returns a hashable form of a value and its type signature. The types are part of the
+    cache key so True, 1 and 1.0 compile to different clauses."""
+    if isinstance(value, (list, tuple)):
+        return tuple(value), tuple(type(item).__name__ for item in value)
+    return value, type(value).__name__
+
+
+@lru_cache(maxsize=settings.elasticsearch_filter_cache_size)
+def _compile(conditions: tuple) -> Optional[dict[str, Any]]:
+    positive: list[dict[str, Any]] = []
+    negative: list[dict[str, Any]] = []
+    for field, operator, value, _ in conditions:
+        if operator in _NEGATED:
+            negative.append(_clause(field, _NEGATED[operator], value))
+        else:
+            positive.append(_clause(field, operator, value))
+    query: dict[str, Any] = {}
+    if positive:
+        query["filter"] = positive
+    if negative:
+        query["must_not"] = negative
+    return {"bool": query} if query else None
+
+
+def compile_filters(filters: list[FilterCondition]) -> Optional[dict[str, Any]]:
+    """
+    Compiles filter conditions into one Elasticsearch ``bool`` query in filter context.
+
+    Conditions become ``filter`` and ``must_not`` clauses, which do not score and are
+    cached by Elasticsearch, so the same query can pre-filter a kNN search or restrict a
+    BM25 one. Values keep their JSON types, so numeric and boolean fields are compared as
+    such. Compiled queries are cached by the conditions' fields, operators and typed
+    values; each caller gets its own copy, free to extend into a larger query.
+
+    Operand formats: ``IN`` and ``NOT IN`` take a list or a comma separated string,
+    ``BETWEEN`` and ``NOT BETWEEN`` two values (inclusive bounds), ``LIKE`` and
+    ``NOT LIKE`` a SQL pattern with ``%`` and ``_`` wildcards, and ``IS NULL`` and
+    ``IS NOT NULL`` no value.
+
+    Args:
+        filters (list[FilterCondition]): Conditions every result must match.
+
+    Returns:
+        dict | None: The ``bool`` query, or None when there are no conditions.
+
+    Raises:
+        ValueError: If a condition's value does not fit its operator.
+    """
+    if not filters:
+        return None
+    compiled = _compile(
+        tuple(
+            (condition.field, condition.operator, *_freeze(condition.value))
+            for condition in filters
+        )
+    )
+    return copy.deepcopy(compiled)
+
+
+def cache_info():
+    """Returns the hit and miss counts of the compiled filter cache."""
+    return _compile.cache_info()
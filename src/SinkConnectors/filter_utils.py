@@ -1,4 +1,5 @@
 from enum import Enum
+from typing import Optional, Union
 
 from pydantic import BaseModel, Field
 
@@ -10,15 +11,20 @@ OPERATOR_MAPPING = {
     "GREATER_THAN": ">",
     "GREATER_THAN_OR_EQUAL": ">=",
     "IN": "IN",
-    "NOT_IN": "NOT_IN",
+    "NOT_IN": "NOT IN",
     "BETWEEN": "BETWEEN",
-    "NOT_BETWEEN": "NOT_BETWEEN",
+    "NOT_BETWEEN": "NOT BETWEEN",
     "LIKE": "LIKE",
-    "NOT_LIKE": "NOT_LIKE",
-    "IS_NULL": "IS_NULL",
-    "IS_NOT_NULL": "IS_NOT_NULL",
+    "NOT_LIKE": "NOT LIKE",
+    "IS_NULL": "IS NULL",
+    "IS_NOT_NULL": "IS NOT NULL",
 }
 
+# A filter operand keeps its JSON type, so numbers and booleans are compared as such.
+# Booleans come first so pydantic does not read them as integers.
+FilterScalar = Union[bool, int, float, str]
+FilterValue = Optional[Union[FilterScalar, list[FilterScalar]]]
+
 
 class FilterOperator(Enum):
     """
@@ -49,7 +55,9 @@ class FilterCondition(BaseModel):
 
     field: str = Field(..., description="Field to be filtered")
     operator: FilterOperator = Field(..., description="Operator for filter")
-    value: str = Field(..., description="Value to filter field")
+    value: FilterValue = Field(
+        None, description="Value to filter field; a list for IN and BETWEEN, none for IS NULL"
+    )
 
 
 def dict_to_filter_condition(filter_dict: list[dict]) -> list[FilterCondition]:
@@ -79,7 +87,7 @@ def dict_to_filter_condition(filter_dict: list[dict]) -> list[FilterCondition]:
     filter_conditions = []
     for filter in filter_dict:
         op = filter["operator"]
-        val = filter["value"]
+        val = filter.get("value")
         field = filter["field"]
 
         try:
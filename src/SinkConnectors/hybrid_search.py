@@ -0,0 +1,59 @@
+from dataclasses import dataclass
+from typing import Any
+
+from config import Config
+
+settings = Config()
+
+
+@dataclass
+class HybridQuery:
+    """
+    Lexical half of a hybrid search and how it is fused with the kNN half.
+
+    Attributes:
+        text (str): The query text, matched with BM25 against the indexed chunk text.
+        knn_weight (float): Weight of the kNN ranking in the fused score.
+        text_weight (float): Weight of the BM25 ranking in the fused score.
+        rank_window_size (int): Hits taken from each ranking before fusing.
+        rank_constant (int): RRF ``k``; larger values flatten the contribution of top ranks.
+    """
+
+    text: str
+    knn_weight: float = settings.elasticsearch_hybrid_knn_weight
+    text_weight: float = settings.elasticsearch_hybrid_text_weight
+    rank_window_size: int = settings.elasticsearch_hybrid_rank_window_size
+    rank_constant: int = settings.elasticsearch_hybrid_rank_constant
+
+
+def reciprocal_rank_fusion(
+    rankings: list[list[dict[str, Any]]],
+    weights: list[float],
+    rank_constant: int = 60,
+    size: int = 10,
+) -> list[tuple[dict[str, Any], float]]:
+    """
+    Fuses ranked hit lists with weighted reciprocal rank fusion.
+
+    Each hit scores ``weight / (rank_constant + rank)`` in every ranking it appears in, with
+    ranks starting at 1, and the scores are summed per document ID. Only ranks are used, so
+    BM25 and vector similarity scores never need to be put on a common scale.
+
+    Args:
+        rankings (list[list[dict]]): Elasticsearch hits of each query, best first.
+        weights (list[float]): The weight of each ranking.
+        rank_constant (int): The RRF ``k`` constant.
+        size (int): The number of fused hits to return.
+
+    Returns:
+        list[tuple[dict, float]]: The best hits and their fused scores, highest first.
+    """
+    scores: dict[str, float] = {}
+    hits: dict[str, dict[str, Any]] = {}
+    for ranking, weight in zip(rankings, weights):
+        for rank, hit in enumerate(ranking, start=1):
+            doc_id = hit["_id"]
+            scores[doc_id] = scores.get(doc_id, 0.0) + weight / (rank_constant + rank)
+            hits.setdefault(doc_id, hit)
+    ordered = sorted(scores, key=scores.__getitem__, reverse=True)[:size]
+    return [(hits[doc_id], scores[doc_id]) for doc_id in ordered]
@@ -1,18 +1,45 @@
+import asyncio
 import time
 
 from celery import Celery
+from celery.signals import worker_process_shutdown
 from elasticsearch import NotFoundError
 
 from config import config
+from src.EmbedConnectors.commons import usage_aggregator
 from src.Pipelines.IngestPipeline import Pipeline
 from src.Shared.CloudFile import CloudFileSchema
 from src.Shared.RagDocument import RagDocument
 from src.Shared.source_config_schema import SourceConfigSchema
+from src.SinkConnectors.client_registry import es_client_registry
 from src.Sources.SourceConnector import SourceConnector
+from utils.http.client_pool import httpx_client_pool
 from utils.platform_commons.logger import logger
 
 app = Celery("tasks", broker=config.REDIS_BROKER_URL)
 
+# One event loop per worker process so pooled httpx connections survive across tasks
+_worker_loop: asyncio.AbstractEventLoop | None = None
+
+
+def run_async(coro):
+    """Runs a coroutine on the worker process' long-lived event loop."""
+    global _worker_loop
+    if _worker_loop is None or _worker_loop.is_closed():
+        _worker_loop = asyncio.new_event_loop()
+    return _worker_loop.run_until_complete(coro)
+
+
+@worker_process_shutdown.connect
+def close_worker_resources(**kwargs):
+    if _worker_loop is not None and not _worker_loop.is_closed():
+        # Publish usage still buffered from the last tasks before the loop goes away
+        _worker_loop.run_until_complete(usage_aggregator.aclose())
+    httpx_client_pool.close()
+    es_client_registry.close()
+    if _worker_loop is not None and not _worker_loop.is_closed():
+        _worker_loop.close()
+
 
 # --- Task Definitions ---
 @app.task
@@ -97,7 +124,7 @@ def data_embed_ingest_task(pipeline_config_dict: dict, chunks_dicts: list[dict])
     try:
         # Run the asynchronous embed_and_ingest method
         embed_start = time.perf_counter()
-        vectors_written = pipeline.embed_and_ingest(chunks)
+        vectors_written = run_async(pipeline.embed_and_ingest(chunks))
         embed_time = time.perf_counter() - embed_start
         logger.info(f"Embedding completed in {embed_time:.2f} seconds")
     except NotFoundError:
@@ -1,3 +1,4 @@
+import asyncio
 import datetime
 import os
 import time
@@ -7,11 +8,14 @@ from hatchet_sdk import Context
 from tqdm import tqdm
 
 from hatchet_instance import hatchet
+from src.EmbedConnectors.commons import usage_aggregator
 from src.Pipelines.IngestPipeline import Pipeline
 from src.Shared.CloudFile import CloudFileSchema
 from src.Shared.RagDocument import RagDocument
 from src.Shared.source_config_schema import SourceConfigSchema
+from src.SinkConnectors.client_registry import es_client_registry
 from src.Sources.SourceConnector import SourceConnector
+from utils.http.client_pool import httpx_client_pool
 
 
 def serialize_data(data):
@@ -52,7 +56,11 @@ class PipelineWorkflow:
             })
         result = {
             "extraction_results": extraction_results,
-            "pipeline_config_dict": pipeline_config_dict
+            "pipeline_config_dict": pipeline_config_dict,
+            # Settings to restore once the full load ends, None for incremental runs
+            "bulk_load_state": (
+                pipeline.sink.begin_bulk_load() if extract_type == "full" else None
+            ),
         }
         context.log(f"result: {result}")
         # Convert the result into a JSON-serializable object
@@ -120,8 +128,21 @@ class PipelineWorkflow:
             context.log(error_msg)
             return jsonable_encoder({"error": error_msg})
 
-        embed_results = []
+        bulk_load_state = context.step_output("data_extraction").get("bulk_load_state")
+        pipeline.sink.resume_bulk_load(bulk_load_state)
         start_time = time.perf_counter()
+        try:
+            embed_results = await self._embed_results(context, pipeline, processing_results)
+        finally:
+            await asyncio.to_thread(pipeline.sink.end_bulk_load, bulk_load_state)
+        total_time = time.perf_counter() - start_time
+        final_result = {"embedding_results": embed_results, "total_time": total_time}
+        context.log(f"data_embed_ingest final result: {final_result}")
+        return jsonable_encoder(final_result)
+
+    @staticmethod
+    async def _embed_results(context: Context, pipeline: Pipeline, processing_results: list):
+        embed_results = []
         for idx, result in enumerate(processing_results):
             context.log(f"Processing embed for result {idx+1}: {result}")
             batched_chunks_json = result["batched_chunks"]
@@ -151,10 +172,19 @@ class PipelineWorkflow:
                     "cloud_file_id": result["cloud_file_id"],
                     "error": error_detail
                 })
-        total_time = time.perf_counter() - start_time
-        final_result = {"embedding_results": embed_results, "total_time": total_time}
-        context.log(f"data_embed_ingest final result: {final_result}")
-        return jsonable_encoder(final_result)
+        return embed_results
+
+    @hatchet.on_failure_step()
+    def on_failure(self, context: Context):
+        # Restore the index settings of a full load whose later steps failed. This is a no-op
+        # if data_embed_ingest already ended the load before failing
+        try:
+            bulk_load_state = context.step_output("data_extraction").get("bulk_load_state")
+        except Exception:
+            return
+        if bulk_load_state is not None:
+            pipeline = Pipeline.create_pipeline(context.workflow_input()["pipeline_config_dict"])
+            pipeline.sink.end_bulk_load(bulk_load_state)
 
     
 def start_worker(worker_id: int) -> None:
@@ -162,7 +192,13 @@ def start_worker(worker_id: int) -> None:
     worker = hatchet.worker("rag-worker")
     worker.register_workflow(PipelineWorkflow())
     print(f"Starting RAG ingestion worker {worker_id}...")
-    worker.start()
+    try:
+        worker.start()
+    finally:
+        # Publish usage still buffered when the worker stops
+        asyncio.run(usage_aggregator.flush())
+        httpx_client_pool.close()
+        es_client_registry.close()
 
 def main() -> None:
     # Use multiprocessing to spawn one worker per CPU core.
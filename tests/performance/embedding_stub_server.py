@@ -0,0 +1,176 @@
+"""
+Local stand-in for the embedding providers, for benchmarking the real HTTP clients offline.
+
+Speaks the OpenAI/ThinkTank ``/v1/embeddings`` protocol and the HAM ``/text/embed`` protocol,
+returning deterministic vectors from ``hash_embedding``. Latency, 429s and server errors are
+injected according to the settings below, which are read from the environment or the command
+line.
+
+Run it and point the connectors at it, e.g.::
+
+    python -m tests.performance.embedding_stub_server --port 8081 --latency-ms 150 \\
+        --rate-limit-rate 0.02
+    OPENAI_EMBEDDINGS_ENDPOINT=http://localhost:8081/v1/embeddings THINKTANK_URL=http://localhost:8081
+"""
+
+import argparse
+import asyncio
+import base64
+import os
+import random
+from collections import Counter
+from dataclasses import dataclass, field
+
+import numpy as np
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+from src.EmbedConnectors.LocalHashEmbedModel import hash_embedding
+from src.EmbedConnectors.token_batching import approximate_tokens
+
+
+@dataclass
+class StubSettings:
+    # Latency per request is drawn from the distribution, plus per_item_ms for every input
+    latency_distribution: str = os.getenv("STUB_LATENCY_DISTRIBUTION", "lognormal")
+    latency_ms: float = float(os.getenv("STUB_LATENCY_MS", "100"))
+    latency_stddev_ms: float = float(os.getenv("STUB_LATENCY_STDDEV_MS", "50"))
+    per_item_ms: float = float(os.getenv("STUB_PER_ITEM_MS", "0.5"))
+    # Fraction of requests answered with 429 and Retry-After, or with a 500
+    rate_limit_rate: float = float(os.getenv("STUB_RATE_LIMIT_RATE", "0"))
+    retry_after_s: float = float(os.getenv("STUB_RETRY_AFTER_S", "1"))
+    error_rate: float = float(os.getenv("STUB_ERROR_RATE", "0"))
+    dimensions: int = int(os.getenv("STUB_DIMENSIONS", "768"))
+    seed: int = int(os.getenv("STUB_SEED", "0"))
+    stats: Counter = field(default_factory=Counter)
+
+    def __post_init__(self):
+        self.random = random.Random(self.seed)
+
+    def sample_latency_s(self, items: int) -> float:
+        mean, stddev = self.latency_ms, self.latency_stddev_ms
+        if self.latency_distribution == "fixed" or mean <= 0:
+            latency = mean
+        elif self.latency_distribution == "uniform":
+            latency = self.random.uniform(max(0.0, mean - stddev), mean + stddev)
+        elif self.latency_distribution == "normal":
+            latency = self.random.gauss(mean, stddev)
+        elif self.latency_distribution == "lognormal":
+            # Parameterised so the distribution has the configured mean and stddev
+            sigma2 = np.log1p((stddev / mean) ** 2)
+            latency = self.random.lognormvariate(np.log(mean) - sigma2 / 2, np.sqrt(sigma2))
+        else:
+            raise ValueError(f"Unknown latency distribution: {self.latency_distribution}")
+        return max(0.0, latency + self.per_item_ms * items) / 1000
+
+
+def create_app(settings: StubSettings | None = None) -> FastAPI:
+    """Builds the stub server app."""
+    settings = settings or StubSettings()
+    app = FastAPI(title="Embedding stub server")
+    app.state.settings = settings
+
+    async def simulate(items: int) -> JSONResponse | None:
+        settings.stats["requests"] += 1
+        await asyncio.sleep(settings.sample_latency_s(items))
+        roll = settings.random.random()
+        if roll < settings.rate_limit_rate:
+            settings.stats["rate_limited"] += 1
+            return JSONResponse(
+                status_code=429,
+                content={"error": {"message": "Rate limit reached", "type": "rate_limit"}},
+                headers={"Retry-After": str(settings.retry_after_s)},
+            )
+        if roll < settings.rate_limit_rate + settings.error_rate:
+            settings.stats["errors"] += 1
+            return JSONResponse(status_code=500, content={"error": {"message": "Injected"}})
+        settings.stats["inputs"] += items
+        return None
+
+    def embed(texts: list[str], dimensions: int | None) -> list[np.ndarray]:
+        return [
+            hash_embedding(text, dimensions or settings.dimensions, settings.seed) for text in texts
+        ]
+
+    @app.post("/v1/embeddings")
+    async def openai_embeddings(request: Request):
+        body = await request.json()
+        texts = body["input"] if isinstance(body["input"], list) else [body["input"]]
+        failure = await simulate(len(texts))
+        if failure is not None:
+            return failure
+        encoding_format = body.get("encoding_format", "float")
+        data = []
+        for index, vector in enumerate(embed(texts, body.get("dimensions"))):
+            embedding = (
+                base64.b64encode(vector.tobytes()).decode()
+                if encoding_format == "base64"
+                else vector.tolist()
+            )
+            data.append({"object": "embedding", "index": index, "embedding": embedding})
+        tokens = approximate_tokens(texts)
+        return {
+            "object": "list",
+            "data": data,
+            "model": body.get("model"),
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+        }
+
+    @app.post("/hosted_ai_models/v1/text/embed")
+    async def ham_embeddings(request: Request):
+        body = await request.json()
+        texts = body["input_text"]
+        failure = await simulate(len(texts))
+        if failure is not None:
+            return failure
+        # HAM's payload sends dimensions as a one-element list
+        dimensions = body.get("dimensions")
+        if isinstance(dimensions, list):
+            dimensions = dimensions[0] if dimensions else None
+        return {"embeddings": [vector.tolist() for vector in embed(texts, dimensions)]}
+
+    @app.get("/stats")
+    async def stats():
+        return dict(settings.stats)
+
+    return app
+
+
+def main():
+    defaults = StubSettings()
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument(
+        "--latency-distribution",
+        choices=["fixed", "uniform", "normal", "lognormal"],
+        default=defaults.latency_distribution,
+    )
+    parser.add_argument("--latency-ms", type=float, default=defaults.latency_ms)
+    parser.add_argument("--latency-stddev-ms", type=float, default=defaults.latency_stddev_ms)
+    parser.add_argument("--per-item-ms", type=float, default=defaults.per_item_ms)
+    parser.add_argument("--rate-limit-rate", type=float, default=defaults.rate_limit_rate)
+    parser.add_argument("--retry-after-s", type=float, default=defaults.retry_after_s)
+    parser.add_argument("--error-rate", type=float, default=defaults.error_rate)
+    parser.add_argument("--dimensions", type=int, default=defaults.dimensions)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    args = parser.parse_args()
+
+    import uvicorn
+
+    settings = StubSettings(
+        latency_distribution=args.latency_distribution,
+        latency_ms=args.latency_ms,
+        latency_stddev_ms=args.latency_stddev_ms,
+        per_item_ms=args.per_item_ms,
+        rate_limit_rate=args.rate_limit_rate,
+        retry_after_s=args.retry_after_s,
+        error_rate=args.error_rate,
+        dimensions=args.dimensions,
+        seed=args.seed,
+    )
+    uvicorn.run(create_app(settings), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Unit tests for the Elasticsearch bulk writer.
+"""
+
+import asyncio
+import threading
+
+import numpy as np
+import orjson
+import pytest
+
+pytest.importorskip("platform_commons")
+
+from src.Shared.RagVector import RagVector  # noqa: E402
+from src.SinkConnectors.bulk_writer import BulkWriter  # noqa: E402
+
+
+class FakeBulkClient:
+    """Answers _bulk requests, failing documents according to ``statuses``.
+
+    ``statuses`` maps a document ID to the statuses returned on successive attempts; the
+    last one repeats. Documents not listed are created.
+    """
+
+    def __init__(self, statuses=None):
+        self.statuses = statuses or {}
+        self.attempts: dict[str, int] = {}
+        self.requests: list[list[str]] = []
+        self.lock = threading.Lock()
+
+    def bulk(self, operations):
+        ids = []
+        items = []
+        for payload in operations:
+            action, source = payload.splitlines()
+            doc_id = orjson.loads(action)["index"]["_id"]
+            assert "vector" in orjson.loads(source)
+            with self.lock:
+                attempt = self.attempts.get(doc_id, 0)
+                self.attempts[doc_id] = attempt + 1
+            statuses = self.statuses.get(doc_id, [201])
+            status = statuses[min(attempt, len(statuses) - 1)]
+            outcome = {"_id": doc_id, "status": status}
+            if status >= 300:
+                outcome["error"] = {"type": "rejected", "reason": doc_id}
+            ids.append(doc_id)
+            items.append({"index": outcome})
+        with self.lock:
+            self.requests.append(ids)
+        return {"errors": any(i["index"]["status"] >= 300 for i in items), "items": items}
+
+
+class FakeAsyncBulkClient(FakeBulkClient):
+    """Async version of FakeBulkClient that records how many requests overlap."""
+
+    def __init__(self, statuses=None):
+        super().__init__(statuses)
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def bulk(self, operations):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        return FakeBulkClient.bulk(self, operations)
+
+
+def make_vectors(count: int) -> list[RagVector]:
+    return [
+        RagVector(id=f"doc_{idx}", vector=np.ones(4, dtype=np.float32), metadata={"n": idx})
+        for idx in range(count)
+    ]
+
+
+def make_writer(client, **kwargs) -> BulkWriter:
+    kwargs.setdefault("retry_backoff_s", 0)
+    return BulkWriter(client, "test-index", **kwargs)
+
+
+def test_packs_documents_by_action_count():
+    client = FakeBulkClient()
+    result = make_writer(client, max_actions=3, max_in_flight=1).write(make_vectors(7))
+
+    assert result.written == 7
+    assert result.requests == 3
+    assert [len(ids) for ids in client.requests] == [3, 3, 1]
+
+
+def test_packs_documents_by_byte_size():
+    client = FakeBulkClient()
+    writer = make_writer(client, max_in_flight=1)
+    vectors = make_vectors(4)
+    writer.max_bytes = len(writer.encode(vectors[0]).payload) * 2
+
+    result = writer.write(vectors)
+
+    assert result.written == 4
+    assert [len(ids) for ids in client.requests] == [2, 2]
+
+
+def test_retries_only_failed_items():
+    client = FakeBulkClient(statuses={"doc_1": [429, 201], "doc_3": [503, 503, 200]})
+    result = make_writer(client, max_in_flight=1).write(make_vectors(5))
+
+    assert result.written == 5
+    assert result.errors == []
+    assert client.requests == [
+        ["doc_0", "doc_1", "doc_2", "doc_3", "doc_4"],
+        ["doc_1", "doc_3"],
+        ["doc_3"],
+    ]
+    assert result.retried_items == 3
+
+
+def test_collects_permanent_and_exhausted_failures():
+    client = FakeBulkClient(statuses={"doc_0": [400], "doc_2": [429]})
+    result = make_writer(client, max_retries=2, max_in_flight=1).write(make_vectors(3))
+
+    assert result.written == 1
+    assert sorted((error.id, error.status) for error in result.errors) == [
+        ("doc_0", 400),
+        ("doc_2", 429),
+    ]
+    # The mapping error is not resent; the rejected document is tried three times
+    assert client.attempts == {"doc_0": 1, "doc_1": 1, "doc_2": 3}
+
+
+def test_parallel_requests_count_every_document():
+    client = FakeBulkClient(statuses={"doc_5": [400]})
+    result = make_writer(client, max_actions=2, max_in_flight=4).write(make_vectors(11))
+
+    assert result.written == 10
+    assert [error.id for error in result.errors] == ["doc_5"]
+    assert sorted(doc_id for ids in client.requests for doc_id in ids) == sorted(
+        f"doc_{idx}" for idx in range(11)
+    )
+
+
+@pytest.mark.asyncio
+async def test_async_write_bounds_in_flight_requests_and_retries():
+    client = FakeAsyncBulkClient(statuses={"doc_0": [429, 201], "doc_7": [400]})
+    writer = make_writer(client, max_actions=2, max_in_flight=3)
+
+    result = await writer.awrite(make_vectors(12))
+
+    assert result.written == 11
+    assert [error.id for error in result.errors] == ["doc_7"]
+    assert client.attempts["doc_0"] == 2
+    assert client.max_in_flight == 3
@@ -0,0 +1,61 @@
+"""
+Unit tests for duplicate chunk elimination before embedding.
+"""
+
+from src.EmbedConnectors.chunk_dedup import ChunkDeduplicator, get_deduplicator
+
+
+def test_identical_texts_in_a_batch_are_embedded_once():
+    """Test that chunks differing only in whitespace share one embedding."""
+    deduplicator = ChunkDeduplicator(window_size=10)
+    plan = deduplicator.plan(["Legal  disclaimer", "body", "Legal disclaimer\n", "body"])
+
+    assert plan.unique_indices == [0, 1]
+    assert plan.fan_out == [[0, 2], [1, 3]]
+    assert plan.resolved == []
+    assert plan.chunks_deduplicated == 2
+    assert plan.tokens_saved > 0
+
+
+def test_window_resolves_texts_embedded_for_earlier_files():
+    """Test that a remembered vector is reused without embedding the text again."""
+    deduplicator = ChunkDeduplicator(window_size=10)
+    first = deduplicator.plan(["footer", "page one"])
+    for key, vector in zip(first.keys, ["v-footer", "v-one"]):
+        deduplicator.remember(key, vector)
+
+    second = deduplicator.plan(["page two", "footer", "footer"])
+
+    assert second.unique_indices == [0]
+    assert second.resolved == [([1, 2], "v-footer")]
+    assert deduplicator.chunks_deduplicated == 2
+
+
+def test_window_evicts_least_recently_used():
+    """Test that the cross-file window is bounded."""
+    deduplicator = ChunkDeduplicator(window_size=1)
+    plan = deduplicator.plan(["a", "b"])
+    for key in plan.keys:
+        deduplicator.remember(key, key)
+
+    assert deduplicator.plan(["a"]).unique_indices == [0]
+    assert deduplicator.plan(["b"]).unique_indices == []
+
+
+def test_disabled_deduplicator_embeds_every_chunk():
+    """Test that disabling deduplication plans every chunk on its own."""
+    deduplicator = ChunkDeduplicator(window_size=10, enabled=False)
+    plan = deduplicator.plan(["same", "same"])
+
+    assert plan.unique_indices == [0, 1]
+    assert plan.fan_out == [[0], [1]]
+    assert plan.chunks_deduplicated == 0
+
+
+def test_deduplicators_are_shared_per_model_and_dimensions():
+    """Test that pipelines built per task reuse one cross-file window per model."""
+    first = get_deduplicator("text-embedding-3-small", 512)
+
+    assert get_deduplicator("text-embedding-3-small", 512) is first
+    assert get_deduplicator("text-embedding-3-small", 1024) is not first
+    assert get_deduplicator("text-embedding-3-large", 512) is not first
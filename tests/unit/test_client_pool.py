@@ -0,0 +1,133 @@
+"""
+Unit tests for the process-wide pool of shared httpx clients.
+"""
+
+import asyncio
+import threading
+
+import pytest
+
+pytest.importorskip("platform_commons")
+
+from utils.http.client_pool import HttpClientPool  # noqa: E402
+
+
+def make_pool() -> HttpClientPool:
+    return HttpClientPool(
+        max_connections=4, max_keepalive_connections=2, keepalive_expiry=5.0, http2=False, retries=0
+    )
+
+
+async def serve_keepalive(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    """Answers every request on a connection with a 200, keeping the connection open."""
+    try:
+        while True:
+            await reader.readuntil(b"\r\n\r\n")
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\nok")
+            await writer.drain()
+    except (asyncio.IncompleteReadError, ConnectionError):
+        writer.close()
+
+
+@pytest.mark.asyncio
+async def test_clients_are_reused_per_endpoint():
+    pool = make_pool()
+
+    client = pool.get_client("https://embed.test/v1/embeddings")
+
+    assert pool.get_client("https://embed.test/v1/models") is client
+    assert pool.get_client("https://embed.test:8443/v1/embeddings") is not client
+    assert pool.get_client("https://other.test/v1/embeddings") is not client
+    assert set(pool.stats()) == {
+        "https://embed.test",
+        "https://embed.test:8443",
+        "https://other.test",
+    }
+    await pool.aclose()
+    assert client.is_closed
+    assert pool.stats() == {}
+
+
+def test_client_of_a_closed_loop_is_replaced_and_closed():
+    pool = make_pool()
+
+    async def get_client():
+        client = pool.get_client("https://embed.test/v1/embeddings")
+        # Lets the close of a replaced client run
+        await asyncio.sleep(0)
+        return client
+
+    stale = asyncio.run(get_client())
+    fresh = asyncio.run(get_client())
+
+    assert fresh is not stale
+    assert stale.is_closed
+    assert not fresh.is_closed
+
+
+def test_client_of_a_loop_running_in_another_thread_is_closed_on_that_loop():
+    pool = make_pool()
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+
+    async def get_client():
+        return pool.get_client("https://embed.test/v1/embeddings")
+
+    try:
+        stale = asyncio.run_coroutine_threadsafe(get_client(), loop).result(timeout=1)
+        fresh = asyncio.run(get_client())
+        # Runs after the scheduled close on the other loop
+        asyncio.run_coroutine_threadsafe(asyncio.sleep(0), loop).result(timeout=1)
+    finally:
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+
+    assert fresh is not stale
+    assert stale.is_closed
+
+
+def test_close_shuts_down_clients_outside_an_event_loop():
+    pool = make_pool()
+    loop = asyncio.new_event_loop()
+
+    async def get_client():
+        return pool.get_client("https://embed.test/v1/embeddings")
+
+    try:
+        client = loop.run_until_complete(get_client())
+        pool.close()
+    finally:
+        loop.close()
+
+    assert client.is_closed
+    assert pool.stats() == {}
+
+
+@pytest.mark.asyncio
+async def test_stats_count_requests_and_reused_connections():
+    server = await asyncio.start_server(serve_keepalive, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    url = f"http://127.0.0.1:{port}/v1/embeddings"
+    pool = make_pool()
+
+    try:
+        client = pool.get_client(url)
+        for _ in range(3):
+            response = await client.get(url)
+            assert response.text == "ok"
+        async with client.stream("GET", url) as response:
+            in_flight = pool.stats()[f"http://127.0.0.1:{port}"]["active_requests"]
+
+        stats = pool.stats()[f"http://127.0.0.1:{port}"]
+    finally:
+        await pool.aclose()
+        server.close()
+
+    assert in_flight == 1
+    assert stats["requests_sent"] == 4
+    assert stats["active_requests"] == 0
+    assert stats["connections_opened"] == 1
+    assert stats["http2_responses"] == 0
+    assert stats["max_connections"] == 4
@@ -0,0 +1,212 @@
+"""
+Unit tests for the AIMD concurrency controller.
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src.EmbedConnectors.concurrency import (
+    AIMDController,
+    run_adaptive_batches,
+    stream_adaptive_batches,
+)
+
+
+class RateLimited(Exception):
+    pass
+
+
+@pytest.fixture
+def controller():
+    """Create a controller with a generous latency threshold for testing."""
+    return AIMDController(
+        initial_batch_size=4,
+        min_batch_size=1,
+        max_batch_size=8,
+        initial_concurrency=2,
+        min_concurrency=1,
+        max_concurrency=4,
+        latency_threshold_ms=10_000,
+        batch_step=1,
+    )
+
+
+@pytest.mark.asyncio
+async def test_fast_requests_increase_limits(controller):
+    """Test that requests under the latency threshold grow batch size and concurrency."""
+    for _ in range(6):
+        await controller.release(await controller.acquire())
+
+    assert controller.batch_size == 8
+    assert controller.limit > 2
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_decreases_once_per_burst(controller):
+    """Test that 429s from requests already in flight count as a single decrease."""
+    first, second = await controller.acquire(), await controller.acquire()
+    await controller.release(first, rate_limited=True)
+    await controller.release(second, rate_limited=True)
+
+    assert controller.batch_size == 2
+    assert controller.limit == 1
+    assert controller.rate_limited == 2
+
+
+@pytest.mark.asyncio
+async def test_slow_requests_decrease_limits():
+    """Test that latency above the threshold shrinks the batch size."""
+    controller = AIMDController(
+        initial_batch_size=4,
+        min_batch_size=1,
+        max_batch_size=8,
+        initial_concurrency=2,
+        min_concurrency=1,
+        max_concurrency=4,
+        latency_threshold_ms=0,
+    )
+    slot = await controller.acquire()
+    await asyncio.sleep(0.01)
+    await controller.release(slot)
+
+    assert controller.batch_size == 2
+
+
+@pytest.mark.asyncio
+async def test_in_flight_requests_never_exceed_limit(controller):
+    """Test that the number of concurrent requests stays within the controller's limit."""
+    in_flight, peak = 0, 0
+
+    async def request_fn(batch):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.001)
+        in_flight -= 1
+        return [item * 2 for item in batch], {"total_tokens": len(batch)}
+
+    results, usages = await run_adaptive_batches(controller, list(range(50)), request_fn)
+
+    assert results == [item * 2 for item in range(50)]
+    assert sum(usage["total_tokens"] for usage in usages) == 50
+    assert peak <= controller.max_concurrency
+    assert controller.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_pre_cut_batches_are_streamed_within_the_limit(controller):
+    """Test that fixed batches are paced by the controller and yielded as they complete."""
+    in_flight, peak = 0, 0
+
+    async def request_fn(indices, batch):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        # Earlier batches take longer, so they complete out of order
+        await asyncio.sleep(0.001 * (10 - indices[0]))
+        in_flight -= 1
+        return [item * 2 for item in batch], {"total_tokens": len(batch)}
+
+    batches = [([idx], [idx]) for idx in range(10)]
+    streamed = [
+        batch
+        async for batch in stream_adaptive_batches(
+            controller, list(range(10)), request_fn, batches=batches
+        )
+    ]
+
+    assert sorted(indices[0] for indices, _, _ in streamed) == list(range(10))
+    assert [indices for indices, _, _ in streamed] != [[idx] for idx in range(10)]
+    assert all(output == [indices[0] * 2] for indices, output, _ in streamed)
+    # The limit grows from two as fast batches complete, but never past its maximum
+    assert 2 <= peak <= 4
+    assert controller.in_flight == 0
+    # Every completed batch was fed back as a latency sample
+    assert controller.batch_size == 8
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_error_is_raised_and_recorded(controller):
+    """Test that a 429 fails the call and is fed back into the controller."""
+
+    async def request_fn(batch):
+        raise RateLimited()
+
+    with pytest.raises(RateLimited):
+        await run_adaptive_batches(
+            controller, list(range(10)), request_fn, rate_limit_errors=(RateLimited,)
+        )
+
+    assert controller.rate_limited >= 1
+    assert controller.in_flight == 0
+
+
+class CancelledOnSecondAcquire(AIMDController):
+    """Delivers a cancellation at the second acquire, before the first batch has started."""
+
+    acquired = 0
+
+    async def acquire(self):
+        self.acquired += 1
+        if self.acquired == 2:
+            raise asyncio.CancelledError()
+        return await super().acquire()
+
+
+@pytest.mark.asyncio
+async def test_cancelled_call_returns_permits_of_unstarted_batches():
+    """Test that a batch cancelled before its task starts still hands its permit back."""
+    controller = CancelledOnSecondAcquire(
+        initial_batch_size=2,
+        min_batch_size=1,
+        max_batch_size=2,
+        initial_concurrency=2,
+        min_concurrency=1,
+        max_concurrency=2,
+        latency_threshold_ms=10_000,
+    )
+
+    async def request_fn(batch):
+        return batch, {}
+
+    with pytest.raises(asyncio.CancelledError):
+        await run_adaptive_batches(controller, list(range(10)), request_fn)
+
+    assert controller.in_flight == 0
+
+
+def test_release_wakes_waiters_on_other_loops():
+    """Test that a permit released on one event loop wakes a waiter parked on another."""
+    controller = AIMDController(
+        initial_batch_size=1,
+        min_batch_size=1,
+        max_batch_size=1,
+        initial_concurrency=1,
+        min_concurrency=1,
+        max_concurrency=1,
+        latency_threshold_ms=10_000,
+    )
+    loop = asyncio.new_event_loop()
+    slot = loop.run_until_complete(controller.acquire())
+    acquired = threading.Event()
+
+    async def wait_for_permit():
+        await controller.acquire()
+        acquired.set()
+
+    waiter = threading.Thread(
+        target=lambda: asyncio.run(asyncio.wait_for(wait_for_permit(), timeout=5))
+    )
+    waiter.start()
+    deadline = time.monotonic() + 5
+    while not controller._waiters and time.monotonic() < deadline:
+        time.sleep(0.001)
+
+    loop.run_until_complete(controller.release(slot))
+    waiter.join(timeout=5)
+    loop.close()
+
+    assert acquired.is_set()
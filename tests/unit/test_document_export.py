@@ -0,0 +1,126 @@
+"""
+Unit tests for the point in time + search_after document exporter.
+"""
+
+import asyncio
+
+import pytest
+
+pytest.importorskip("platform_commons")
+
+from src.Shared.Exceptions import ElasticsearchQueryException  # noqa: E402
+from src.SinkConnectors.document_export import DocumentExporter  # noqa: E402
+from src.SinkConnectors.ElasticsearchSink import ElasticsearchSink  # noqa: E402
+
+
+class FakePitClient:
+    """Serves ``count`` documents through a point in time, split into slices by position."""
+
+    def __init__(self, count: int, fail_after: int = None):
+        self.count = count
+        self.fail_after = fail_after
+        self.bodies = []
+        self.open_pits = set()
+
+    def open_point_in_time(self, index, keep_alive):
+        self.open_pits.add("pit-0")
+        return {"id": "pit-0"}
+
+    def close_point_in_time(self, id):
+        self.open_pits.discard(id)
+
+    def search(self, body):
+        self.bodies.append(body)
+        if self.fail_after is not None and len(self.bodies) > self.fail_after:
+            raise RuntimeError("search failed")
+        slicing = body.get("slice", {"id": 0, "max": 1})
+        after = body.get("search_after", [-1])[0]
+        positions = [
+            idx
+            for idx in range(self.count)
+            if idx % slicing["max"] == slicing["id"] and idx > after
+        ][: body["size"]]
+        hits = [
+            {"_id": f"doc_{idx}", "_source": {"metadata": {}}, "sort": [idx]} for idx in positions
+        ]
+        return {"pit_id": "pit-0", "hits": {"hits": hits}}
+
+
+class FakeAsyncPitClient(FakePitClient):
+    async def open_point_in_time(self, index, keep_alive):
+        return FakePitClient.open_point_in_time(self, index, keep_alive)
+
+    async def close_point_in_time(self, id):
+        FakePitClient.close_point_in_time(self, id)
+
+    async def search(self, body):
+        await asyncio.sleep(0)
+        return FakePitClient.search(self, body)
+
+
+def exported_ids(pages) -> list[str]:
+    return [hit["_id"] for page in pages for hit in page]
+
+
+def test_pages_through_every_document_with_search_after():
+    client = FakePitClient(count=25)
+    exporter = DocumentExporter(client, "test-index", page_size=10, source={"excludes": ["vector"]})
+
+    ids = exported_ids(exporter.pages())
+
+    assert ids == [f"doc_{idx}" for idx in range(25)]
+    assert [body.get("search_after") for body in client.bodies] == [None, [9], [19]]
+    assert client.bodies[0]["pit"] == {"id": "pit-0", "keep_alive": "2m"}
+    assert client.bodies[0]["_source"] == {"excludes": ["vector"]}
+    assert "slice" not in client.bodies[0]
+    assert client.open_pits == set()
+
+
+def test_slices_are_read_in_parallel_without_overlap():
+    client = FakePitClient(count=103)
+    exporter = DocumentExporter(client, "test-index", page_size=10, slices=3)
+
+    ids = exported_ids(exporter.pages())
+
+    assert sorted(ids) == sorted(f"doc_{idx}" for idx in range(103))
+    assert {body["slice"]["id"] for body in client.bodies} == {0, 1, 2}
+    assert client.open_pits == set()
+
+
+def test_abandoned_and_failed_exports_close_the_point_in_time():
+    client = FakePitClient(count=100)
+    pages = DocumentExporter(client, "test-index", page_size=10, slices=2).pages()
+    next(pages)
+    pages.close()
+    assert client.open_pits == set()
+
+    client = FakePitClient(count=100, fail_after=2)
+    with pytest.raises(RuntimeError):
+        exported_ids(DocumentExporter(client, "test-index", page_size=10).pages())
+    assert client.open_pits == set()
+
+
+@pytest.mark.asyncio
+async def test_async_export_reads_every_slice():
+    client = FakeAsyncPitClient(count=57)
+    exporter = DocumentExporter(client, "test-index", page_size=5, slices=4)
+
+    ids = [hit["_id"] async for page in exporter.apages() for hit in page]
+
+    assert sorted(ids) == sorted(f"doc_{idx}" for idx in range(57))
+    assert client.open_pits == set()
+
+
+def test_sink_export_yields_search_results():
+    sink = ElasticsearchSink(hosts=["http://localhost:9200"], index="test_index")
+    sink.es_client = FakePitClient(count=12)
+
+    results = list(sink.export_documents(page_size=5, slices=2))
+
+    assert sorted(result.id for result in results) == sorted(f"doc_{i}" for i in range(12))
+    assert all(result.score is None and result.vector is None for result in results)
+    assert sink.es_client.bodies[0]["_source"] == {"excludes": ["vector"]}
+
+    sink.es_client = FakePitClient(count=12, fail_after=0)
+    with pytest.raises(ElasticsearchQueryException):
+        list(sink.export_documents())
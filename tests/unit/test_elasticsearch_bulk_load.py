@@ -0,0 +1,160 @@
+"""
+Unit tests for the Elasticsearch sink's bulk-load session and write refresh policy.
+"""
+
+import numpy as np
+import pytest
+
+pytest.importorskip("platform_commons")
+
+from src.Shared.RagVector import RagVector  # noqa: E402
+from src.SinkConnectors.ElasticsearchSink import ElasticsearchSink  # noqa: E402
+
+
+class FakeIndices:
+    def __init__(self, settings=None, fail_merge=False):
+        self.settings = dict(settings or {})
+        self.fail_merge = fail_merge
+        self.calls = []
+
+    def exists(self, index):
+        return True
+
+    def get_mapping(self, index):
+        return {index: {"mappings": {"properties": {"vector": {"type": "dense_vector"}}}}}
+
+    def get_settings(self, index, flat_settings):
+        return {index: {"settings": dict(self.settings)}}
+
+    def put_settings(self, index, settings):
+        self.calls.append(("put_settings", settings))
+        for name, value in settings.items():
+            if value is None:
+                self.settings.pop(name, None)
+            else:
+                self.settings[name] = value
+
+    def refresh(self, index):
+        self.calls.append(("refresh", index))
+
+    def forcemerge(self, index, max_num_segments):
+        self.calls.append(("forcemerge", max_num_segments))
+        if self.fail_merge:
+            raise RuntimeError("merge timed out")
+
+
+class FakeClient:
+    def __init__(self, indices):
+        self.indices = indices
+        self.bulk_options = []
+
+    def options(self, **kwargs):
+        return self
+
+    def bulk(self, operations, **options):
+        self.bulk_options.append(options)
+        return {"errors": False, "items": [{"index": {"status": 201}} for _ in operations]}
+
+
+def make_sink(indices, **settings) -> ElasticsearchSink:
+    sink = ElasticsearchSink(hosts=["http://localhost:9200"], index="test_index", **settings)
+    sink.es_client = FakeClient(indices)
+    sink._bulk_writer = sink._make_bulk_writer(sink.es_client)
+    return sink
+
+
+def make_vectors() -> list[RagVector]:
+    return [RagVector(id="doc", vector=np.ones(4, dtype=np.float32), metadata={})]
+
+
+def test_bulk_load_suspends_and_restores_settings():
+    indices = FakeIndices(settings={"index.number_of_replicas": "1"})
+    sink = make_sink(indices, bulk_load_drop_replicas=True)
+
+    with sink.bulk_load() as state:
+        assert indices.settings == {
+            "index.refresh_interval": "-1",
+            "index.number_of_replicas": 0,
+        }
+        sink.store(make_vectors())
+
+    # The unset refresh interval goes back to the default; replicas to their old count
+    assert state == {"index.refresh_interval": None, "index.number_of_replicas": "1"}
+    assert indices.settings == {"index.number_of_replicas": "1"}
+    assert [call[0] for call in indices.calls] == [
+        "put_settings",
+        "refresh",
+        "forcemerge",
+        "put_settings",
+    ]
+    # Writes during the load do not wait for refreshes that are suspended
+    assert sink.es_client.bulk_options == [{}]
+
+
+def test_settings_are_restored_when_the_load_fails():
+    indices = FakeIndices(settings={"index.refresh_interval": "30s"}, fail_merge=True)
+    sink = make_sink(indices)
+
+    with pytest.raises(ValueError):
+        with sink.bulk_load():
+            raise ValueError("embedding failed")
+
+    assert indices.settings == {"index.refresh_interval": "30s"}
+    assert indices.calls[-1] == ("put_settings", {"index.refresh_interval": "30s"})
+
+
+def test_suspended_refresh_interval_is_restored_as_it_was():
+    indices = FakeIndices(
+        settings={"index.refresh_interval": "-1", "index.number_of_replicas": "1"}
+    )
+    sink = make_sink(indices, bulk_load_drop_replicas=True)
+
+    with sink.bulk_load() as state:
+        sink.store(make_vectors())
+
+    assert state == {"index.refresh_interval": "-1", "index.number_of_replicas": "1"}
+    assert indices.settings == {"index.refresh_interval": "-1", "index.number_of_replicas": "1"}
+    calls = len(indices.calls)
+
+    # The restored replica count shows the load has ended, despite the suspended refreshes
+    make_sink(indices, bulk_load_drop_replicas=True).end_bulk_load(state)
+
+    assert len(indices.calls) == calls
+
+
+def test_resumed_load_is_ended_by_another_instance():
+    indices = FakeIndices()
+    state = make_sink(indices).begin_bulk_load()
+
+    worker_sink = make_sink(indices)
+    worker_sink.resume_bulk_load(state)
+    worker_sink.store(make_vectors())
+    worker_sink.end_bulk_load(state)
+    worker_sink.store(make_vectors())
+
+    assert worker_sink.es_client.bulk_options == [{}, {"refresh": "wait_for"}]
+    assert indices.settings == {}
+
+
+def test_ended_load_is_not_merged_again():
+    indices = FakeIndices(settings={"index.refresh_interval": "30s"})
+    sink = make_sink(indices)
+    state = sink.begin_bulk_load()
+    sink.end_bulk_load(state)
+    calls = len(indices.calls)
+
+    # A failure handler ending the same load again
+    make_sink(indices).end_bulk_load(state)
+
+    assert len(indices.calls) == calls
+    assert indices.settings == {"index.refresh_interval": "30s"}
+
+
+def test_incremental_writes_use_the_refresh_policy():
+    sink = make_sink(FakeIndices(), refresh_policy="false")
+    sink.store(make_vectors())
+
+    assert sink.es_client.bulk_options == [{}]
+    assert "refresh" not in [call[0] for call in sink.es_client.indices.calls]
+    with pytest.raises(ValueError):
+        make_sink(FakeIndices(), refresh_policy="sometimes")
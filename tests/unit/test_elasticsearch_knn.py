@@ -0,0 +1,183 @@
+"""
+Unit tests for the Elasticsearch sink's dense_vector mapping and kNN queries.
+"""
+
+import numpy as np
+import pytest
+
+pytest.importorskip("platform_commons")
+
+from src.Shared.RagVector import RagVector  # noqa: E402
+from src.Shared.vector_transform import VectorTransform  # noqa: E402
+from src.Shared.vector_transform_config_schema import VectorTransformConfigSchema  # noqa: E402
+from src.SinkConnectors.ElasticsearchSink import ElasticsearchSink  # noqa: E402
+from src.SinkConnectors.filter_utils import FilterCondition, FilterOperator  # noqa: E402
+from src.SinkConnectors.hybrid_search import HybridQuery  # noqa: E402
+
+
+class FakeIndices:
+    def __init__(self, exists: bool, mapping=None):
+        self._exists = exists
+        self.mapping = mapping
+        self.created = []
+        self.exists_calls = 0
+
+    def exists(self, index):
+        self.exists_calls += 1
+        return self._exists
+
+    def create(self, index, mappings=None):
+        self.created.append((index, mappings))
+        self._exists = True
+
+    def get_mapping(self, index):
+        return {index: {"mappings": self.mapping or {}}}
+
+
+class FakeClient:
+    def __init__(self, indices=None, responses=None):
+        self.indices = indices
+        self.responses = responses
+        self.searches = None
+        self.body = None
+
+    def msearch(self, index, searches):
+        self.searches = searches
+        return {"responses": self.responses}
+
+    def search(self, index, body):
+        self.body = body
+        return self.responses[0]
+
+
+def make_sink(**settings) -> ElasticsearchSink:
+    return ElasticsearchSink(hosts=["http://localhost:9200"], index="test_index", **settings)
+
+
+def transformed(quantization: str, dims: int = 64) -> RagVector:
+    vector = RagVector(id="doc", vector=np.random.rand(dims).astype(np.float32), metadata={})
+    config = VectorTransformConfigSchema(quantization=quantization)
+    return VectorTransform(config).apply([vector])[0]
+
+
+@pytest.mark.parametrize(
+    "quantization, expected",
+    [("none", (64, "float")), ("int8", (64, "byte")), ("binary", (64, "bit"))],
+)
+def test_vector_shape_follows_the_transform(quantization, expected):
+    assert ElasticsearchSink.vector_shape(transformed(quantization)) == expected
+
+
+def test_index_mapping_declares_an_hnsw_dense_vector():
+    sink = make_sink(similarity="dot_product", hnsw_m=32, hnsw_ef_construction=200)
+
+    vector_field = sink.index_mapping(768)["properties"]["vector"]
+
+    assert vector_field == {
+        "type": "dense_vector",
+        "dims": 768,
+        "element_type": "float",
+        "index": True,
+        "similarity": "dot_product",
+        "index_options": {"type": "hnsw", "m": 32, "ef_construction": 200},
+    }
+    assert sink.index_mapping(256, "bit")["properties"]["vector"]["similarity"] == "l2_norm"
+
+
+def test_index_mapping_maps_metadata_strings_as_keywords():
+    (template,) = make_sink().index_mapping(768)["dynamic_templates"]
+
+    assert template["metadata_strings"]["path_match"] == "metadata.*"
+    assert template["metadata_strings"]["match_mapping_type"] == "string"
+    assert template["metadata_strings"]["mapping"]["type"] == "keyword"
+
+
+def test_missing_index_is_created_once_from_the_declared_shape():
+    sink = make_sink()
+    sink.es_client = FakeClient(FakeIndices(exists=False))
+    sink.configure_vectors(1024, "byte")
+
+    sink.ensure_index_exists()
+    sink.ensure_index_exists()
+
+    ((index, mappings),) = sink.es_client.indices.created
+    assert index == "test_index"
+    assert mappings["properties"]["vector"]["dims"] == 1024
+    assert mappings["properties"]["vector"]["element_type"] == "byte"
+    assert sink.es_client.indices.exists_calls == 1
+
+
+def test_stored_vectors_take_precedence_over_the_declared_shape():
+    sink = make_sink()
+    sink.es_client = FakeClient(FakeIndices(exists=False))
+    sink.configure_vectors(1024)
+
+    sink.ensure_index_exists([transformed("none", dims=768)])
+
+    ((_, mappings),) = sink.es_client.indices.created
+    assert mappings["properties"]["vector"]["dims"] == 768
+
+
+def test_search_body_is_a_knn_query_with_bounded_candidates():
+    sink = make_sink(num_candidates=50)
+    filters = [FilterCondition(field="metadata.lang", operator=FilterOperator.EQUAL, value="en")]
+
+    body = sink._search_body([0.1, 0.2], 10, filters)
+
+    assert body["size"] == 10
+    assert body["knn"]["field"] == "vector"
+    assert body["knn"]["k"] == 10
+    assert body["knn"]["num_candidates"] == 50
+    assert body["knn"]["filter"] == {"bool": {"filter": [{"term": {"metadata.lang": "en"}}]}}
+    assert sink._search_body([0.1], 80, [])["knn"]["num_candidates"] == 80
+    assert sink._search_body([0.1], 5, [], num_candidates=50_000)["knn"]["num_candidates"] == 10_000
+
+
+def response(*ids):
+    return {
+        "hits": {
+            "hits": [
+                {"_id": doc_id, "_score": 1.0, "_source": {"metadata": {}, "text": doc_id}}
+                for doc_id in ids
+            ]
+        }
+    }
+
+
+def test_hybrid_search_fuses_knn_and_bm25_from_one_msearch():
+    sink = make_sink()
+    sink.es_client = FakeClient(responses=[response("a", "b"), response("SKU-123", "a")])
+    hybrid = HybridQuery(text="SKU-123", knn_weight=1.0, text_weight=1.0, rank_window_size=20)
+
+    results = sink.search([0.1, 0.2], 2, hybrid=hybrid)
+
+    knn_search, text_search = sink.es_client.searches[1], sink.es_client.searches[3]
+    assert knn_search["knn"]["k"] == 20
+    assert text_search["query"]["bool"]["must"] == [{"match": {"text": "SKU-123"}}]
+    assert [result.id for result in results] == ["a", "SKU-123"]
+    assert results[1].text == "SKU-123"
+
+
+def test_vectors_are_left_out_of_hits_unless_requested():
+    assert ElasticsearchSink.source_filter() == {"excludes": ["vector"]}
+    assert ElasticsearchSink.source_filter(include_vectors=True) is True
+    assert ElasticsearchSink.source_filter(fields=["text"]) == {"includes": ["text"]}
+    assert ElasticsearchSink.source_filter(True, ["text"]) == {"includes": ["text", "vector"]}
+
+    sink = make_sink()
+    assert sink._search_body([0.1], 5, [])["_source"] == {"excludes": ["vector"]}
+
+    sink.es_client = FakeClient(responses=[response("a")])
+    sink.get_documents(size=5, fields=["metadata.title"])
+    assert sink.es_client.body["_source"] == {"includes": ["metadata.title"]}
+
+
+def test_hybrid_searches_share_the_source_filter():
+    sink = make_sink()
+    sink.es_client = FakeClient(responses=[response("a"), response("a")])
+
+    results = sink.search([0.1], 1, hybrid=HybridQuery(text="a"), fields=["text"])
+
+    assert sink.es_client.searches[1]["_source"] == {"includes": ["text"]}
+    assert sink.es_client.searches[3]["_source"] == {"includes": ["text"]}
+    assert results[0].vector is None
@@ -0,0 +1,329 @@
+"""
+Unit tests for streaming embeddings batch by batch from the cache, the embed model and
+into the sink.
+"""
+
+import asyncio
+
+import numpy as np
+import pytest
+
+pytest.importorskip("platform_commons")
+pytest.importorskip("src.Pipelines.IngestPipeline")
+
+from platform_commons.auth.user import User  # noqa: E402
+
+from src.EmbedConnectors import HamEmbedModel as ham_module  # noqa: E402
+from src.EmbedConnectors import OpenAIEmbedModel as openai_module  # noqa: E402
+from src.EmbedConnectors import commons  # noqa: E402
+from src.EmbedConnectors.chunk_dedup import ChunkDeduplicator  # noqa: E402
+from src.EmbedConnectors.concurrency import AIMDController, report_rate_limited  # noqa: E402
+from src.EmbedConnectors.commons import stream_with_cache  # noqa: E402
+from src.EmbedConnectors.embedding_cache import EmbeddingCache  # noqa: E402
+from src.EmbedConnectors.HamEmbedModel import HamEmbedModel  # noqa: E402
+from src.EmbedConnectors.input_guard import InputGuard  # noqa: E402
+from src.EmbedConnectors.OpenAIEmbedModel import OpenAIEmbedModel  # noqa: E402
+from src.Pipelines.IngestPipeline import Pipeline  # noqa: E402
+from src.Shared.Exceptions import EmbeddingSizeMismatchError, RateLimitError  # noqa: E402
+from src.Shared.RagDocument import RagDocument  # noqa: E402
+from src.Shared.vector_transform import VectorTransform  # noqa: E402
+
+MODEL = "text-embedding-ada-002"
+
+
+@pytest.fixture(autouse=True)
+def no_metrics(monkeypatch):
+    monkeypatch.setattr(commons.settings, "metrics_enabled", False)
+
+
+def vector_of(text: str) -> list[float]:
+    """A vector that identifies the text it was embedded from."""
+    return [float(len(text)), float(sum(map(ord, text)) % 997)]
+
+
+def make_stream_fn(batches: list[list[int]], release: asyncio.Event = None, fail_at: int = None):
+    """
+    Build a stream function answering its inputs in the given batches of positions. With
+    ``release``, batches after the first wait until the consumer sets it; with ``fail_at``,
+    the batch at that position raises instead.
+    """
+    seen: list[list[str]] = []
+
+    async def stream_fn(input_list: list[str]):
+        seen.append(input_list)
+        for number, indices in enumerate(batches):
+            if number and release is not None:
+                await release.wait()
+            if number == fail_at:
+                raise RuntimeError("embeddings request failed")
+            yield indices, [vector_of(input_list[idx]) for idx in indices]
+
+    stream_fn.seen = seen
+    return stream_fn
+
+
+@pytest.mark.asyncio
+async def test_batches_are_yielded_as_they_complete():
+    release = asyncio.Event()
+    stream = stream_with_cache(
+        ["a", "bb", "ccc"],
+        MODEL,
+        768,
+        make_stream_fn([[2], [0, 1]], release=release),
+        cache=EmbeddingCache(max_memory_items=10),
+    )
+
+    # The second batch is only produced once the first one has been consumed
+    assert await asyncio.wait_for(stream.__anext__(), timeout=1) == ([2], [vector_of("ccc")])
+    release.set()
+    assert await asyncio.wait_for(stream.__anext__(), timeout=1) == (
+        [0, 1],
+        [vector_of("a"), vector_of("bb")],
+    )
+    with pytest.raises(StopAsyncIteration):
+        await stream.__anext__()
+
+
+@pytest.mark.asyncio
+async def test_miss_positions_map_back_to_the_input_around_cache_hits():
+    texts = ["hit one", "miss one", "hit two", "miss two", "miss three"]
+    cache = EmbeddingCache(max_memory_items=10)
+    cache.set_many(
+        {
+            EmbeddingCache.cache_key(text, MODEL, 768): vector_of(text)
+            for text in ("hit one", "hit two")
+        }
+    )
+    stream_fn = make_stream_fn([[2, 0], [1]])
+
+    batches = [batch async for batch in stream_with_cache(texts, MODEL, 768, stream_fn, cache)]
+
+    # Only misses reach the provider, and the hits come first as one batch
+    assert stream_fn.seen == [["miss one", "miss two", "miss three"]]
+    assert [indices for indices, _ in batches] == [[0, 2], [4, 1], [3]]
+    for indices, vectors in batches:
+        assert [list(vector) for vector in vectors] == [vector_of(texts[idx]) for idx in indices]
+    # Streamed vectors are cached as their batch completes
+    assert all(
+        vector is not None
+        for vector in cache.get_many([EmbeddingCache.cache_key(text, MODEL, 768) for text in texts])
+    )
+
+
+@pytest.mark.asyncio
+async def test_stream_errors_reach_the_consumer():
+    stream = stream_with_cache(
+        ["a", "b"], MODEL, 768, make_stream_fn([[0], [1]], fail_at=1), EmbeddingCache(10)
+    )
+
+    assert await stream.__anext__() == ([0], [vector_of("a")])
+    with pytest.raises(RuntimeError):
+        await stream.__anext__()
+
+    async def short_stream(input_list):
+        yield [0, 1], [vector_of("a")]
+
+    with pytest.raises(EmbeddingSizeMismatchError):
+        async for _ in stream_with_cache(["a", "b"], MODEL, 768, short_stream, EmbeddingCache(10)):
+            pass
+
+
+@pytest.mark.asyncio
+async def test_embed_stream_yields_cached_and_requested_batches(monkeypatch):
+    texts = ["stream cached chunk", "stream first chunk", "stream second chunk"]
+    cache = EmbeddingCache(max_memory_items=10)
+    cache.set_many({EmbeddingCache.cache_key(texts[0], MODEL, 768): vector_of(texts[0])})
+    # Keeps the process-wide cache, and its disk tier, out of the test
+    monkeypatch.setattr(stream_with_cache, "__defaults__", (cache,))
+
+    async def stream_openai_embeddings(self, model, input_list, user, httpx_client, **kwargs):
+        for idx in reversed(range(len(input_list))):
+            yield [idx], [{"embedding": vector_of(input_list[idx])}], {"total_tokens": 1}
+
+    monkeypatch.setattr(OpenAIEmbedModel, "stream_openai_embeddings", stream_openai_embeddings)
+    model = OpenAIEmbedModel(api_key="test")
+    documents = [
+        RagDocument(id=str(idx), content=text, metadata={}) for idx, text in enumerate(texts)
+    ]
+
+    batches = [batch async for batch in model.embed_stream(documents)]
+
+    assert [indices for indices, _ in batches] == [[0], [2], [1]]
+    for indices, vectors in batches:
+        assert [list(vector) for vector in vectors] == [vector_of(texts[idx]) for idx in indices]
+
+
+def make_controller() -> AIMDController:
+    return AIMDController(
+        initial_batch_size=1,
+        min_batch_size=1,
+        max_batch_size=1,
+        initial_concurrency=2,
+        min_concurrency=1,
+        max_concurrency=2,
+        latency_threshold_ms=10_000,
+        batch_step=1,
+    )
+
+
+@pytest.mark.asyncio
+async def test_stream_openai_embeddings_is_paced_by_the_endpoint_controller(monkeypatch):
+    controller = make_controller()
+    monkeypatch.setattr(openai_module, "get_concurrency_controller", lambda *args: controller)
+    monkeypatch.setattr(openai_module.config, "openai_embeddings_batch_size", 1)
+    in_flight, peak = 0, 0
+
+    async def request_openai_batch(self, model, batch, user, httpx_client, **kwargs):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        if batch == ["chunk 3"]:
+            # A 429 absorbed by a retry is still reported to the controller
+            report_rate_limited()
+        await asyncio.sleep(0.001)
+        in_flight -= 1
+        return [{"embedding": vector_of(text)} for text in batch], {"total_tokens": 1}
+
+    monkeypatch.setattr(OpenAIEmbedModel, "_request_openai_batch", request_openai_batch)
+    inputs = [f"chunk {idx}" for idx in range(8)]
+
+    batches = [
+        batch
+        async for batch in OpenAIEmbedModel(api_key="test").stream_openai_embeddings(
+            "jina-v2-base", inputs, User(id="dummy", name="Dummy User"), httpx_client=object()
+        )
+    ]
+
+    assert sorted(idx for indices, _, _ in batches for idx in indices) == list(range(8))
+    assert peak == 2
+    assert controller.in_flight == 0
+    assert controller.rate_limited == 1
+
+
+@pytest.mark.asyncio
+async def test_stream_openai_embeddings_reports_a_failed_429(monkeypatch):
+    controller = make_controller()
+    monkeypatch.setattr(openai_module, "get_concurrency_controller", lambda *args: controller)
+
+    async def request_openai_batch(self, model, batch, user, httpx_client, **kwargs):
+        raise RateLimitError(router="openai", model=model, retry_after=1)
+
+    monkeypatch.setattr(OpenAIEmbedModel, "_request_openai_batch", request_openai_batch)
+
+    with pytest.raises(RateLimitError):
+        async for _ in OpenAIEmbedModel(api_key="test").stream_openai_embeddings(
+            "jina-v2-base", ["chunk"], User(id="dummy", name="Dummy User"), httpx_client=object()
+        ):
+            pass
+
+    assert controller.rate_limited == 1
+    assert controller.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_ham_embed_stream_defaults_to_batches_sized_by_the_controller(monkeypatch):
+    cache = EmbeddingCache(max_memory_items=10)
+    monkeypatch.setattr(stream_with_cache, "__defaults__", (cache,))
+    controller = make_controller()
+    controller.batch_size = controller.max_batch_size = 3
+    monkeypatch.setattr(ham_module, "get_concurrency_controller", lambda *args: controller)
+    monkeypatch.setattr(ham_module.config, "ham_embeddings_batch_size", 100)
+    requested: list[list[str]] = []
+
+    async def ham_headers(self):
+        return {}
+
+    async def request_ham_batch(self, model, batch, user, httpx_client, headers, **kwargs):
+        requested.append(batch)
+        return [{"embedding": vector_of(text)} for text in batch], {"total_tokens": 1}
+
+    monkeypatch.setattr(HamEmbedModel, "_ham_headers", ham_headers)
+    monkeypatch.setattr(HamEmbedModel, "_request_ham_batch", request_ham_batch)
+    texts = [f"ham stream chunk {idx}" for idx in range(7)]
+    documents = [
+        RagDocument(id=str(idx), content=text, metadata={}) for idx, text in enumerate(texts)
+    ]
+
+    batches = [batch async for batch in HamEmbedModel(api_key="test").embed_stream(documents)]
+
+    # The controller's batch size, not the static batch size, cuts the inputs
+    assert sorted(len(batch) for batch in requested) == [1, 3, 3]
+    assert sorted(idx for indices, _ in batches for idx in indices) == list(range(7))
+    for indices, vectors in batches:
+        assert [list(vector) for vector in vectors] == [vector_of(texts[idx]) for idx in indices]
+    assert controller.in_flight == 0
+
+
+class StreamingEmbedModel:
+    """Embed model yielding one batch per entry of ``batches``, failing at ``fail_at``."""
+
+    embed_name = MODEL
+
+    def __init__(self, batches: list[list[int]], fail_at: int = None):
+        self.stream_fn = make_stream_fn(batches, fail_at=fail_at)
+
+    async def embed_stream(self, documents: list[RagDocument]):
+        async for indices, vectors in self.stream_fn([doc.content for doc in documents]):
+            yield indices, [np.asarray(vector, dtype=np.float32) for vector in vectors]
+
+
+class RecordingSink:
+    def __init__(self):
+        self.writes: list[list] = []
+
+    async def astore(self, vectors) -> int:
+        self.writes.append([(vector.id, vector.text, vector.vector.tolist()) for vector in vectors])
+        return len(vectors)
+
+
+def make_pipeline(embed_model: StreamingEmbedModel, deduplicator: ChunkDeduplicator) -> Pipeline:
+    pipeline = Pipeline.__new__(Pipeline)
+    pipeline.embed_model = embed_model
+    pipeline.sink = RecordingSink()
+    pipeline.vector_transform = VectorTransform()
+    pipeline.input_guard = InputGuard(model=MODEL)
+    pipeline.deduplicator = deduplicator
+    return pipeline
+
+
+def make_chunks(texts: list[str]) -> list[RagDocument]:
+    return [
+        RagDocument(id=f"chunk-{idx}", content=text, metadata={}) for idx, text in enumerate(texts)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_embed_and_ingest_stores_each_batch_under_its_chunks():
+    deduplicator = ChunkDeduplicator(window_size=10)
+    remembered = deduplicator.plan(["footer"])
+    deduplicator.remember(remembered.keys[0], np.asarray(vector_of("footer"), dtype=np.float32))
+    texts = ["footer", "intro", "body", "intro", "summary"]
+    # The unique chunks to embed are intro, body and summary, completed out of order
+    pipeline = make_pipeline(StreamingEmbedModel([[2], [0, 1]]), deduplicator)
+
+    written = await pipeline.embed_and_ingest(make_chunks(texts))
+
+    assert written == 5
+    # The remembered footer is written first, then each batch as it is embedded
+    assert [[chunk_id for chunk_id, _, _ in write] for write in pipeline.sink.writes] == [
+        ["chunk-0"],
+        ["chunk-4"],
+        ["chunk-1", "chunk-3", "chunk-2"],
+    ]
+    for write in pipeline.sink.writes:
+        for _, text, vector in write:
+            assert vector == vector_of(text)
+
+
+@pytest.mark.asyncio
+async def test_embed_and_ingest_raises_after_storing_completed_batches():
+    pipeline = make_pipeline(
+        StreamingEmbedModel([[0], [1]], fail_at=1), ChunkDeduplicator(window_size=10)
+    )
+
+    with pytest.raises(RuntimeError):
+        await pipeline.embed_and_ingest(make_chunks(["first", "second"]))
+
+    assert [[chunk_id for chunk_id, _, _ in write] for write in pipeline.sink.writes] == [
+        ["chunk-0"]
+    ]
@@ -0,0 +1,98 @@
+"""
+Unit tests for the EmbeddingCache class.
+"""
+
+import numpy as np
+import pytest
+
+from src.EmbedConnectors.embedding_cache import EmbeddingCache
+
+
+def as_lists(vectors):
+    """Convert cached float32 vectors to lists for comparison."""
+    return [None if vector is None else vector.tolist() for vector in vectors]
+
+
+@pytest.fixture
+def disk_cache(tmp_path):
+    """Create an EmbeddingCache with a SQLite tier for testing."""
+    cache = EmbeddingCache(max_memory_items=2, db_path=str(tmp_path / "cache.sqlite3"))
+    yield cache
+    cache.close()
+
+
+def test_cache_key_normalises_whitespace():
+    """Test that keys ignore whitespace differences but not model or dimensions."""
+    key = EmbeddingCache.cache_key("hello   world\n", "jina-v2-base", 768)
+    assert key == EmbeddingCache.cache_key(" hello world", "jina-v2-base", 768)
+    assert key != EmbeddingCache.cache_key("hello world", "text-embedding-3-small", 768)
+    assert key != EmbeddingCache.cache_key("hello world", "jina-v2-base", 512)
+
+
+def test_memory_cache_hits_and_misses():
+    """Test lookups against the memory tier only."""
+    cache = EmbeddingCache(max_memory_items=10)
+    cache.set_many({"a": [0.5, 0.25]})
+
+    assert as_lists(cache.get_many(["a", "b", "a"])) == [[0.5, 0.25], None, [0.5, 0.25]]
+    assert cache.memory_hits == 2
+    assert cache.misses == 1
+
+
+def test_memory_cache_evicts_least_recently_used():
+    """Test that the memory tier is bounded."""
+    cache = EmbeddingCache(max_memory_items=2)
+    cache.set_many({"a": [1.0], "b": [2.0]})
+    cache.get_many(["a"])
+    cache.set_many({"c": [3.0]})
+
+    assert as_lists(cache.get_many(["a", "b", "c"])) == [[1.0], None, [3.0]]
+
+
+def test_disk_tier_serves_memory_evictions(disk_cache):
+    """Test that vectors evicted from memory are still served from disk."""
+    disk_cache.set_many({"a": [1.0], "b": [2.0], "c": [3.0]})
+
+    assert as_lists(disk_cache.get_many(["a"])) == [[1.0]]
+    assert disk_cache.disk_hits == 1
+
+
+def test_disk_tier_persists_across_instances(tmp_path):
+    """Test that the disk tier survives a process restart."""
+    db_path = str(tmp_path / "cache.sqlite3")
+    first = EmbeddingCache(max_memory_items=10, db_path=db_path)
+    first.set_many({"a": [0.5, 0.25]})
+    first.close()
+
+    second = EmbeddingCache(max_memory_items=10, db_path=db_path)
+    assert as_lists(second.get_many(["a"])) == [[0.5, 0.25]]
+    second.close()
+
+
+def test_disk_tier_evicts_by_size(tmp_path):
+    """Test that the disk tier stays within its byte budget."""
+    # Each single-float vector is stored as 4 bytes
+    cache = EmbeddingCache(max_memory_items=1, db_path=str(tmp_path / "c.db"), max_disk_bytes=12)
+    for idx in range(5):
+        cache.set_many({str(idx): [float(idx)]})
+
+    assert cache._disk_bytes <= 12
+    assert cache.get_many(["0"]) == [None]
+    assert as_lists(cache.get_many(["4"])) == [[4.0]]
+    cache.close()
+
+
+@pytest.mark.asyncio
+async def test_async_lookups(disk_cache):
+    """Test the async wrappers."""
+    await disk_cache.aset_many({"a": [1.0]})
+    assert as_lists(await disk_cache.aget_many(["a", "z"])) == [[1.0], None]
+
+
+def test_vectors_are_packed_float32(disk_cache):
+    """Test that vectors are stored and served as float32 arrays."""
+    disk_cache.set_many({"a": [1.0, 2.0], "b": [3.0], "c": [4.0]})
+
+    vector = disk_cache.get_many(["a"])[0]
+    assert vector.dtype == np.float32
+    assert vector.tolist() == [1.0, 2.0]
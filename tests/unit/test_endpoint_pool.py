@@ -0,0 +1,110 @@
+"""
+Unit tests for embeddings endpoint load balancing, circuit breaking and hedging.
+"""
+
+import asyncio
+
+import httpx
+import pytest
+
+pytest.importorskip("platform_commons")
+
+from src.EmbedConnectors.endpoint_pool import EndpointPool  # noqa: E402
+
+FAST = "https://fast.test/v1/embeddings"
+SLOW = "https://slow.test/v1/embeddings"
+
+
+def make_sender(delays: dict[str, float], statuses: dict[str, int] | None = None, calls=None):
+    """Build a send function answering each URL after a fixed delay."""
+
+    async def send(url: str) -> httpx.Response:
+        if calls is not None:
+            calls.append(url)
+        await asyncio.sleep(delays[url])
+        return httpx.Response((statuses or {}).get(url, 200), text=url)
+
+    return send
+
+
+@pytest.mark.asyncio
+async def test_requests_prefer_the_lowest_latency_replica():
+    """Test that once both replicas are scored, traffic goes to the faster one."""
+    pool = EndpointPool([SLOW, FAST])
+    calls: list[str] = []
+    send = make_sender({SLOW: 0.03, FAST: 0.001}, calls=calls)
+
+    await asyncio.gather(pool.call(send), pool.call(send))
+    calls.clear()
+    for _ in range(5):
+        await pool.call(send)
+
+    assert calls == [FAST] * 5
+
+
+@pytest.mark.asyncio
+async def test_failures_open_the_circuit():
+    """Test that a replica failing repeatedly stops receiving requests."""
+    pool = EndpointPool([FAST, SLOW], failure_threshold=2, reset_s=60)
+    fast = pool.endpoints[0]
+    for _ in range(2):
+        pool.choose()
+        pool.record(fast, None, failed=True)
+
+    assert pool.choose() is pool.endpoints[1]
+    assert pool.stats()["endpoints"][FAST]["circuit"] == "open"
+
+
+@pytest.mark.asyncio
+async def test_half_open_replica_gets_a_single_probe():
+    """Test that a replica whose circuit has expired is probed once and closed on success."""
+    pool = EndpointPool([FAST], failure_threshold=1, reset_s=0)
+    endpoint = pool.endpoints[0]
+    pool.choose()
+    pool.record(endpoint, None, failed=True)
+
+    probe = pool.choose()
+    assert probe.probing
+    pool.record(probe, 5.0, failed=False)
+
+    assert pool.stats()["endpoints"][FAST]["circuit"] == "closed"
+
+
+@pytest.mark.asyncio
+async def test_slow_request_is_hedged_to_another_replica():
+    """Test that a request outlasting the hedge delay is raced against a second replica."""
+    pool = EndpointPool([SLOW, FAST], hedging=True, hedge_min_samples=1, hedge_min_delay_ms=1)
+    pool._latencies.append(5.0)
+
+    response = await pool.call(make_sender({SLOW: 1.0, FAST: 0.001}))
+
+    assert response.text == FAST
+    assert pool.hedges == 1
+    assert pool.hedge_wins == 1
+    assert pool.endpoints[0].in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_server_error_falls_back_to_hedged_response():
+    """Test that a 5xx from one attempt does not win over a pending successful one."""
+    pool = EndpointPool([SLOW, FAST], hedging=True, hedge_min_samples=1, hedge_min_delay_ms=1)
+    pool._latencies.append(5.0)
+
+    response = await pool.call(
+        make_sender({SLOW: 0.02, FAST: 0.05}, statuses={SLOW: 503}), hedge=True
+    )
+
+    assert response.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_transport_error_is_raised_without_other_attempts():
+    """Test that a failed unhedged request surfaces its error and counts as a failure."""
+    pool = EndpointPool([FAST])
+
+    async def send(url: str) -> httpx.Response:
+        raise httpx.ConnectError("refused")
+
+    with pytest.raises(httpx.ConnectError):
+        await pool.call(send)
+    assert pool.endpoints[0].failures == 1
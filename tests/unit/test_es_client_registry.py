@@ -0,0 +1,57 @@
+"""
+Unit tests for the shared Elasticsearch client registry.
+"""
+
+import asyncio
+
+import pytest
+
+pytest.importorskip("platform_commons")
+
+from src.SinkConnectors.client_registry import ElasticsearchClientRegistry  # noqa: E402
+
+HOSTS = ["http://localhost:9200"]
+
+
+def make_registry() -> ElasticsearchClientRegistry:
+    return ElasticsearchClientRegistry(connections_per_node=4, request_timeout=5)
+
+
+def test_clients_are_shared_per_hosts_and_credentials():
+    registry = make_registry()
+
+    client = registry.get_client(HOSTS)
+
+    assert registry.get_client(list(HOSTS)) is client
+    assert registry.get_client(HOSTS, api_key="secret") is not client
+    assert registry.get_client(HOSTS, basic_auth=("user", "pass")) is not client
+    assert len(registry.stats()) == 3
+    registry.close()
+    assert registry.stats() == {}
+
+
+def test_credentials_are_not_kept_in_the_key():
+    key = ElasticsearchClientRegistry.client_key(HOSTS, api_key="secret")
+
+    assert "secret" not in key
+    assert key != ElasticsearchClientRegistry.client_key(HOSTS)
+
+
+def test_async_clients_are_replaced_on_a_new_loop():
+    registry = make_registry()
+
+    async def get_twice():
+        client = registry.get_async_client(HOSTS)
+        assert registry.get_async_client(HOSTS) is client
+        return client
+
+    first = asyncio.run(get_twice())
+    second = asyncio.run(get_twice())
+
+    assert first is not second
+
+    async def close():
+        await registry.aclose()
+
+    asyncio.run(close())
+    assert registry.stats() == {}
@@ -0,0 +1,120 @@
+"""
+Unit tests for compiling filter conditions into Elasticsearch filter context queries.
+"""
+
+import pytest
+
+from src.SinkConnectors.filter_compiler import cache_info, compile_filters, like_to_wildcard
+from src.SinkConnectors.filter_utils import (
+    FilterCondition,
+    FilterOperator,
+    dict_to_filter_condition,
+)
+
+
+def condition(field, operator, value=None) -> FilterCondition:
+    return FilterCondition(field=field, operator=operator, value=value)
+
+
+@pytest.mark.parametrize(
+    "operator, value, clause",
+    [
+        (FilterOperator.EQUAL, "en", {"term": {"f": "en"}}),
+        (FilterOperator.GREATER_THAN, 3, {"range": {"f": {"gt": 3}}}),
+        (FilterOperator.GREATER_THAN_OR_EQUAL, 3.5, {"range": {"f": {"gte": 3.5}}}),
+        (FilterOperator.LESS_THAN, "2024-01-01", {"range": {"f": {"lt": "2024-01-01"}}}),
+        (FilterOperator.LESS_THAN_OR_EQUAL, 3, {"range": {"f": {"lte": 3}}}),
+        (FilterOperator.IN, ["a", "b"], {"terms": {"f": ["a", "b"]}}),
+        (FilterOperator.IN, "a, b", {"terms": {"f": ["a", "b"]}}),
+        (FilterOperator.BETWEEN, [2020, 2024], {"range": {"f": {"gte": 2020, "lte": 2024}}}),
+        (FilterOperator.LIKE, "rep%_v1", {"wildcard": {"f": {"value": "rep*?v1"}}}),
+        (FilterOperator.IS_NOT_NULL, None, {"exists": {"field": "f"}}),
+    ],
+)
+def test_positive_operators_compile_to_filter_clauses(operator, value, clause):
+    assert compile_filters([condition("f", operator, value)]) == {"bool": {"filter": [clause]}}
+
+
+@pytest.mark.parametrize(
+    "operator, value, clause",
+    [
+        (FilterOperator.NOT_EQUAL, "en", {"term": {"f": "en"}}),
+        (FilterOperator.NOT_IN, [1, 2], {"terms": {"f": [1, 2]}}),
+        (FilterOperator.NOT_BETWEEN, [1, 2], {"range": {"f": {"gte": 1, "lte": 2}}}),
+        (FilterOperator.NOT_LIKE, "tmp%", {"wildcard": {"f": {"value": "tmp*"}}}),
+        (FilterOperator.IS_NULL, None, {"exists": {"field": "f"}}),
+    ],
+)
+def test_negated_operators_compile_to_must_not_clauses(operator, value, clause):
+    assert compile_filters([condition("f", operator, value)]) == {"bool": {"must_not": [clause]}}
+
+
+def test_conditions_are_combined_in_one_bool_query():
+    query = compile_filters(
+        [
+            condition("metadata.lang", FilterOperator.EQUAL, "en"),
+            condition("metadata.draft", FilterOperator.NOT_EQUAL, True),
+        ]
+    )
+
+    assert query == {
+        "bool": {
+            "filter": [{"term": {"metadata.lang": "en"}}],
+            "must_not": [{"term": {"metadata.draft": True}}],
+        }
+    }
+    assert compile_filters([]) is None
+
+
+def test_values_keep_their_types():
+    assert condition("f", FilterOperator.EQUAL, True).value is True
+    assert condition("f", FilterOperator.EQUAL, 1).value == 1
+    # True and 1 are equal in Python but must not share a cache entry
+    assert compile_filters([condition("f", FilterOperator.EQUAL, 1)]) == {
+        "bool": {"filter": [{"term": {"f": 1}}]}
+    }
+    assert compile_filters([condition("f", FilterOperator.EQUAL, True)]) == {
+        "bool": {"filter": [{"term": {"f": True}}]}
+    }
+
+
+def test_compiled_filters_are_cached_by_structure():
+    filters = [condition("metadata.n", FilterOperator.IN, [7, 8, 9])]
+    first = compile_filters(filters)
+    hits = cache_info().hits
+
+    again = compile_filters([condition("metadata.n", FilterOperator.IN, [7, 8, 9])])
+
+    assert again == first
+    assert cache_info().hits == hits + 1
+
+
+def test_callers_can_modify_a_cached_filter():
+    filters = [condition("metadata.n", FilterOperator.EQUAL, 7)]
+    first = compile_filters(filters)
+
+    first["bool"]["filter"].append({"term": {"metadata.m": 1}})
+
+    assert compile_filters(filters) == {"bool": {"filter": [{"term": {"metadata.n": 7}}]}}
+
+
+def test_like_patterns_escape_wildcard_characters():
+    assert like_to_wildcard("100\\% *done?") == "100% \\*done\\?"
+
+
+def test_operands_that_do_not_fit_the_operator_are_rejected():
+    with pytest.raises(ValueError):
+        compile_filters([condition("f", FilterOperator.BETWEEN, [1])])
+    with pytest.raises(ValueError):
+        compile_filters([condition("f", FilterOperator.LIKE, 5)])
+
+
+def test_operator_names_map_to_every_operator():
+    conditions = dict_to_filter_condition(
+        [
+            {"field": "f", "operator": "NOT_IN", "value": ["a"]},
+            {"field": "f", "operator": "IS_NULL"},
+        ]
+    )
+
+    assert [c.operator for c in conditions] == [FilterOperator.NOT_IN, FilterOperator.IS_NULL]
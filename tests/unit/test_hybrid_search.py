@@ -0,0 +1,37 @@
+"""
+Unit tests for weighted reciprocal rank fusion.
+"""
+
+import pytest
+
+from src.SinkConnectors.hybrid_search import reciprocal_rank_fusion
+
+
+def hits(*ids):
+    return [{"_id": doc_id, "_source": {"text": doc_id}} for doc_id in ids]
+
+
+def test_documents_found_by_both_rankings_come_first():
+    fused = reciprocal_rank_fusion(
+        [hits("a", "b", "c"), hits("c", "d")], weights=[1.0, 1.0], rank_constant=60, size=4
+    )
+
+    # b and d tie at rank 2; ties keep the order of the first ranking
+    assert [hit["_id"] for hit, _ in fused] == ["c", "a", "b", "d"]
+    assert fused[0][1] == pytest.approx(1 / 63 + 1 / 61)
+
+
+def test_weights_favour_one_ranking():
+    rankings = [hits("vector_hit"), hits("keyword_hit")]
+
+    by_vector = reciprocal_rank_fusion(rankings, weights=[2.0, 1.0], size=2)
+    by_keyword = reciprocal_rank_fusion(rankings, weights=[1.0, 2.0], size=2)
+
+    assert by_vector[0][0]["_id"] == "vector_hit"
+    assert by_keyword[0][0]["_id"] == "keyword_hit"
+
+
+def test_size_limits_the_fused_results():
+    fused = reciprocal_rank_fusion([hits("a", "b", "c"), []], weights=[1.0, 1.0], size=2)
+
+    assert [hit["_id"] for hit, _ in fused] == ["a", "b"]
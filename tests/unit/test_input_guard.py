@@ -0,0 +1,75 @@
+"""
+Unit tests for the pre-flight embedding input token guard.
+"""
+
+import pytest
+
+pytest.importorskip("platform_commons")
+
+from src.EmbedConnectors.input_guard import InputGuard  # noqa: E402
+from src.EmbedConnectors.token_batching import count_tokens  # noqa: E402
+from src.Shared.Exceptions import EmbeddingInputTooLongError  # noqa: E402
+from src.Shared.RagDocument import RagDocument  # noqa: E402
+
+MODEL = "jina-v2-base"
+LONG_TEXT = " ".join(f"word{idx}" for idx in range(200))
+
+
+@pytest.fixture
+def documents():
+    """Create one short chunk and one chunk far over a 50 token limit."""
+    return [
+        RagDocument(id="short", content="A  short\n chunk", metadata={"page": 1}),
+        RagDocument(id="long", content=LONG_TEXT, metadata={"page": 2}),
+    ]
+
+
+def test_truncate_keeps_leading_tokens(documents):
+    """Test that oversized inputs are cut to the limit and whitespace is collapsed."""
+    guarded, report = InputGuard(MODEL, policy="truncate", max_tokens=50).apply(documents)
+
+    assert [document.id for document in guarded] == ["short", "long"]
+    assert guarded[0].content == "A short chunk"
+    assert count_tokens([guarded[1].content], MODEL)[0] <= 50
+    assert LONG_TEXT.startswith(guarded[1].content)
+    assert report.truncated == 1
+
+
+def test_split_creates_suffixed_chunks(documents):
+    """Test that oversized inputs become several chunks covering the whole text."""
+    guarded, report = InputGuard(MODEL, policy="split", max_tokens=50).apply(documents)
+    parts = guarded[1:]
+
+    assert [part.id for part in parts] == [f"long_{idx}" for idx in range(len(parts))]
+    assert len(parts) > 1
+    assert "".join(part.content for part in parts) == LONG_TEXT
+    assert all(part.metadata == {"page": 2} for part in parts)
+    assert report.split == 1
+
+
+def test_drop_leaves_oversized_inputs_out(documents):
+    """Test that dropped inputs are reported by chunk ID."""
+    guarded, report = InputGuard(MODEL, policy="drop", max_tokens=50).apply(documents)
+
+    assert [document.id for document in guarded] == ["short"]
+    assert report.dropped_ids == ["long"]
+
+
+def test_error_policy_raises(documents):
+    """Test that the error policy rejects oversized inputs."""
+    with pytest.raises(EmbeddingInputTooLongError):
+        InputGuard(MODEL, policy="error", max_tokens=50).apply(documents)
+
+
+def test_unchanged_documents_are_passed_through():
+    """Test that chunks needing no change are not copied."""
+    document = RagDocument(id="a", content="already clean", metadata={})
+    guarded, _ = InputGuard(MODEL).apply([document])
+
+    assert guarded[0] is document
+
+
+def test_rejects_unknown_policy():
+    """Test that only supported oversize policies can be configured."""
+    with pytest.raises(ValueError):
+        InputGuard(MODEL, policy="summarise")
@@ -0,0 +1,70 @@
+"""
+Unit tests for the offline LocalHashEmbedModel and the embedding stub server.
+"""
+
+import base64
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+# The connector package imports the internal platform_commons library
+pytest.importorskip("platform_commons")
+
+from src.EmbedConnectors.LocalHashEmbedModel import LocalHashEmbedModel, hash_embedding  # noqa: E402
+from src.Shared.RagDocument import RagDocument  # noqa: E402
+from tests.performance.embedding_stub_server import StubSettings, create_app  # noqa: E402
+
+
+def test_hash_embedding_is_deterministic_unit_vector():
+    """Test that the same text always maps to the same normalised vector."""
+    vector = hash_embedding("hello world", 64)
+
+    assert vector.dtype == np.float32
+    assert vector.shape == (64,)
+    assert np.linalg.norm(vector) == pytest.approx(1.0, abs=1e-5)
+    assert np.array_equal(vector, hash_embedding("hello   world", 64))
+    assert not np.array_equal(vector, hash_embedding("hello world", 64, seed=1))
+    assert not np.array_equal(vector, hash_embedding("goodbye world", 64))
+
+
+@pytest.mark.asyncio
+async def test_local_hash_embed_model_embed():
+    """Test that the connector embeds documents at the configured dimension."""
+    model = LocalHashEmbedModel(dimensions=32)
+    documents = [
+        RagDocument(id="doc1", content="first document", metadata={}),
+        RagDocument(id="doc2", content="second document", metadata={}),
+    ]
+    vectors, usage = await model.embed(documents)
+
+    assert model.validation() is True
+    assert [vector.shape for vector in vectors] == [(32,), (32,)]
+    assert usage["total_tokens"] > 0
+
+
+def test_stub_server_openai_protocol():
+    """Test that the stub server answers OpenAI-style requests in both encodings."""
+    client = TestClient(create_app(StubSettings(latency_ms=0, per_item_ms=0)))
+
+    response = client.post(
+        "/v1/embeddings",
+        json={"input": ["a", "b"], "model": "m", "dimensions": 8, "encoding_format": "base64"},
+    )
+    assert response.status_code == 200
+    data = response.json()["data"]
+    decoded = np.frombuffer(base64.b64decode(data[0]["embedding"]), dtype="<f4")
+    assert np.array_equal(decoded, hash_embedding("a", 8))
+
+    response = client.post("/hosted_ai_models/v1/text/embed", json={"input_text": ["a"]})
+    assert len(response.json()["embeddings"][0]) == 768
+
+
+def test_stub_server_injects_rate_limits():
+    """Test that the stub server returns 429s with Retry-After when configured to."""
+    client = TestClient(create_app(StubSettings(latency_ms=0, per_item_ms=0, rate_limit_rate=1)))
+
+    response = client.post("/v1/embeddings", json={"input": ["a"], "model": "m"})
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "1.0"
+    assert client.get("/stats").json()["rate_limited"] == 1
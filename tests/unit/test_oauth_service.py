@@ -0,0 +1,86 @@
+"""
+Unit tests for the OAuthService class.
+"""
+
+import asyncio
+import time
+
+import httpx
+import pytest
+
+pytest.importorskip("platform_commons")
+
+from config import Config  # noqa: E402
+from src.Shared.Exceptions import OauthTokenRetrievalError  # noqa: E402
+from utils.oauth import oauth_service as oauth_module  # noqa: E402
+from utils.oauth.oauth_service import OAuthService  # noqa: E402
+
+
+@pytest.fixture
+def oauth_config():
+    """Create a Config pointing at the mock OAuth server."""
+    config = Config()
+    config.oauth_url = "https://oauth.test/token"
+    return config
+
+
+@pytest.fixture
+def token_server(monkeypatch):
+    """Serve numbered tokens from a mock OAuth server and count the requests."""
+    server = {"requests": 0, "status_code": 200}
+
+    async def handler(request):
+        server["requests"] += 1
+        await asyncio.sleep(0.01)
+        if server["status_code"] != 200:
+            return httpx.Response(server["status_code"], text="denied")
+        return httpx.Response(
+            200, json={"access_token": f"token-{server['requests']}", "expires_in": 3600}
+        )
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(oauth_module.httpx_client_pool, "get_client", lambda url: client)
+    return server
+
+
+@pytest.mark.asyncio
+async def test_concurrent_callers_share_one_request(token_server, oauth_config):
+    """Test that concurrent callers without a token trigger a single token request."""
+    service = OAuthService(oauth_config)
+    tokens = await asyncio.gather(*(service.get_oauth_token() for _ in range(20)))
+
+    assert set(tokens) == {"token-1"}
+    assert token_server["requests"] == 1
+
+
+@pytest.mark.asyncio
+async def test_token_is_renewed_in_the_background(token_server, oauth_config):
+    """Test that a token past its refresh point is still served while it is renewed."""
+    service = OAuthService(oauth_config)
+    await service.get_oauth_token()
+    service.issued_at = time.monotonic() - 2000
+
+    assert await service.get_oauth_token() == "token-1"
+    await service._refresh_task
+    assert await service.get_oauth_token() == "token-2"
+    assert token_server["requests"] == 2
+
+
+@pytest.mark.asyncio
+async def test_expired_token_blocks_on_refresh(token_server, oauth_config):
+    """Test that callers wait for a new token once the current one is about to expire."""
+    service = OAuthService(oauth_config)
+    await service.get_oauth_token()
+    service.issued_at = time.monotonic() - 3590
+
+    assert await service.get_oauth_token() == "token-2"
+
+
+@pytest.mark.asyncio
+async def test_failed_retrieval_raises(token_server, oauth_config):
+    """Test that a non-2XX response from the OAuth server is surfaced."""
+    token_server["status_code"] = 401
+    service = OAuthService(oauth_config)
+
+    with pytest.raises(OauthTokenRetrievalError):
+        await service.get_oauth_token()
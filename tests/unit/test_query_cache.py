@@ -0,0 +1,105 @@
+"""
+Unit tests for the QueryEmbeddingCache class.
+"""
+
+import asyncio
+
+import pytest
+
+from src.EmbedConnectors.query_cache import QueryEmbeddingCache
+
+NAMESPACE = ("pipeline", "local-hash", 768)
+
+
+def make_embedder(calls):
+    """Create an embed function that records the batches it is called with."""
+
+    async def embed_fn(queries):
+        calls.append(list(queries))
+        await asyncio.sleep(0.01)
+        return [[float(len(query))] for query in queries]
+
+    return embed_fn
+
+
+@pytest.mark.asyncio
+async def test_repeated_queries_hit_the_cache():
+    """Test that a query is only embedded once."""
+    cache, calls = QueryEmbeddingCache(max_items=10, ttl_seconds=60), []
+    embed_fn = make_embedder(calls)
+
+    assert await cache.get_or_embed(NAMESPACE, "shoes", embed_fn) == [5.0]
+    assert await cache.get_or_embed(NAMESPACE, " shoes ", embed_fn) == [5.0]
+    assert calls == [["shoes"]]
+    assert cache.stats()["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_queries_share_one_call():
+    """Test that concurrent identical queries are coalesced into a single embedding call."""
+    cache, calls = QueryEmbeddingCache(max_items=10, ttl_seconds=60), []
+    embed_fn = make_embedder(calls)
+
+    results = await asyncio.gather(
+        *[cache.get_or_embed(NAMESPACE, "shoes", embed_fn) for _ in range(5)]
+    )
+
+    assert results == [[5.0]] * 5
+    assert calls == [["shoes"]]
+    assert cache.stats()["coalesced"] == 4
+
+
+@pytest.mark.asyncio
+async def test_namespaces_are_isolated():
+    """Test that pipelines and models do not share cached vectors."""
+    cache, calls = QueryEmbeddingCache(max_items=10, ttl_seconds=60), []
+    embed_fn = make_embedder(calls)
+
+    await cache.get_or_embed(NAMESPACE, "shoes", embed_fn)
+    await cache.get_or_embed(("other", "local-hash", 768), "shoes", embed_fn)
+    assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_entries_expire_and_are_bounded():
+    """Test the TTL and LRU bounds."""
+    cache = QueryEmbeddingCache(max_items=2, ttl_seconds=0)
+    cache.put(NAMESPACE, "a", [1.0])
+    assert cache.get(NAMESPACE, "a") is None
+
+    cache = QueryEmbeddingCache(max_items=2, ttl_seconds=60)
+    for query in ["a", "b", "c"]:
+        cache.put(NAMESPACE, query, [1.0])
+    assert cache.get(NAMESPACE, "a") is None
+    assert cache.get(NAMESPACE, "c") == [1.0]
+
+
+@pytest.mark.asyncio
+async def test_failed_call_is_not_cached():
+    """Test that an upstream error reaches every waiter and is retried next time."""
+    cache = QueryEmbeddingCache(max_items=10, ttl_seconds=60)
+
+    async def failing_embed_fn(queries):
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream down")
+
+    results = await asyncio.gather(
+        cache.get_or_embed(NAMESPACE, "shoes", failing_embed_fn),
+        cache.get_or_embed(NAMESPACE, "shoes", failing_embed_fn),
+        return_exceptions=True,
+    )
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert await cache.get_or_embed(NAMESPACE, "shoes", make_embedder([])) == [5.0]
+
+
+@pytest.mark.asyncio
+async def test_prewarm_embeds_missing_queries_in_batches():
+    """Test that pre-warming embeds each uncached query once."""
+    cache, calls = QueryEmbeddingCache(max_items=10, ttl_seconds=60), []
+    cache.put(NAMESPACE, "a", [1.0])
+
+    warmed = await cache.prewarm(NAMESPACE, ["a", "bb", "bb", "ccc", ""], make_embedder(calls))
+
+    assert warmed == 2
+    assert calls == [["bb", "ccc"]]
+    assert cache.get(NAMESPACE, "ccc") == [3.0]
@@ -0,0 +1,207 @@
+"""
+Unit tests for the embedding rate limiters.
+"""
+
+import pytest
+
+pytest.importorskip("platform_commons")
+
+from redis.exceptions import ConnectionError as RedisConnectionError  # noqa: E402
+
+from src.EmbedConnectors import rate_limiter  # noqa: E402
+from src.EmbedConnectors.concurrency import AIMDController, run_adaptive_batches  # noqa: E402
+from src.EmbedConnectors.rate_limiter import (  # noqa: E402
+    LocalRateLimiter,
+    RateLimiter,
+    RedisRateLimiter,
+    parse_retry_after,
+)
+
+
+class RateLimited(Exception):
+    def __init__(self, retry_after=None):
+        self.retry_after = retry_after
+        super().__init__("rate limited")
+
+
+def test_parse_retry_after():
+    """Test that Retry-After is parsed from seconds and HTTP dates."""
+    assert parse_retry_after("2.5") == 2.5
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("soon") is None
+
+
+def test_rate_limiter_is_abstract():
+    """Test that the base limiter cannot be used without a backend."""
+    with pytest.raises(TypeError):
+        RateLimiter()
+
+
+@pytest.mark.asyncio
+async def test_requests_within_budget_do_not_wait():
+    """Test that a full bucket serves requests immediately."""
+    limiter = LocalRateLimiter(requests_per_minute=60, tokens_per_minute=1000)
+    assert await limiter.reserve(500) == 0
+    assert await limiter.reserve(500) == 0
+
+
+@pytest.mark.asyncio
+async def test_exhausted_token_budget_waits_for_refill():
+    """Test that callers beyond the budget wait in proportion to the deficit."""
+    limiter = LocalRateLimiter(tokens_per_minute=600)
+    await limiter.reserve(600)
+
+    # 60 tokens refill in roughly six seconds, and a second caller queues behind the first
+    assert await limiter.reserve(60) == pytest.approx(6, abs=0.1)
+    assert await limiter.reserve(60) == pytest.approx(12, abs=0.1)
+
+
+@pytest.mark.asyncio
+async def test_unlimited_budgets_never_wait():
+    """Test that a zero budget disables limiting."""
+    limiter = LocalRateLimiter()
+    for _ in range(100):
+        assert await limiter.reserve(10_000) == 0
+
+
+@pytest.mark.asyncio
+async def test_call_retries_after_rate_limit():
+    """Test that 429s are waited out rather than failing the request."""
+    limiter = LocalRateLimiter()
+    attempts, waits = 0, []
+
+    async def request_fn():
+        nonlocal attempts
+        attempts += 1
+        if attempts < 3:
+            raise RateLimited(retry_after=0.01)
+        return "ok"
+
+    result = await limiter.call(
+        request_fn,
+        tokens=1,
+        rate_limit_errors=(RateLimited,),
+        on_wait=lambda waited, rate_limited: waits.append((waited, rate_limited)),
+    )
+
+    assert result == "ok"
+    # Both Retry-After pauses count as waiting time
+    ((waited, rate_limited),) = waits
+    assert rate_limited == 2
+    assert waited == pytest.approx(0.02)
+
+
+@pytest.mark.asyncio
+async def test_call_gives_up_after_max_retries():
+    """Test that the rate-limit error is raised once retries are exhausted."""
+    limiter = LocalRateLimiter()
+
+    async def request_fn():
+        raise RateLimited(retry_after=0)
+
+    with pytest.raises(RateLimited):
+        await limiter.call(request_fn, tokens=1, rate_limit_errors=(RateLimited,), max_retries=2)
+
+
+def make_controller(latency_threshold_ms: float) -> AIMDController:
+    return AIMDController(
+        initial_batch_size=4,
+        min_batch_size=1,
+        max_batch_size=8,
+        initial_concurrency=2,
+        min_concurrency=1,
+        max_concurrency=4,
+        latency_threshold_ms=latency_threshold_ms,
+    )
+
+
+@pytest.mark.asyncio
+async def test_absorbed_rate_limit_reaches_the_controller():
+    """Test that a 429 retried by the limiter still shrinks the adaptive batches."""
+    controller = make_controller(latency_threshold_ms=10_000)
+    limiter = LocalRateLimiter()
+    attempts = 0
+
+    async def request_fn(batch):
+        async def send():
+            nonlocal attempts
+            attempts += 1
+            if attempts == 1:
+                raise RateLimited(retry_after=0)
+            return batch, {}
+
+        return await limiter.call(send, tokens=1, rate_limit_errors=(RateLimited,))
+
+    results, _ = await run_adaptive_batches(
+        controller, [0], request_fn, rate_limit_errors=(RateLimited,)
+    )
+
+    assert results == [0]
+    assert controller.rate_limited == 1
+    assert controller.batch_size == 2
+    assert controller.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_limiter_waits_are_not_counted_as_latency():
+    """Test that time spent queued on the limiter does not look like a slow endpoint."""
+    controller = make_controller(latency_threshold_ms=50)
+    # 100 tokens per second, so a 10 token request waits about 0.1s once the bucket is empty
+    limiter = LocalRateLimiter(tokens_per_minute=6000)
+    await limiter.reserve(6000)
+
+    async def request_fn(batch):
+        async def send():
+            return batch, {}
+
+        return await limiter.call(send, tokens=10, rate_limit_errors=(RateLimited,))
+
+    await run_adaptive_batches(controller, [0], request_fn)
+
+    assert controller.batch_size == 5
+
+
+class FlakyRedis:
+    def __init__(self):
+        self.available = False
+
+    async def eval(self, *args):
+        if not self.available:
+            raise RedisConnectionError("connection refused")
+        return "0"
+
+
+class RecordingLogger:
+    def __init__(self):
+        self.warnings: list[str] = []
+        self.infos: list[str] = []
+
+    def warning(self, message):
+        self.warnings.append(message)
+
+    def info(self, message):
+        self.infos.append(message)
+
+
+@pytest.mark.asyncio
+async def test_redis_fallback_is_logged_when_the_state_changes(monkeypatch):
+    """Test that an unavailable Redis is logged once, not on every call."""
+    redis, log = FlakyRedis(), RecordingLogger()
+    monkeypatch.setattr(rate_limiter, "logger", log)
+    limiter = RedisRateLimiter("model", requests_per_minute=600)
+    monkeypatch.setattr(limiter, "_client", lambda: redis)
+
+    for _ in range(3):
+        assert await limiter.reserve(1) == 0
+    await limiter.block(0)
+    assert len(log.warnings) == 1
+
+    redis.available = True
+    for _ in range(3):
+        assert await limiter.reserve(1) == 0
+    assert len(log.infos) == 1
+
+    redis.available = False
+    await limiter.reserve(1)
+    assert len(log.warnings) == 2
@@ -0,0 +1,55 @@
+"""
+Unit tests for sink connector caching in SinkConnectorFactory.
+"""
+
+import pytest
+
+pytest.importorskip("platform_commons")
+
+from src.ModelFactories import SinkConnectorFactory as factory_module  # noqa: E402
+from src.ModelFactories.SinkConnectorFactory import SinkConnectorFactory  # noqa: E402
+
+SETTINGS = {"hosts": ["http://localhost:9200"], "index": "test_index"}
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    SinkConnectorFactory.clear()
+    yield
+    SinkConnectorFactory.clear()
+
+
+def test_same_config_returns_cached_sink():
+    first = SinkConnectorFactory.get_sink("Elasticsearch", dict(SETTINGS))
+    second = SinkConnectorFactory.get_sink("elasticsearch", dict(SETTINGS))
+
+    assert first is second
+    assert SinkConnectorFactory.stats()["cached_sinks"] == 1
+
+
+def test_different_configs_get_their_own_sink_and_share_a_client():
+    first = SinkConnectorFactory.get_sink("elasticsearch", SETTINGS)
+    second = SinkConnectorFactory.get_sink("elasticsearch", {**SETTINGS, "index": "other"})
+
+    assert first is not second
+    assert first.es_client is second.es_client
+
+
+def test_idle_sinks_are_evicted(monkeypatch):
+    first = SinkConnectorFactory.get_sink("elasticsearch", SETTINGS)
+    monkeypatch.setattr(factory_module.settings, "sink_cache_idle_ttl_s", 0)
+
+    second = SinkConnectorFactory.get_sink("elasticsearch", SETTINGS)
+
+    assert first is not second
+
+
+def test_least_recently_used_sinks_are_evicted_beyond_the_limit(monkeypatch):
+    monkeypatch.setattr(factory_module.settings, "sink_cache_max_items", 2)
+    first = SinkConnectorFactory.get_sink("elasticsearch", {**SETTINGS, "index": "a"})
+    SinkConnectorFactory.get_sink("elasticsearch", {**SETTINGS, "index": "b"})
+    SinkConnectorFactory.get_sink("elasticsearch", {**SETTINGS, "index": "a"})
+    SinkConnectorFactory.get_sink("elasticsearch", {**SETTINGS, "index": "c"})
+
+    assert SinkConnectorFactory.stats()["cached_sinks"] == 2
+    assert SinkConnectorFactory.get_sink("elasticsearch", {**SETTINGS, "index": "a"}) is first
@@ -0,0 +1,129 @@
+"""
+Unit tests for the ThinkTankEmbedModel's concurrent batch requests.
+"""
+
+import asyncio
+import json
+
+import httpx
+import pytest
+
+pytest.importorskip("platform_commons")
+
+from platform_commons.auth.user import User  # noqa: E402
+
+from src.EmbedConnectors import ThinkTankEmbedModel as thinktank  # noqa: E402
+from src.EmbedConnectors.endpoint_pool import EndpointPool  # noqa: E402
+from src.EmbedConnectors.ThinkTankEmbedModel import (  # noqa: E402
+    ThinkTankEmbedModel,
+    get_thinktank_concurrency,
+)
+from src.Shared.Exceptions import ThinktankResponseError  # noqa: E402
+
+# Token counts for this model fall back to an approximation when tiktoken is offline
+MODEL = "jina-v2-base"
+URL = "https://thinktank.test/v1/embeddings"
+
+
+class FakeThinkTank:
+    """Answers embedding requests after a short delay, recording how many overlap."""
+
+    def __init__(self, status_code: int = 200):
+        self.status_code = status_code
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.requests = 0
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.01)
+        finally:
+            self.in_flight -= 1
+        inputs = json.loads(request.content)["input"]
+        return httpx.Response(
+            self.status_code,
+            json={
+                "data": [{"embedding": [float(text.split()[-1])]} for text in inputs],
+                "usage": {"prompt_tokens": len(inputs), "total_tokens": 2 * len(inputs)},
+            },
+        )
+
+
+@pytest.fixture
+def thinktank_service(monkeypatch):
+    service = FakeThinkTank()
+    monkeypatch.setattr(thinktank, "get_endpoint_pool", lambda name, urls: EndpointPool([URL]))
+    return service
+
+
+def make_client(service: FakeThinkTank) -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.MockTransport(service.handle))
+
+
+def make_user() -> User:
+    return User(id="dummy", name="Dummy User", tap_app_name="dummy")
+
+
+def test_concurrency_is_configured_per_model(monkeypatch):
+    monkeypatch.setattr(
+        thinktank.config, "thinktank_embeddings_concurrency", {"default": 3, "fast-model": 8}
+    )
+
+    assert get_thinktank_concurrency("fast-model") == 8
+    assert get_thinktank_concurrency("other-model") == 3
+
+    monkeypatch.setattr(thinktank.config, "thinktank_embeddings_concurrency", {"default": 0})
+    assert get_thinktank_concurrency("other-model") == 1
+
+
+@pytest.mark.asyncio
+async def test_batches_run_concurrently_up_to_the_model_limit(monkeypatch, thinktank_service):
+    monkeypatch.setattr(thinktank.config, "thinktank_embeddings_concurrency", {"default": 2})
+    inputs = [f"chunk {idx}" for idx in range(80)]
+
+    async with make_client(thinktank_service) as client:
+        result = await ThinkTankEmbedModel(api_key="test").generate_thinktank_embeddings(
+            model=MODEL, input_list=inputs, user=make_user(), httpx_client=client
+        )
+
+    # 80 inputs are sent as five batches of at most 16, two at a time
+    assert thinktank_service.requests == 5
+    assert thinktank_service.max_in_flight == 2
+    assert [item["combined_sentence"] for item in result["content_embedding"]] == inputs
+    assert [float(item["embedding"][0]) for item in result["content_embedding"]] == [
+        float(idx) for idx in range(80)
+    ]
+    # Usage is summed over the batches
+    assert result["usage"] == {"prompt_tokens": 80, "total_tokens": 160}
+
+
+@pytest.mark.asyncio
+async def test_single_batch_returns_its_own_usage(thinktank_service):
+    async with make_client(thinktank_service) as client:
+        batch_output, usage = await ThinkTankEmbedModel(api_key="test")._request_thinktank_batch(
+            model=MODEL,
+            batch=["chunk 1", "chunk 2"],
+            user=make_user(),
+            httpx_client=client,
+            headers={},
+        )
+
+    assert [item["combined_sentence"] for item in batch_output] == ["chunk 1", "chunk 2"]
+    assert usage == {"prompt_tokens": 2, "total_tokens": 4}
+
+
+@pytest.mark.asyncio
+async def test_failed_batch_fails_the_call(thinktank_service):
+    thinktank_service.status_code = 500
+
+    async with make_client(thinktank_service) as client:
+        with pytest.raises(ThinktankResponseError):
+            await ThinkTankEmbedModel(api_key="test").generate_thinktank_embeddings(
+                model=MODEL,
+                input_list=[f"chunk {idx}" for idx in range(40)],
+                user=make_user(),
+                httpx_client=client,
+            )
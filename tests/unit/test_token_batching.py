@@ -0,0 +1,93 @@
+"""
+Unit tests for token-aware embedding batch packing.
+"""
+
+import pytest
+
+from src.EmbedConnectors.token_batching import restore_order, token_aware_batching
+
+
+@pytest.fixture
+def content_list():
+    """Create inputs of varying length for testing."""
+    return ["aaaa", "b", "cc", "dddddd", "e", "fff"]
+
+
+@pytest.fixture
+def token_counts(content_list):
+    """One token per character keeps the budgets easy to reason about."""
+    return [len(text) for text in content_list]
+
+
+def test_batches_respect_token_budget(content_list, token_counts):
+    """Test that no batch exceeds the token budget."""
+    batches = list(
+        token_aware_batching(
+            content_list, model=None, max_items=10, max_tokens=6, token_counts=token_counts
+        )
+    )
+    for indices, batch in batches:
+        assert sum(token_counts[idx] for idx in indices) <= 6
+        assert batch == [content_list[idx] for idx in indices]
+
+
+def test_batches_respect_item_cap(content_list, token_counts):
+    """Test that no batch exceeds the item cap."""
+    batches = list(
+        token_aware_batching(
+            content_list, model=None, max_items=2, max_tokens=100, token_counts=token_counts
+        )
+    )
+    assert len(batches) == 3
+    assert all(len(batch) <= 2 for _, batch in batches)
+
+
+def test_batches_are_sorted_by_length(content_list, token_counts):
+    """Test that similarly sized inputs are packed together."""
+    batches = list(
+        token_aware_batching(
+            content_list, model=None, max_items=2, max_tokens=100, token_counts=token_counts
+        )
+    )
+    assert [batch for _, batch in batches] == [["b", "e"], ["cc", "fff"], ["aaaa", "dddddd"]]
+
+
+def test_oversized_input_gets_its_own_batch(token_counts, content_list):
+    """Test that an input larger than the budget is still sent, alone."""
+    batches = list(
+        token_aware_batching(
+            content_list, model=None, max_items=10, max_tokens=5, token_counts=token_counts
+        )
+    )
+    assert ([3], ["dddddd"]) in batches
+
+
+def test_every_input_is_batched_once(content_list, token_counts):
+    """Test that packing neither drops nor duplicates inputs."""
+    batches = list(
+        token_aware_batching(
+            content_list, model=None, max_items=3, max_tokens=7, token_counts=token_counts
+        )
+    )
+    assert sorted(idx for indices, _ in batches for idx in indices) == list(range(6))
+
+
+def test_restore_order(content_list, token_counts):
+    """Test that per-batch results are merged back in input order."""
+    batches = list(
+        token_aware_batching(
+            content_list, model=None, max_items=2, max_tokens=100, token_counts=token_counts
+        )
+    )
+    results = [(indices, [text.upper() for text in batch]) for indices, batch in batches]
+    assert restore_order(results, len(content_list)) == [text.upper() for text in content_list]
+
+
+def test_invalid_arguments(content_list):
+    """Test argument validation."""
+    with pytest.raises(ValueError):
+        list(token_aware_batching(content_list, model=None, max_items=0))
+    with pytest.raises(ValueError):
+        list(token_aware_batching(content_list, model=None, max_items=2, token_counts=[1]))
+    with pytest.raises(TypeError):
+        list(token_aware_batching("not a list", model=None, max_items=2))
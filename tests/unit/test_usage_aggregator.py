@@ -0,0 +1,87 @@
+"""
+Unit tests for the UsageAggregator class.
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from src.EmbedConnectors.usage_aggregator import UsageAggregator
+
+
+@pytest.fixture
+def user():
+    """Create a user for attributing usage."""
+    return SimpleNamespace(id="user-1", tap_app_name="app")
+
+
+def make_aggregator(published, **kwargs):
+    """Create an aggregator that collects published records."""
+
+    async def publish_fn(record):
+        published.append(record)
+
+    defaults = {
+        "flush_interval_s": 60,
+        "max_records": 100,
+        "count_tokens_fn": lambda texts, model: [len(text) for text in texts],
+    }
+    return UsageAggregator(publish_fn=publish_fn, **{**defaults, **kwargs})
+
+
+@pytest.mark.asyncio
+async def test_usage_is_aggregated_per_user_and_model(user):
+    """Test that many requests are published as one record per (user, model)."""
+    published = []
+    aggregator = make_aggregator(published)
+    for latency in [10.0, 30.0]:
+        aggregator.record(["a", "b"], user, "model-a", latency, 5, token_calculation=False)
+    aggregator.record(["c"], user, "model-b", 20.0, 3, token_calculation=False)
+
+    assert await aggregator.flush() == 2
+    by_model = {record.model: record for record in published}
+    assert by_model["model-a"].tokens == 10
+    assert by_model["model-a"].requests == 2
+    assert by_model["model-a"].items == 4
+    assert by_model["model-a"].latency_ms_mean == 20.0
+    assert by_model["model-a"].latency_ms_max == 30.0
+    await aggregator.aclose()
+
+
+@pytest.mark.asyncio
+async def test_tokens_are_counted_at_flush(user):
+    """Test that inputs without provider token counts are tokenised during the flush."""
+    published = []
+    aggregator = make_aggregator(published)
+    aggregator.record(["abc", "de"], user, "model", 1.0, 0, token_calculation=True)
+
+    await aggregator.aclose()
+    assert published[0].tokens == 5
+    assert published[0].uncounted_texts == []
+
+
+@pytest.mark.asyncio
+async def test_size_threshold_triggers_flush(user):
+    """Test that reaching max_records flushes without waiting for the interval."""
+    published = []
+    aggregator = make_aggregator(published, max_records=3)
+    for _ in range(3):
+        aggregator.record(["a"], user, "model", 1.0, 1, token_calculation=False)
+
+    await asyncio.sleep(0)
+    assert len(published) == 1
+    assert published[0].requests == 3
+    await aggregator.aclose()
+
+
+@pytest.mark.asyncio
+async def test_interval_triggers_flush(user):
+    """Test that buffered usage is published on the flush interval."""
+    published = []
+    aggregator = make_aggregator(published, flush_interval_s=0.01)
+    aggregator.record(["a"], user, "model", 1.0, 1, token_calculation=False)
+
+    await asyncio.sleep(0.05)
+    assert len(published) == 1
+    await aggregator.aclose()
@@ -0,0 +1,79 @@
+"""
+Unit tests for the post-embedding vector transform stage.
+"""
+
+import numpy as np
+import pytest
+from pydantic import ValidationError
+
+from src.Shared.RagVector import RagVector
+from src.Shared.vector_transform import TRANSFORM_METADATA_KEY, VectorTransform
+from src.Shared.vector_transform_config_schema import VectorTransformConfigSchema
+from src.Shared.vector_utils import quantize_binary, quantize_int8, truncate_dimensions
+
+
+def test_truncate_dimensions_renormalises():
+    """Test that truncated Matryoshka vectors are rescaled to unit length."""
+    vector = np.array([3.0, 4.0, 12.0], dtype=np.float32) / 13.0
+    truncated = truncate_dimensions(vector, 2)
+
+    assert truncated.dtype == np.float32
+    assert np.allclose(truncated, [0.6, 0.8])
+    assert np.allclose(vector, np.array([3.0, 4.0, 12.0]) / 13.0)
+
+
+def test_quantize_int8_scales_to_full_range():
+    """Test that the largest component maps to 127 and cosine similarity is preserved."""
+    vector = np.array([0.5, -0.25, 0.1, 0.0], dtype=np.float32)
+    quantized = quantize_int8(vector)
+
+    assert quantized.dtype == np.int8
+    assert quantized.tolist() == [127, -64, 25, 0]
+    cosine = quantized @ vector / (np.linalg.norm(quantized) * np.linalg.norm(vector))
+    assert cosine > 0.999
+    assert quantize_int8(np.zeros(3, dtype=np.float32)).tolist() == [0, 0, 0]
+
+
+def test_quantize_binary_packs_sign_bits():
+    """Test that positive components become set bits packed eight to a byte."""
+    vector = np.array([1, -1, 1, -1, -1, -1, -1, 1, 1, 1, 1, 1, 1, 1, 1, 1], dtype=np.float32)
+    packed = quantize_binary(vector)
+
+    assert packed.dtype == np.int8
+    assert packed.view(np.uint8).tolist() == [0b10100001, 0b11111111]
+
+
+def test_transform_records_parameters_in_metadata():
+    """Test that the applied transform is recorded on each vector without touching the chunk."""
+    chunk_metadata = {"source": "test"}
+    rag_vector = RagVector(id="a", vector=np.ones(16, dtype=np.float32), metadata=chunk_metadata)
+    transform = VectorTransform(VectorTransformConfigSchema(dimensions=8, quantization="int8"))
+
+    (transformed,) = transform.apply([rag_vector])
+
+    assert transformed.vector.dtype == np.int8
+    assert transformed.vector.tolist() == [127] * 8
+    assert transformed.metadata[TRANSFORM_METADATA_KEY] == {
+        "source_dimensions": 16,
+        "dimensions": 8,
+        "quantization": "int8",
+        "element_type": "byte",
+    }
+    assert chunk_metadata == {"source": "test"}
+
+
+def test_identity_transform_leaves_vectors_untouched():
+    """Test that the default transform passes float32 vectors through unchanged."""
+    vector = np.ones(4, dtype=np.float32)
+    rag_vector = RagVector(id="a", vector=vector, metadata={})
+
+    (transformed,) = VectorTransform().apply([rag_vector])
+
+    assert transformed.vector is vector
+    assert TRANSFORM_METADATA_KEY not in transformed.metadata
+
+
+def test_rejects_unknown_quantization():
+    """Test that only supported quantisations can be configured."""
+    with pytest.raises(ValidationError):
+        VectorTransformConfigSchema(quantization="fp16")
@@ -0,0 +1,50 @@
+"""
+Unit tests for packed float32 vector helpers.
+"""
+
+import base64
+
+import numpy as np
+
+from src.Shared.RagSearch import RagSearchResult
+from src.Shared.RagVector import RagVector
+from src.Shared.vector_utils import decode_base64_vector, rows_to_float32, to_float32, to_list
+
+
+def test_decode_base64_vector():
+    """Test that base64 embeddings decode to float32 without JSON float parsing."""
+    encoded = base64.b64encode(np.array([0.5, -1.0, 2.0], dtype="<f4").tobytes()).decode()
+    vector = decode_base64_vector(encoded)
+
+    assert vector.dtype == np.float32
+    assert vector.tolist() == [0.5, -1.0, 2.0]
+    assert to_float32(encoded).tolist() == [0.5, -1.0, 2.0]
+
+
+def test_to_float32_does_not_copy_packed_vectors():
+    """Test that float32 arrays are passed through as-is."""
+    vector = np.array([1.0, 2.0], dtype=np.float32)
+    assert to_float32(vector) is vector
+    assert to_float32([1.0, 2.0]).dtype == np.float32
+
+
+def test_rows_share_one_buffer():
+    """Test that a batch of embeddings is packed into a single allocation."""
+    rows = rows_to_float32([[1.0, 2.0], [3.0, 4.0]])
+
+    assert [row.tolist() for row in rows] == [[1.0, 2.0], [3.0, 4.0]]
+    assert rows[0].base is rows[1].base
+    assert rows_to_float32([]) == []
+
+
+def test_rag_vector_holds_float32():
+    """Test that RagVector converts list embeddings to packed float32."""
+    rag_vector = RagVector(id="a", vector=[0.25, 0.5], metadata={})
+    assert rag_vector.vector.dtype == np.float32
+
+
+def test_search_result_accepts_packed_vectors():
+    """Test that search results serialise packed vectors as lists."""
+    result = RagSearchResult(id="a", metadata={}, vector=np.array([0.25, 0.5], dtype=np.float32))
+    assert result.vector == [0.25, 0.5]
+    assert to_list(None) is None
@@ -0,0 +1,228 @@
+import asyncio
+from collections.abc import AsyncIterator
+from typing import Any
+
+import httpx
+
+from config import Config
+from utils.platform_commons.logger import logger
+
+settings = Config()
+
+
+class _EndpointCounters:
+    """Request and connection counters of one pooled endpoint."""
+
+    def __init__(self):
+        self.requests_sent = 0
+        self.active_requests = 0
+        self.connections_opened = 0
+        self.http2_responses = 0
+
+
+class _ClosingStream(httpx.AsyncByteStream):
+    """Response stream that marks its request as finished once the response is closed."""
+
+    def __init__(self, stream: httpx.AsyncByteStream, counters: _EndpointCounters):
+        self._stream = stream
+        self._counters = counters
+        self._closed = False
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self):
+        if not self._closed:
+            self._closed = True
+            self._counters.active_requests -= 1
+        await self._stream.aclose()
+
+
+class _CountingTransport(httpx.AsyncHTTPTransport):
+    """
+    HTTP transport that counts the requests of an endpoint, those in flight and the new
+    connections they open. Connections are seen through httpcore's public ``trace``
+    extension, so pool utilisation is reported without reading the pool's internals.
+    """
+
+    def __init__(self, counters: _EndpointCounters, **kwargs):
+        super().__init__(**kwargs)
+        self._counters = counters
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        counters = self._counters
+        counters.requests_sent += 1
+        counters.active_requests += 1
+        caller_trace = request.extensions.get("trace")
+
+        async def trace(event_name: str, info: dict[str, Any]):
+            if event_name == "connection.connect_tcp.complete":
+                counters.connections_opened += 1
+            if caller_trace is not None:
+                await caller_trace(event_name, info)
+
+        request.extensions = {**request.extensions, "trace": trace}
+        try:
+            response = await super().handle_async_request(request)
+        except BaseException:
+            counters.active_requests -= 1
+            raise
+        if response.extensions.get("http_version") == b"HTTP/2":
+            counters.http2_responses += 1
+        response.stream = _ClosingStream(response.stream, counters)
+        return response
+
+
+class HttpClientPool:
+    """Process-wide registry of pooled ``httpx.AsyncClient`` instances keyed by endpoint.
+
+    Every embed connector, Celery task and the FastAPI app share one client per endpoint
+    origin (scheme, host and port), so TCP/TLS connections are reused and HTTP/2 streams can
+    be multiplexed instead of paying a new handshake for every batch. Clients are bound to the
+    event loop that created them; a client requested from a different loop is replaced.
+    """
+
+    def __init__(
+        self,
+        max_connections: int,
+        max_keepalive_connections: int,
+        keepalive_expiry: float,
+        http2: bool,
+        retries: int,
+    ):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.http2 = http2
+        self.retries = retries
+        self._clients: dict[str, tuple[httpx.AsyncClient, asyncio.AbstractEventLoop]] = {}
+        self._counters: dict[str, _EndpointCounters] = {}
+        # Strong references to the closes of replaced clients until they finish
+        self._closing: set[asyncio.Future] = set()
+
+    @staticmethod
+    def endpoint_key(url: str | httpx.URL) -> str:
+        """Returns the origin of a URL, which is the unit connections are pooled by."""
+        parsed = httpx.URL(url)
+        port = f":{parsed.port}" if parsed.port else ""
+        return f"{parsed.scheme}://{parsed.host}{port}"
+
+    def get_client(self, url: str | httpx.URL) -> httpx.AsyncClient:
+        """
+        Returns the shared client for the endpoint of ``url``, creating it on first use.
+
+        Args:
+            url (str | httpx.URL): Any URL served by the endpoint.
+
+        Returns:
+            httpx.AsyncClient: A pooled client bound to the running event loop.
+        """
+        key = self.endpoint_key(url)
+        loop = asyncio.get_running_loop()
+        entry = self._clients.get(key)
+        if entry is not None:
+            client, client_loop = entry
+            if client_loop is loop and not client.is_closed:
+                return client
+            logger.info(f"Replacing pooled httpx client for {key} bound to a stale event loop")
+            self._discard(key, client, client_loop)
+
+        counters = self._counters.setdefault(key, _EndpointCounters())
+        client = httpx.AsyncClient(
+            transport=_CountingTransport(
+                counters, http2=self.http2, limits=self.limits, retries=self.retries
+            )
+        )
+        self._clients[key] = (client, loop)
+        logger.info(f"Created pooled httpx client for {key} (http2={self.http2})")
+        return client
+
+    def _discard(self, key: str, client: httpx.AsyncClient, client_loop: asyncio.AbstractEventLoop):
+        """
+        Closes a replaced client so its connections are not leaked. The close runs on the
+        client's own loop when that loop is still running in another thread, and on the
+        running loop otherwise.
+        """
+        if client.is_closed:
+            return
+        if client_loop.is_running() and not client_loop.is_closed():
+            closing = asyncio.run_coroutine_threadsafe(
+                self._aclose_client(key, client), client_loop
+            )
+        else:
+            closing = asyncio.ensure_future(self._aclose_client(key, client))
+        self._closing.add(closing)
+        closing.add_done_callback(self._closing.discard)
+
+    async def _aclose_client(self, key: str, client: httpx.AsyncClient):
+        try:
+            await client.aclose()
+            logger.info(f"Closed pooled httpx client for {key}")
+        except Exception as e:
+            # Connections of a closed loop cannot be shut down cleanly; they are dropped
+            # with the client
+            logger.warning(f"Failed to close pooled httpx client for {key}: {e}")
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        """
+        Returns pool utilisation per endpoint.
+
+        Returns:
+            dict: For each endpoint, the requests sent so far and those still in flight, the
+                connections opened so far (far fewer than the requests when they are reused),
+                the responses served over HTTP/2 and the pool limits.
+        """
+        stats: dict[str, dict[str, Any]] = {}
+        for key, (client, _) in self._clients.items():
+            counters = self._counters[key]
+            stats[key] = {
+                "requests_sent": counters.requests_sent,
+                "active_requests": counters.active_requests,
+                "connections_opened": counters.connections_opened,
+                "http2_responses": counters.http2_responses,
+                "max_connections": self.limits.max_connections,
+                "max_keepalive_connections": self.limits.max_keepalive_connections,
+                "closed": client.is_closed,
+            }
+        return stats
+
+    async def aclose(self):
+        """Closes every pooled client owned by the running event loop and drops the rest."""
+        loop = asyncio.get_running_loop()
+        clients, self._clients = self._clients, {}
+        for key, (client, client_loop) in clients.items():
+            if client_loop is not loop or client.is_closed:
+                continue
+            try:
+                await client.aclose()
+                logger.info(f"Closed pooled httpx client for {key}")
+            except Exception as e:
+                logger.error(f"Failed to close pooled httpx client for {key}: {e}")
+
+    def close(self):
+        """
+        Synchronous variant of ``aclose`` for shutdown hooks that run outside an event loop,
+        such as Celery's ``worker_process_shutdown`` signal.
+        """
+        clients, self._clients = self._clients, {}
+        for key, (client, client_loop) in clients.items():
+            if client.is_closed or client_loop.is_closed() or client_loop.is_running():
+                continue
+            try:
+                client_loop.run_until_complete(client.aclose())
+                logger.info(f"Closed pooled httpx client for {key}")
+            except Exception as e:
+                logger.error(f"Failed to close pooled httpx client for {key}: {e}")
+
+
+# Singleton client pool shared across the process
+httpx_client_pool = HttpClientPool(
+    max_connections=settings.httpx_max_connections,
+    max_keepalive_connections=settings.httpx_max_keepalive_connections,
+    keepalive_expiry=settings.httpx_keepalive_expiry,
+    http2=settings.httpx_http2,
+    retries=settings.retry_count,
+)
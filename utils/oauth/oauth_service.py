@@ -1,3 +1,4 @@
+import asyncio
 import time
 from typing import Optional
 
@@ -5,56 +6,98 @@ import httpx
 from config import Config
 from httpx import HTTPStatusError
 from src.Shared.Exceptions import OauthTokenRetrievalError
+from utils.http.client_pool import httpx_client_pool
+from utils.platform_commons.logger import logger
 
 config = Config()
 
+# Minimum seconds between background renewal attempts after one has failed
+RENEWAL_RETRY_INTERVAL_S = 5.0
+
 
 class OAuthService:
+    """
+    Caches the password-grant access token used to call HAM.
+
+    Only one token request is in flight at a time: concurrent callers that need a new token
+    wait on the same request instead of each posting to the OAuth server. Once a token has
+    passed ``oauth_token_refresh_ratio`` of its lifetime it is renewed in the background while
+    callers keep receiving the current one, so embed calls only wait on the OAuth server when
+    there is no usable token at all.
+    """
+
     def __init__(self, config: Config):
         self.config = config
-        self.issued_at: Optional[float] = None
-        self.issued_at = None
-        self.expires_in = None
         self.access_token: Optional[str] = None
+        self.issued_at: Optional[float] = None
+        self.expires_in: Optional[float] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._last_failure: float = 0.0
+
+    def _is_usable(self, now: float) -> bool:
+        return (
+            self.access_token is not None
+            and now - self.issued_at < self.expires_in - self.config.oauth_token_expiry_margin_s
+        )
+
+    def _needs_renewal(self, now: float) -> bool:
+        return now - self.issued_at >= self.expires_in * self.config.oauth_token_refresh_ratio
 
     async def get_oauth_token(self) -> str:
-        """Returns a fresh oauth token.
+        """Returns a valid oauth token, renewing it ahead of expiry.
 
         Returns:
-            str: the fresh oauth token
+            str: the oauth token
 
         Raises:
-            OauthTokenRetrievalError: if a non 2XX status code is received
+            OauthTokenRetrievalError: if there is no usable token and a new one cannot be
+            retrieved
         """
-
-        if self.access_token is not None and time.time() - self.issued_at <= self.expires_in / 2:
-            if self.access_token is None:
-                raise OauthTokenRetrievalError("Failed to retrieve access token")
+        now = time.monotonic()
+        if self._is_usable(now):
+            if self._needs_renewal(now) and now - self._last_failure >= RENEWAL_RETRY_INTERVAL_S:
+                self._start_refresh()
             return self.access_token
 
-        async with httpx.AsyncClient() as client:
-            try:
-                response = await client.post(
-                    config.oauth_url,  # Changed from self.settings.oauth_url to config.oauth_url
-                    headers={
-                        "Authorization": "Basic " + config.oauth_client_credentials
-                    },  # Changed to config
-                    data={
-                        "grant_type": "password",
-                        "username": config.oauth_nuid_username,  # Changed to config
-                        "password": config.oauth_nuid_password,  # Changed to config
-                        "scope": "openid profile email",
-                    },
-                )
-                response.raise_for_status()
-                data = response.json()
-
-                self.access_token = data["access_token"]
-                self.issued_at = time.time()
-                self.expires_in = data["expires_in"]
-                return self.access_token
-            except HTTPStatusError as e:
-                raise OauthTokenRetrievalError(e.response.status_code, e.response.text)
+        return await asyncio.shield(self._start_refresh())
+
+    def _start_refresh(self) -> asyncio.Task:
+        """Returns the in-flight token request, starting one if none is running."""
+        task = self._refresh_task
+        if task is None or task.done() or task.get_loop() is not asyncio.get_running_loop():
+            task = self._refresh_task = asyncio.create_task(self._fetch_token())
+            task.add_done_callback(self._log_refresh_failure)
+        return task
+
+    def _log_refresh_failure(self, task: asyncio.Task):
+        if not task.cancelled() and task.exception() is not None:
+            self._last_failure = time.monotonic()
+            logger.warning(f"Failed to renew OAuth access token: {task.exception()}")
+
+    async def _fetch_token(self) -> str:
+        client = httpx_client_pool.get_client(self.config.oauth_url)
+        try:
+            response = await client.post(
+                self.config.oauth_url,
+                headers={"Authorization": "Basic " + self.config.oauth_client_credentials},
+                data={
+                    "grant_type": "password",
+                    "username": self.config.oauth_nuid_username,
+                    "password": self.config.oauth_nuid_password,
+                    "scope": "openid profile email",
+                },
+            )
+            response.raise_for_status()
+            data = response.json()
+        except HTTPStatusError as e:
+            raise OauthTokenRetrievalError(e.response.status_code, e.response.text)
+        except httpx.HTTPError as e:
+            raise OauthTokenRetrievalError(detail=str(e))
+
+        self.access_token = data["access_token"]
+        self.issued_at = time.monotonic()
+        self.expires_in = float(data["expires_in"])
+        return self.access_token
 
 
 oauth_service = OAuthService(config)  # Pass config object to OAuthService